@@ -8,6 +8,8 @@ from flask_migrate import Migrate
 
 from app.config import config_by_name
 from app.extensions import db
+from app.models.base import set_uuid_version
+from app.utils import admission, concurrency, invalidation, timeouts
 from app.utils.response import api_success
 
 
@@ -16,8 +18,13 @@ def create_app(config_name=None):
     app = Flask(__name__)
     config_name = config_name or os.environ.get("FLASK_ENV", "development")
     app.config.from_object(config_by_name[config_name])
+    set_uuid_version(app.config.get("UUID_VERSION", 7))
 
     db.init_app(app)
+    invalidation.init_app(app)
+    admission.init_app(app)
+    timeouts.init_app(app)
+    concurrency.init_app(app)
     Migrate(app, db)
     JWTManager(app)
     # CORS: allow localhost in dev and FRONTEND_URL in production
@@ -25,7 +32,7 @@ def create_app(config_name=None):
     _frontend_url = app.config.get("FRONTEND_URL")
     if _frontend_url:
         _cors_origins.append(_frontend_url.rstrip("/"))
-    CORS(app, supports_credentials=True, origins=_cors_origins)
+    CORS(app, supports_credentials=True, origins=_cors_origins, expose_headers=["Retry-After", "Idempotent-Replayed", "ETag", "Content-Disposition"])
 
     # Ensure models are registered
     from app import models  # noqa: F401
@@ -42,11 +49,14 @@ def create_app(config_name=None):
     from app.api.skus import skus_bp
     from app.api.stock import stock_bp
     from app.api.purchase_orders import purchase_orders_bp
+    from app.api.requisitions import requisitions_bp
     from app.api.projects import projects_bp
     from app.api.timesheets import timesheets_bp
     from app.api.payroll import payroll_bp
     from app.api.invoices import invoices_bp
     from app.api.dashboard import dashboard_bp
+    from app.api.jobs import jobs_bp
+    from app.api.imports import imports_bp
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(dashboard_bp, url_prefix="/api/dashboard")
@@ -60,10 +70,16 @@ def create_app(config_name=None):
     app.register_blueprint(skus_bp, url_prefix="/api/inventory/skus")
     app.register_blueprint(stock_bp, url_prefix="/api/inventory/stock")
     app.register_blueprint(purchase_orders_bp, url_prefix="/api/inventory/purchase-orders")
+    app.register_blueprint(requisitions_bp, url_prefix="/api/inventory/requisitions")
     app.register_blueprint(projects_bp, url_prefix="/api/pm/projects")
     app.register_blueprint(timesheets_bp, url_prefix="/api/pm/timesheets")
     app.register_blueprint(payroll_bp, url_prefix="/api/hrm/payroll")
     app.register_blueprint(invoices_bp, url_prefix="/api/finance/invoices")
+    app.register_blueprint(jobs_bp, url_prefix="/api/jobs")
+    app.register_blueprint(imports_bp, url_prefix="/api/imports")
+
+    from app.cli import register_cli
+    register_cli(app)
 
     @app.route("/api/health")
     def health():
@@ -2,10 +2,13 @@
 from flask import Blueprint, request
 
 from flask_jwt_extended import jwt_required
-from app.api.decorators import get_current_user, require_permission
+from app.api.decorators import get_current_user, idempotent, require_permission
 from app.extensions import db
 from app.models import Customer, CustomerContact, Project, Invoice
+from app.utils.concurrency import check_if_match, with_etag
+from app.utils.delta_sync import delta_response, parse_updated_since
 from app.utils.response import api_success, api_error
+from app.utils.sequences import next_number
 
 customers_bp = Blueprint("customers", __name__)
 
@@ -17,7 +20,13 @@ def list_customers():
     user = get_current_user()
     if not user:
         return api_error("Unauthorized", status_code=401)
-    customers = Customer.query.filter_by(organization_id=user.organization_id).order_by(Customer.name).all()
+    since, error = parse_updated_since()
+    if error:
+        return error
+    q = Customer.query.filter_by(organization_id=user.organization_id)
+    if since:
+        return delta_response(user.organization_id, "customers", q, Customer, since, Customer.to_dict)
+    customers = q.order_by(Customer.name).all()
     return api_success(data=[c.to_dict() for c in customers])
 
 
@@ -31,7 +40,7 @@ def get_customer(customer_id):
     c = db.session.get(Customer, customer_id)
     if not c or c.organization_id != user.organization_id:
         return api_error("Customer not found", status_code=404)
-    return api_success(data=c.to_dict())
+    return with_etag(api_success(data=c.to_dict()), c)
 
 
 @customers_bp.route("/<customer_id>/360", methods=["GET"])
@@ -60,6 +69,7 @@ def customer_360(customer_id):
 @customers_bp.route("", methods=["POST"])
 @jwt_required()
 @require_permission("crm.edit")
+@idempotent
 def create_customer():
     user = get_current_user()
     if not user:
@@ -70,7 +80,7 @@ def create_customer():
     if not name:
         return api_error("name is required", status_code=400)
     if not code:
-        code = f"CUST-{Customer.query.filter_by(organization_id=user.organization_id).count() + 1:04d}"
+        code = next_number(user.organization_id, "customer")
     if Customer.query.filter_by(organization_id=user.organization_id, code=code).first():
         return api_error("Customer code already exists", status_code=400)
     c = Customer(
@@ -96,9 +106,12 @@ def update_customer(customer_id):
     c = db.session.get(Customer, customer_id)
     if not c or c.organization_id != user.organization_id:
         return api_error("Customer not found", status_code=404)
+    error = check_if_match(c)
+    if error:
+        return error
     data = request.get_json() or {}
     for key in ("name", "code", "tax_id", "billing_address", "shipping_address"):
         if key in data and data[key] is not None:
             setattr(c, key, str(data[key]).strip())
     db.session.commit()
-    return api_success(data=c.to_dict())
+    return with_etag(api_success(data=c.to_dict()), c)
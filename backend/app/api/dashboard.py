@@ -5,7 +5,7 @@ from flask import Blueprint
 from flask_jwt_extended import jwt_required
 from sqlalchemy import func
 
-from app.api.decorators import get_current_user
+from app.api.decorators import admission_controlled, get_current_user, statement_timeout
 from app.extensions import db
 from app.models import (
     Customer,
@@ -24,10 +24,12 @@ dashboard_bp = Blueprint("dashboard", __name__)
 
 @dashboard_bp.route("", methods=["GET"])
 @jwt_required()
+@admission_controlled("report")
+@statement_timeout("report")
 def get_dashboard():
     """Return overview counts and chart data for the current organization."""
     user = get_current_user()
-    if not user:
+    if not user or not user.is_active:
         return api_error("Unauthorized", status_code=401)
     org_id = user.organization_id
 
@@ -1,12 +1,22 @@
 """RBAC and auth decorators."""
 from functools import wraps
 
-from flask import request
+from flask import current_app, g, request
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
 
 from app.extensions import db
 from app.models import User
+from app.utils import idempotency
+from app.utils.invalidation import local_cache
 from app.utils.response import api_error
+from app.utils.timeouts import set_timeout_class
+
+
+def get_permission_ids(user):
+    """Cached user.get_permission_ids(); evicted when roles or role membership change."""
+    return local_cache.get_or_set(
+        user.organization_id, "permissions", user.id, lambda: frozenset(user.get_permission_ids())
+    )
 
 
 def require_permission(permission_id):
@@ -21,7 +31,7 @@ def require_permission(permission_id):
             user = db.session.get(User, user_id)
             if not user or not user.is_active:
                 return api_error("User not found or inactive", status_code=401)
-            if permission_id and permission_id not in user.get_permission_ids():
+            if permission_id and permission_id not in get_permission_ids(user):
                 return api_error("Insufficient permissions", status_code=403)
             return fn(*args, **kwargs)
         return wrapper
@@ -41,7 +51,7 @@ def require_any_permission(*permission_ids):
             if not user or not user.is_active:
                 return api_error("User not found or inactive", status_code=401)
             if permission_ids:
-                user_perms = user.get_permission_ids()
+                user_perms = get_permission_ids(user)
                 if not any(p in user_perms for p in permission_ids):
                     return api_error("Insufficient permissions", status_code=403)
             return fn(*args, **kwargs)
@@ -49,6 +59,86 @@ def require_any_permission(*permission_ids):
     return decorator
 
 
+def admission_controlled(endpoint_class):
+    """Decorator: admit the request through the tenant admission controller.
+
+    Place after the auth and permission decorators, so refused requests never take a slot.
+    Excess requests for the organization wait briefly for a slot, then get 429 with Retry-After.
+    Streamed responses keep their slot until the stream is closed.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            user = get_current_user()
+            if not user or not user.is_active or not current_app.config.get("ADMISSION_CONTROL_ENABLED", True):
+                return fn(*args, **kwargs)
+            controller = current_app.extensions["admission"]
+            ticket = controller.acquire(user.organization_id, endpoint_class)
+            if ticket is None:
+                response, status = api_error(
+                    "Too many concurrent requests of this kind for your organization; retry shortly",
+                    status_code=429,
+                )
+                response.headers["Retry-After"] = str(controller.retry_after)
+                return response, status
+            g.admission_ticket = ticket  # streamed exports renew it (see app.utils.export)
+            try:
+                response = current_app.make_response(fn(*args, **kwargs))
+            except Exception:
+                controller.release(ticket)
+                raise
+            if response.is_streamed:
+                response.call_on_close(lambda: controller.release(ticket))
+            else:
+                controller.release(ticket)
+            return response
+        return wrapper
+    return decorator
+
+
+def idempotent(fn):
+    """Decorator: honour an Idempotency-Key header by replaying the first response for the key.
+
+    Place after the auth decorators. Requests without the header run normally.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(idempotency.HEADER)
+        user = get_current_user()
+        if not key or not user:
+            return fn(*args, **kwargs)
+        if len(key) > 255:
+            return api_error("Idempotency-Key must be at most 255 characters", status_code=400)
+        fingerprint = idempotency.request_fingerprint()
+        claimed, row = idempotency.claim(user.organization_id, user.id, key, fingerprint)
+        if not claimed and row is not None and row.request_hash == fingerprint and row.status == "pending":
+            claimed, row = idempotency.wait_until_done(user.organization_id, user.id, key, fingerprint)
+        if not claimed:
+            if row is None:
+                return api_error("A request with this Idempotency-Key is still in progress", status_code=409)
+            if row.request_hash != fingerprint:
+                return api_error("Idempotency-Key was already used for a different request", status_code=422)
+            return idempotency.replay(row)
+        response = None
+        try:
+            response = current_app.make_response(fn(*args, **kwargs))
+        finally:
+            idempotency.complete(user.organization_id, user.id, key, response)
+        return response
+    return wrapper
+
+
+def statement_timeout(timeout_class):
+    """Decorator: run the view's queries under the STATEMENT_TIMEOUTS entry for timeout_class."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            set_timeout_class(timeout_class)
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
 def get_current_user():
     """After verify_jwt_in_request(), return the current User or None."""
     try:
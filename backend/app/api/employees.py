@@ -5,11 +5,14 @@ from decimal import Decimal
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
 
-from app.api.decorators import get_current_user, require_permission
+from app.api.decorators import get_current_user, idempotent, require_permission
 from app.extensions import db
 from app.models import Employee, User
 from app.utils.auth_utils import hash_password
+from app.utils.concurrency import check_if_match, with_etag
+from app.utils.delta_sync import delta_response, parse_updated_since
 from app.utils.response import api_success, api_error
+from app.utils.sequences import next_number
 
 employees_bp = Blueprint("employees", __name__)
 
@@ -32,7 +35,13 @@ def list_employees():
     user = get_current_user()
     if not user:
         return api_error("Unauthorized", status_code=401)
-    employees = Employee.query.filter_by(organization_id=user.organization_id).order_by(Employee.full_name).all()
+    since, error = parse_updated_since()
+    if error:
+        return error
+    q = Employee.query.filter_by(organization_id=user.organization_id)
+    if since:
+        return delta_response(user.organization_id, "employees", q, Employee, since, Employee.to_dict)
+    employees = q.order_by(Employee.full_name).all()
     return api_success(data=[e.to_dict() for e in employees])
 
 
@@ -46,12 +55,13 @@ def get_employee(employee_id):
     e = db.session.get(Employee, employee_id)
     if not e or e.organization_id != user.organization_id:
         return api_error("Employee not found", status_code=404)
-    return api_success(data=e.to_dict())
+    return with_etag(api_success(data=e.to_dict()), e)
 
 
 @employees_bp.route("", methods=["POST"])
 @jwt_required()
 @require_permission("hrm.edit")
+@idempotent
 def create_employee():
     user = get_current_user()
     if not user:
@@ -62,7 +72,7 @@ def create_employee():
         return api_error("full_name is required", status_code=400)
     code = (data.get("employee_code") or data.get("employeeCode") or "").strip()
     if not code:
-        code = f"EMP-{Employee.query.filter_by(organization_id=user.organization_id).count() + 1:04d}"
+        code = next_number(user.organization_id, "employee")
     if Employee.query.filter_by(organization_id=user.organization_id, employee_code=code).first():
         return api_error("Employee code already exists", status_code=400)
     e = Employee(
@@ -101,6 +111,9 @@ def update_employee(employee_id):
     e = db.session.get(Employee, employee_id)
     if not e or e.organization_id != user.organization_id:
         return api_error("Employee not found", status_code=404)
+    error = check_if_match(e)
+    if error:
+        return error
     data = request.get_json() or {}
     for key in ("full_name", "job_title", "department", "employee_code"):
         if key in data and data[key] is not None:
@@ -114,4 +127,4 @@ def update_employee(employee_id):
     if "is_active" in data:
         e.is_active = bool(data["is_active"])
     db.session.commit()
-    return api_success(data=e.to_dict())
+    return with_etag(api_success(data=e.to_dict()), e)
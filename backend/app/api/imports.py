@@ -0,0 +1,75 @@
+"""Bulk import API: POST a CSV or NDJSON file of SKUs, customers, employees or leads."""
+from functools import wraps
+
+from flask import Blueprint, current_app, request
+from flask_jwt_extended import jwt_required
+
+from app.api.decorators import admission_controlled, get_current_user, get_permission_ids, statement_timeout
+from app.extensions import db
+from app.services.imports import IMPORTERS, read_rows, run_import
+from app.utils.response import api_success, api_error
+
+imports_bp = Blueprint("imports", __name__)
+
+IMPORT_PERMISSIONS = {
+    "skus": "inventory.edit",
+    "customers": "crm.edit",
+    "employees": "hrm.edit",
+    "leads": "crm.lead.create",
+}
+
+
+def _upload():
+    """(binary stream, format) from a multipart "file" field or the raw request body."""
+    upload = request.files.get("file")
+    fmt = (request.args.get("format") or "").lower()
+    if upload is not None:
+        if not fmt:
+            fmt = "ndjson" if upload.filename.lower().endswith((".ndjson", ".jsonl")) else "csv"
+        return upload.stream, fmt
+    if not fmt:
+        fmt = "ndjson" if "ndjson" in (request.content_type or "") else "csv"
+    return request.stream, fmt
+
+
+def require_import_permission(fn):
+    """Decorator: require an active user with the edit permission of the entity being imported."""
+    @wraps(fn)
+    def wrapper(entity, *args, **kwargs):
+        user = get_current_user()
+        if not user or not user.is_active:
+            return api_error("Unauthorized", status_code=401)
+        if entity not in IMPORTERS:
+            return api_error(f"Import not supported for {entity}", status_code=404)
+        if IMPORT_PERMISSIONS[entity] not in get_permission_ids(user):
+            return api_error("Insufficient permissions", status_code=403)
+        return fn(entity, *args, **kwargs)
+    return wrapper
+
+
+@imports_bp.route("/<entity>", methods=["POST"])
+@jwt_required()
+@require_import_permission
+@admission_controlled("import")
+@statement_timeout("import")
+def import_entity(entity):
+    """Create records from an upload. ?dry_run=1 validates without writing. Returns per-row errors."""
+    user = get_current_user()
+    stream, fmt = _upload()
+    if fmt not in ("csv", "ndjson"):
+        return api_error("format must be csv or ndjson", status_code=400)
+    try:
+        report = run_import(
+            user.organization_id,
+            entity,
+            read_rows(stream, fmt),
+            user_id=user.id,
+            chunk_size=current_app.config.get("IMPORT_CHUNK_SIZE", 5000),
+            dry_run=request.args.get("dry_run", "").lower() in ("1", "true"),
+        )
+    except UnicodeDecodeError:
+        # Chunks before the bad bytes are already committed; the rest of the file is not read.
+        db.session.rollback()
+        return api_error("The file must be UTF-8 encoded", status_code=400)
+    status_code = 201 if report.created else 200
+    return api_success(data=report.to_dict(), message=f"Imported {report.created} of {report.total} rows", status_code=status_code)
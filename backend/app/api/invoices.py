@@ -5,10 +5,14 @@ from decimal import Decimal
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
 
-from app.api.decorators import get_current_user, require_permission
+from app.api.decorators import admission_controlled, get_current_user, idempotent, require_permission, statement_timeout
 from app.extensions import db
 from app.models import Invoice, Customer, Project
+from app.utils.concurrency import check_if_match, with_etag
+from app.utils.delta_sync import delta_response, parse_updated_since
+from app.utils.export import export_response
 from app.utils.response import api_success, api_error
+from app.utils.sequences import next_number
 
 invoices_bp = Blueprint("invoices", __name__)
 
@@ -22,13 +26,8 @@ def _parse_date(v):
         return None
 
 
-@invoices_bp.route("", methods=["GET"])
-@jwt_required()
-@require_permission("finance.view")
-def list_invoices():
-    user = get_current_user()
-    if not user:
-        return api_error("Unauthorized", status_code=401)
+def _invoice_query(user):
+    """Invoices of the user's organization, filtered by ?customer_id= and ?status=."""
     customer_id = request.args.get("customer_id")
     status = request.args.get("status")
     q = Invoice.query.filter_by(organization_id=user.organization_id)
@@ -36,10 +35,40 @@ def list_invoices():
         q = q.filter(Invoice.customer_id == customer_id)
     if status:
         q = q.filter(Invoice.status == status)
+    return q
+
+
+@invoices_bp.route("", methods=["GET"])
+@jwt_required()
+@require_permission("finance.view")
+def list_invoices():
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    q = _invoice_query(user)
+    since, error = parse_updated_since()
+    if error:
+        return error
+    if since:
+        return delta_response(user.organization_id, "invoices", q, Invoice, since, Invoice.to_dict)
     q = q.order_by(Invoice.created_at.desc())
     return api_success(data=[i.to_dict() for i in q.all()])
 
 
+@invoices_bp.route("/export", methods=["GET"])
+@jwt_required()
+@require_permission("finance.view")
+@admission_controlled("export")
+@statement_timeout("export")
+def export_invoices():
+    """Stream invoices as CSV or NDJSON, with the list filters."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    q = _invoice_query(user).order_by(Invoice.created_at.desc())
+    return export_response(q, Invoice.__table__.columns, "invoices")
+
+
 @invoices_bp.route("/<invoice_id>", methods=["GET"])
 @jwt_required()
 @require_permission("finance.view")
@@ -50,12 +79,13 @@ def get_invoice(invoice_id):
     inv = db.session.get(Invoice, invoice_id)
     if not inv or inv.organization_id != user.organization_id:
         return api_error("Invoice not found", status_code=404)
-    return api_success(data=inv.to_dict())
+    return with_etag(api_success(data=inv.to_dict()), inv)
 
 
 @invoices_bp.route("", methods=["POST"])
 @jwt_required()
 @require_permission("finance.edit")
+@idempotent
 def create_invoice():
     user = get_current_user()
     if not user:
@@ -67,8 +97,7 @@ def create_invoice():
     c = db.session.get(Customer, customer_id)
     if not c or c.organization_id != user.organization_id:
         return api_error("Customer not found", status_code=404)
-    n = Invoice.query.filter_by(organization_id=user.organization_id).count() + 1
-    number = data.get("number") or f"INV-{n:05d}"
+    number = data.get("number") or next_number(user.organization_id, "invoice")
     inv = Invoice(
         organization_id=user.organization_id,
         customer_id=customer_id,
@@ -93,6 +122,9 @@ def update_invoice(invoice_id):
     inv = db.session.get(Invoice, invoice_id)
     if not inv or inv.organization_id != user.organization_id:
         return api_error("Invoice not found", status_code=404)
+    error = check_if_match(inv)
+    if error:
+        return error
     data = request.get_json() or {}
     if "status" in data:
         inv.status = data["status"]
@@ -103,4 +135,4 @@ def update_invoice(invoice_id):
     if data.get("status") == "paid":
         inv.paid_at = date.today()
     db.session.commit()
-    return api_success(data=inv.to_dict())
+    return with_etag(api_success(data=inv.to_dict()), inv)
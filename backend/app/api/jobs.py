@@ -0,0 +1,82 @@
+"""Background jobs API: status, progress and results (org-scoped, per job type permission)."""
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required
+
+from app.api.decorators import get_current_user, get_permission_ids, require_any_permission
+from app.extensions import db
+from app.models import Job
+from app.utils.response import api_success, api_error
+
+jobs_bp = Blueprint("jobs", __name__)
+
+# Permission needed to see a job of each type (its payload, progress and result); other types need auth.edit.
+JOB_VIEW_PERMISSIONS = {
+    "inventory.mrp": "inventory.view",
+    "inventory.replenish": "inventory.view",
+    "payroll.run": "hrm.view",
+    "tenant.backup": "auth.edit",
+    "tenant.restore": "auth.edit",
+    "tenant.clone": "auth.edit",
+    "tenant.delete": "auth.edit",
+}
+# Active users holding none of these can see no job at all
+ANY_JOB_VIEW_PERMISSION = sorted(set(JOB_VIEW_PERMISSIONS.values()))
+
+
+def _get_org_job(job_id, user):
+    """The job if it belongs to the user's organization and the user may view its type, else None."""
+    job = db.session.get(Job, job_id)
+    if not job or job.organization_id != user.organization_id:
+        return None
+    if JOB_VIEW_PERMISSIONS.get(job.job_type, "auth.edit") not in get_permission_ids(user):
+        return None
+    return job
+
+
+@jobs_bp.route("", methods=["GET"])
+@jwt_required()
+@require_any_permission(*ANY_JOB_VIEW_PERMISSION)
+def list_jobs():
+    """The latest 100 jobs of the types the user may view, optionally ?status=."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    permissions = get_permission_ids(user)
+    visible = [t for t, permission in JOB_VIEW_PERMISSIONS.items() if permission in permissions]
+    q = Job.query.filter(Job.organization_id == user.organization_id, Job.job_type.in_(visible))
+    status = request.args.get("status")
+    if status:
+        q = q.filter(Job.status == status)
+    jobs = q.order_by(Job.created_at.desc()).limit(100).all()
+    return api_success(data=[j.to_dict() for j in jobs])
+
+
+@jobs_bp.route("/<job_id>", methods=["GET"])
+@jwt_required()
+@require_any_permission(*ANY_JOB_VIEW_PERMISSION)
+def get_job(job_id):
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    job = _get_org_job(job_id, user)
+    if not job:
+        return api_error("Job not found", status_code=404)
+    return api_success(data=job.to_dict())
+
+
+@jobs_bp.route("/<job_id>/result", methods=["GET"])
+@jwt_required()
+@require_any_permission(*ANY_JOB_VIEW_PERMISSION)
+def get_job_result(job_id):
+    """200 with the result once succeeded, 202 while queued or running, 409 if the job failed."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    job = _get_org_job(job_id, user)
+    if not job:
+        return api_error("Job not found", status_code=404)
+    if job.status == "succeeded":
+        return api_success(data=job.result or {})
+    if job.status == "failed":
+        return api_error("Job failed", errors={"error": job.error}, status_code=409)
+    return api_success(data=job.to_dict(), message="Job not finished", status_code=202)
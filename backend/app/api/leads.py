@@ -3,10 +3,13 @@ from decimal import Decimal
 from flask import Blueprint, request
 
 from flask_jwt_extended import jwt_required
-from app.api.decorators import get_current_user, require_permission
+from app.api.decorators import get_current_user, idempotent, require_permission
 from app.extensions import db
 from app.models import Lead, Customer, Project
+from app.utils.concurrency import check_if_match, with_etag
+from app.utils.delta_sync import delta_response, parse_updated_since
 from app.utils.response import api_success, api_error
+from app.utils.sequences import next_number
 
 leads_bp = Blueprint("leads", __name__)
 
@@ -30,7 +33,13 @@ def list_leads():
     user = get_current_user()
     if not user:
         return api_error("Unauthorized", status_code=401)
-    leads = Lead.query.filter_by(organization_id=user.organization_id).order_by(Lead.created_at.desc()).all()
+    since, error = parse_updated_since()
+    if error:
+        return error
+    q = Lead.query.filter_by(organization_id=user.organization_id)
+    if since:
+        return delta_response(user.organization_id, "leads", q, Lead, since, Lead.to_dict)
+    leads = q.order_by(Lead.created_at.desc()).all()
     return api_success(data=[l.to_dict() for l in leads])
 
 
@@ -44,12 +53,13 @@ def get_lead(lead_id):
     lead = db.session.get(Lead, lead_id)
     if not lead or lead.organization_id != user.organization_id:
         return api_error("Lead not found", status_code=404)
-    return api_success(data=lead.to_dict())
+    return with_etag(api_success(data=lead.to_dict()), lead)
 
 
 @leads_bp.route("", methods=["POST"])
 @jwt_required()
 @require_permission("crm.lead.create")
+@idempotent
 def create_lead():
     user = get_current_user()
     if not user:
@@ -83,6 +93,9 @@ def update_lead(lead_id):
     lead = db.session.get(Lead, lead_id)
     if not lead or lead.organization_id != user.organization_id:
         return api_error("Lead not found", status_code=404)
+    error = check_if_match(lead)
+    if error:
+        return error
     data = request.get_json() or {}
     for k, v in _lead_from_json(data).items():
         if v is not None:
@@ -90,12 +103,13 @@ def update_lead(lead_id):
     if "value" in data:
         lead.value = Decimal(str(data["value"]))
     db.session.commit()
-    return api_success(data=lead.to_dict())
+    return with_etag(api_success(data=lead.to_dict()), lead)
 
 
 @leads_bp.route("/<lead_id>/convert", methods=["POST"])
 @jwt_required()
 @require_permission("crm.lead.convert")
+@idempotent
 def convert_lead(lead_id):
     """Convert Closed-Won lead to Customer and Project."""
     user = get_current_user()
@@ -110,8 +124,7 @@ def convert_lead(lead_id):
         lead.status = "closed_won"
 
     code_base = (lead.company_name[:4] or "C").upper().replace(" ", "")
-    existing = Customer.query.filter_by(organization_id=user.organization_id).count()
-    customer_code = f"{code_base}{existing + 1:04d}"
+    customer_code = next_number(user.organization_id, "lead_customer", sequence="customer", prefix=code_base)
     customer = Customer(
         organization_id=user.organization_id,
         name=lead.company_name,
@@ -123,8 +136,7 @@ def convert_lead(lead_id):
     db.session.add(customer)
     db.session.flush()
 
-    proj_count = Project.query.filter_by(organization_id=user.organization_id).count()
-    project_code = f"PRJ-{proj_count + 1:04d}"
+    project_code = next_number(user.organization_id, "project")
     project = Project(
         organization_id=user.organization_id,
         customer_id=customer.id,
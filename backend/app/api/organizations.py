@@ -1,8 +1,14 @@
 """Organizations API (current org only for now)."""
-from flask import Blueprint
+import os
+
+from flask import Blueprint, current_app, request, send_file
 from flask_jwt_extended import jwt_required
 
-from app.api.decorators import get_current_user
+from app.api.decorators import get_current_user, require_permission
+from app.extensions import db
+from app.models import Job
+from app.services.jobs import enqueue
+from app.services.tenants import FORMATS, backup_dir
 from app.utils.response import api_success, api_error
 
 org_bp = Blueprint("organizations", __name__)
@@ -16,3 +22,69 @@ def current():
     if not user:
         return api_error("Unauthorized", status_code=401)
     return api_success(data=user.organization.to_dict())
+
+
+@org_bp.route("/current/load", methods=["GET"])
+@jwt_required()
+def current_load():
+    """Heavy-request saturation for the current organization (admission control)."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    metrics = current_app.extensions["admission"].metrics(user.organization_id)
+    return api_success(data=metrics[user.organization_id])
+
+
+@org_bp.route("/current/backups", methods=["POST"])
+@jwt_required()
+@require_permission("auth.edit")
+def create_backup():
+    """Queue a full backup of the current organization (tenant.backup job)."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    fmt = ((request.get_json(silent=True) or {}).get("format") or "ndjson").lower()
+    if fmt not in FORMATS:
+        return api_error(f"format must be one of {', '.join(FORMATS)}", status_code=400)
+    job = enqueue(user.organization_id, "tenant.backup", {"format": fmt}, user_id=user.id)
+    db.session.commit()
+    return api_success(data=job.to_dict(), message="Backup queued", status_code=202)
+
+
+@org_bp.route("/current/backups/<job_id>/download", methods=["GET"])
+@jwt_required()
+@require_permission("auth.edit")
+def download_backup(job_id):
+    """Download the archive written by a finished backup job."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    job = db.session.get(Job, job_id)
+    if not job or job.organization_id != user.organization_id or job.job_type != "tenant.backup":
+        return api_error("Backup not found", status_code=404)
+    if job.status != "succeeded":
+        return api_error("Backup is not ready", status_code=409)
+    path = os.path.join(backup_dir(), os.path.basename(job.result["file"]))
+    if not os.path.exists(path):
+        return api_error("Backup file is no longer available", status_code=410)
+    return send_file(path, mimetype="application/zip", as_attachment=True, download_name=job.result["file"])
+
+
+@org_bp.route("/current", methods=["DELETE"])
+@jwt_required()
+@require_permission("auth.edit")
+def delete_current():
+    """Offboard the current organization in the background (tenant.delete job).
+
+    The body must repeat the organization code as {"confirm": "<code>"}.
+    """
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    org = user.organization
+    confirm = ((request.get_json(silent=True) or {}).get("confirm") or "").strip().upper()
+    if confirm != org.code:
+        return api_error("Send the organization code as confirm to delete the organization", status_code=400)
+    job = enqueue(org.id, "tenant.delete", user_id=user.id)
+    db.session.commit()
+    return api_success(data=job.to_dict(), message="Organization deletion queued", status_code=202)
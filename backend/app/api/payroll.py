@@ -1,14 +1,16 @@
 """Payroll runs and items (timesheet amounts from PM)."""
 from datetime import date
-from decimal import Decimal
 
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
 
-from app.api.decorators import get_current_user, require_permission
-from sqlalchemy import func
+from app.api.decorators import admission_controlled, get_current_user, idempotent, require_permission, statement_timeout
 from app.extensions import db
-from app.models import PayrollRun, PayrollItem, Employee, Timesheet
+from app.models import PayrollItem, PayrollRun
+from app.services.jobs import enqueue
+from app.services.payroll import build_payroll_items
+from app.utils.delta_sync import delta_response, parse_updated_since
+from app.utils.export import export_response
 from app.utils.response import api_success, api_error
 
 payroll_bp = Blueprint("payroll", __name__)
@@ -30,7 +32,13 @@ def list_payroll_runs():
     user = get_current_user()
     if not user:
         return api_error("Unauthorized", status_code=401)
-    runs = PayrollRun.query.filter_by(organization_id=user.organization_id).order_by(PayrollRun.period_start.desc()).all()
+    since, error = parse_updated_since()
+    if error:
+        return error
+    q = PayrollRun.query.filter_by(organization_id=user.organization_id)
+    if since:
+        return delta_response(user.organization_id, "payroll_runs", q, PayrollRun, since, PayrollRun.to_dict)
+    runs = q.order_by(PayrollRun.period_start.desc()).all()
     return api_success(data=[r.to_dict() for r in runs])
 
 
@@ -49,10 +57,31 @@ def get_payroll_run(run_id):
     return api_success(data=data)
 
 
+@payroll_bp.route("/<run_id>/items/export", methods=["GET"])
+@jwt_required()
+@require_permission("hrm.view")
+@admission_controlled("export")
+@statement_timeout("export")
+def export_payroll_items(run_id):
+    """Stream a payroll run's items as CSV or NDJSON."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    r = db.session.get(PayrollRun, run_id)
+    if not r or r.organization_id != user.organization_id:
+        return api_error("Payroll run not found", status_code=404)
+    q = PayrollItem.query.filter_by(payroll_run_id=r.id).order_by(PayrollItem.employee_id)
+    return export_response(q, PayrollItem.__table__.columns, f"payroll-{r.period_start.isoformat()}")
+
+
 @payroll_bp.route("", methods=["POST"])
 @jwt_required()
 @require_permission("hrm.edit")
+@idempotent
+@admission_controlled("payroll")
+@statement_timeout("report")
 def create_payroll_run():
+    """Create a payroll run. With ?async=1 (or "async": true) items are built by a background job and 202 is returned."""
     user = get_current_user()
     if not user:
         return api_error("Unauthorized", status_code=401)
@@ -71,26 +100,16 @@ def create_payroll_run():
     )
     db.session.add(r)
     db.session.flush()
-    employees = Employee.query.filter_by(organization_id=user.organization_id, is_active=True).all()
-    for emp in employees:
-        base = emp.base_salary_monthly or Decimal(0)
-        ts_total = db.session.query(func.coalesce(func.sum(Timesheet.hours), 0)).filter(
-            Timesheet.employee_id == emp.id,
-            Timesheet.work_date >= period_start,
-            Timesheet.work_date <= period_end,
-            Timesheet.status == "approved",
-        ).scalar() or 0
-        # Simple: timesheet amount = hours * rate (you can add hourly_rate to Employee later)
-        timesheet_amount = Decimal(str(ts_total)) * Decimal("0")  # placeholder: no hourly rate in schema
-        item = PayrollItem(
-            payroll_run_id=r.id,
-            employee_id=emp.id,
-            base_amount=base,
-            timesheet_amount=timesheet_amount,
-            total_amount=base + timesheet_amount,
-            status="pending",
+    if request.args.get("async") in ("1", "true") or data.get("async") is True:
+        r.status = "processing"
+        job = enqueue(user.organization_id, "payroll.run", {"payroll_run_id": r.id}, user_id=user.id)
+        db.session.commit()
+        return api_success(
+            data={"payroll_run": r.to_dict(), "job": job.to_dict()},
+            message="Payroll run queued",
+            status_code=202,
         )
-        db.session.add(item)
+    build_payroll_items(r)
     db.session.commit()
     data = r.to_dict()
     data["items"] = [i.to_dict() for i in r.items]
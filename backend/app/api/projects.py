@@ -5,10 +5,13 @@ from decimal import Decimal
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
 
-from app.api.decorators import get_current_user, require_permission
+from app.api.decorators import get_current_user, idempotent, require_permission
 from app.extensions import db
 from app.models import Project, Milestone, Task, TaskAssignment, TaskMaterial, Employee, Sku
+from app.utils.concurrency import check_if_match, with_etag
+from app.utils.delta_sync import delta_response, parse_updated_since
 from app.utils.response import api_success, api_error
+from app.utils.sequences import next_number
 
 projects_bp = Blueprint("projects", __name__)
 
@@ -29,7 +32,13 @@ def list_projects():
     user = get_current_user()
     if not user:
         return api_error("Unauthorized", status_code=401)
-    projects = Project.query.filter_by(organization_id=user.organization_id).order_by(Project.created_at.desc()).all()
+    since, error = parse_updated_since()
+    if error:
+        return error
+    q = Project.query.filter_by(organization_id=user.organization_id)
+    if since:
+        return delta_response(user.organization_id, "projects", q, Project, since, Project.to_dict)
+    projects = q.order_by(Project.created_at.desc()).all()
     return api_success(data=[p.to_dict() for p in projects])
 
 
@@ -48,12 +57,13 @@ def get_project(project_id):
     for m in data["milestones"]:
         milestone_obj = next(x for x in p.milestones if x.id == m["id"])
         m["tasks"] = [t.to_dict() for t in milestone_obj.tasks]
-    return api_success(data=data)
+    return with_etag(api_success(data=data), p)
 
 
 @projects_bp.route("", methods=["POST"])
 @jwt_required()
 @require_permission("pm.edit")
+@idempotent
 def create_project():
     user = get_current_user()
     if not user:
@@ -62,7 +72,7 @@ def create_project():
     name = (data.get("name") or "").strip()
     if not name:
         return api_error("name is required", status_code=400)
-    code = (data.get("code") or "").strip() or f"PRJ-{Project.query.filter_by(organization_id=user.organization_id).count() + 1:04d}"
+    code = (data.get("code") or "").strip() or next_number(user.organization_id, "project")
     if Project.query.filter_by(organization_id=user.organization_id, code=code).first():
         return api_error("Project code already exists", status_code=400)
     p = Project(
@@ -91,6 +101,9 @@ def update_project(project_id):
     p = db.session.get(Project, project_id)
     if not p or p.organization_id != user.organization_id:
         return api_error("Project not found", status_code=404)
+    error = check_if_match(p)
+    if error:
+        return error
     data = request.get_json() or {}
     for key in ("name", "code", "status", "customer_id", "project_manager_id"):
         if key in data and data[key] is not None:
@@ -102,12 +115,13 @@ def update_project(project_id):
     if "budget_hours" in data:
         p.budget_hours = Decimal(str(data["budget_hours"]))
     db.session.commit()
-    return api_success(data=p.to_dict())
+    return with_etag(api_success(data=p.to_dict()), p)
 
 
 @projects_bp.route("/<project_id>/milestones", methods=["POST"])
 @jwt_required()
 @require_permission("pm.edit")
+@idempotent
 def create_milestone(project_id):
     user = get_current_user()
     if not user:
@@ -135,6 +149,7 @@ def create_milestone(project_id):
 @projects_bp.route("/<project_id>/milestones/<milestone_id>/tasks", methods=["POST"])
 @jwt_required()
 @require_permission("pm.edit")
+@idempotent
 def create_task(project_id, milestone_id):
     user = get_current_user()
     if not user:
@@ -4,14 +4,23 @@ from decimal import Decimal
 
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
+from sqlalchemy import case, update
 
-from app.api.decorators import get_current_user, require_permission
+from app.api.decorators import get_current_user, idempotent, require_permission
 from app.extensions import db
 from app.models import PurchaseOrder, PurchaseOrderLine, Warehouse, Sku
+from app.services.atp import publish_atp
+from app.services.jobs import enqueue
+from app.services.stock import movement, post_movements
+from app.utils.concurrency import check_if_match, with_etag
+from app.utils.delta_sync import delta_response, parse_updated_since
 from app.utils.response import api_success, api_error
+from app.utils.sequences import next_number
 
 purchase_orders_bp = Blueprint("purchase_orders", __name__)
 
+RECEIVABLE_STATUSES = ("submitted", "partial")  # drafts (e.g. from replenishment) are submitted first
+
 
 def _parse_date(v):
     if v is None or v == "":
@@ -29,7 +38,13 @@ def list_pos():
     user = get_current_user()
     if not user:
         return api_error("Unauthorized", status_code=401)
-    pos = PurchaseOrder.query.filter_by(organization_id=user.organization_id).order_by(PurchaseOrder.created_at.desc()).all()
+    since, error = parse_updated_since()
+    if error:
+        return error
+    q = PurchaseOrder.query.filter_by(organization_id=user.organization_id)
+    if since:
+        return delta_response(user.organization_id, "purchase_orders", q, PurchaseOrder, since, PurchaseOrder.to_dict)
+    pos = q.order_by(PurchaseOrder.created_at.desc()).all()
     return api_success(data=[p.to_dict() for p in pos])
 
 
@@ -45,12 +60,13 @@ def get_po(po_id):
         return api_error("Purchase order not found", status_code=404)
     data = po.to_dict()
     data["lines"] = [l.to_dict() for l in po.lines]
-    return api_success(data=data)
+    return with_etag(api_success(data=data), po)
 
 
 @purchase_orders_bp.route("", methods=["POST"])
 @jwt_required()
 @require_permission("inventory.edit")
+@idempotent
 def create_po():
     user = get_current_user()
     if not user:
@@ -62,8 +78,7 @@ def create_po():
     wh = db.session.get(Warehouse, warehouse_id)
     if not wh or wh.organization_id != user.organization_id:
         return api_error("Warehouse not found", status_code=404)
-    n = PurchaseOrder.query.filter_by(organization_id=user.organization_id).count() + 1
-    number = data.get("number") or f"PO-{n:05d}"
+    number = data.get("number") or next_number(user.organization_id, "purchase_order")
     po = PurchaseOrder(
         organization_id=user.organization_id,
         warehouse_id=warehouse_id,
@@ -86,7 +101,141 @@ def create_po():
                 quantity_received=Decimal(0),
                 unit_price=Decimal(str(line.get("unit_price") or 0)),
             ))
+    publish_atp(user.organization_id, (l.sku_id for l in po.lines))
     db.session.commit()
     data = po.to_dict()
     data["lines"] = [l.to_dict() for l in po.lines]
     return api_success(data=data, message="Purchase order created", status_code=201)
+
+
+@purchase_orders_bp.route("/replenish", methods=["POST"])
+@jwt_required()
+@require_permission("inventory.edit")
+@idempotent
+def replenish():
+    """Queue a replenishment run (inventory.replenish job): one draft PO per warehouse for low stock.
+
+    Optional body: {"warehouse_id", "expected_date"}. SKUs already on an open PO are skipped.
+    """
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    data = request.get_json(silent=True) or {}
+    payload = {}
+    if data.get("warehouse_id"):
+        wh = db.session.get(Warehouse, data["warehouse_id"])
+        if not wh or wh.organization_id != user.organization_id:
+            return api_error("Warehouse not found", status_code=404)
+        payload["warehouse_id"] = wh.id
+    if data.get("expected_date"):
+        expected = _parse_date(data["expected_date"])
+        if expected is None:
+            return api_error("expected_date must be YYYY-MM-DD", status_code=400)
+        payload["expected_date"] = expected.isoformat()
+    job = enqueue(user.organization_id, "inventory.replenish", payload, user_id=user.id)
+    db.session.commit()
+    return api_success(data=job.to_dict(), message="Replenishment queued", status_code=202)
+
+
+@purchase_orders_bp.route("/<po_id>/submit", methods=["POST"])
+@jwt_required()
+@require_permission("inventory.edit")
+@idempotent
+def submit_po(po_id):
+    """Submit a draft PO to its supplier; from then on it counts as inbound stock and can be received."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    po = db.session.get(PurchaseOrder, po_id, with_for_update=True, populate_existing=True)
+    if not po or po.organization_id != user.organization_id:
+        return api_error("Purchase order not found", status_code=404)
+    precondition = check_if_match(po)
+    if precondition:
+        return precondition
+    if po.status != "draft":
+        return api_error(f"Purchase order is {po.status}", status_code=409)
+    po.status = "submitted"
+    publish_atp(user.organization_id, (l.sku_id for l in po.lines))
+    db.session.commit()
+    data = po.to_dict()
+    data["lines"] = [l.to_dict() for l in po.lines]
+    return with_etag(api_success(data=data, message="Purchase order submitted"), po)
+
+
+@purchase_orders_bp.route("/<po_id>/receive", methods=["POST"])
+@jwt_required()
+@require_permission("inventory.edit")
+@idempotent
+def receive_po(po_id):
+    """Receive goods against a PO: {"lines": [{"line_id" or "sku_id", "quantity"}], "note"}.
+
+    The PO row is locked for the duration. Stock is posted to the ledger and stock
+    levels in bulk, received quantities are updated in one statement, and the PO
+    becomes "partial" or "received". Only submitted and partial POs can be received. Receiving more than is outstanding on a line is rejected.
+    """
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    po = db.session.get(PurchaseOrder, po_id, with_for_update=True, populate_existing=True)
+    if not po or po.organization_id != user.organization_id:
+        return api_error("Purchase order not found", status_code=404)
+    precondition = check_if_match(po)
+    if precondition:
+        return precondition
+    if po.status not in RECEIVABLE_STATUSES:
+        return api_error(f"Purchase order is {po.status}", status_code=409)
+    data = request.get_json() or {}
+    entries = data.get("lines") or []
+    if not entries:
+        return api_error("lines is required", status_code=400)
+
+    lines = {l.id: l for l in PurchaseOrderLine.query.filter_by(purchase_order_id=po.id)}
+    by_sku = {}
+    for l in lines.values():
+        by_sku.setdefault(l.sku_id, []).append(l)
+    received = {}  # line id -> quantity received now
+    for i, entry in enumerate(entries):
+        line = lines.get(entry.get("line_id"))
+        if line is None and entry.get("sku_id"):
+            candidates = by_sku.get(entry["sku_id"], [])
+            line = candidates[0] if len(candidates) == 1 else None
+        if line is None:
+            return api_error("Line not found on this purchase order", errors={"index": i}, status_code=400)
+        try:
+            quantity = Decimal(str(entry.get("quantity")))
+        except Exception:
+            return api_error("quantity must be a number", errors={"index": i}, status_code=400)
+        if not quantity.is_finite() or quantity <= 0:
+            return api_error("quantity must be positive", errors={"index": i}, status_code=400)
+        received[line.id] = received.get(line.id, Decimal(0)) + quantity
+        outstanding = (line.quantity_ordered or 0) - (line.quantity_received or 0)
+        if received[line.id] > outstanding:
+            return api_error(
+                "Quantity exceeds what is outstanding on the line",
+                errors={"index": i, "outstanding": float(outstanding)},
+                status_code=400,
+            )
+
+    note = (data.get("note") or "").strip() or f"Receipt for {po.number}"
+    post_movements(user.organization_id, [
+        movement(po.warehouse_id, lines[line_id].sku_id, "receipt", quantity,
+                 reference_type="purchase_order", reference_id=po.id, note=note,
+                 unit_cost=lines[line_id].unit_price or None)  # no price yet: at average cost
+        for line_id, quantity in received.items()
+    ], user_id=user.id)
+    db.session.execute(
+        update(PurchaseOrderLine)
+        .where(PurchaseOrderLine.id.in_(list(received)))
+        .values(quantity_received=PurchaseOrderLine.quantity_received + case(
+            *[(PurchaseOrderLine.id == line_id, quantity) for line_id, quantity in received.items()]
+        ))
+        .execution_options(synchronize_session=False)
+    )
+    fully_received = all(
+        (l.quantity_received or 0) + received.get(l.id, 0) >= (l.quantity_ordered or 0) for l in lines.values()
+    )
+    po.status = "received" if fully_received else "partial"
+    db.session.commit()
+    data = po.to_dict()
+    data["lines"] = [l.to_dict() for l in po.lines]
+    return with_etag(api_success(data=data, message="Goods received"), po)
@@ -0,0 +1,178 @@
+"""Project requisitions API: reserve stock for projects and tasks, then issue or cancel."""
+from decimal import Decimal, InvalidOperation
+
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required
+
+from app.api.decorators import get_current_user, idempotent, require_permission
+from app.extensions import db
+from app.models import Project, ProjectRequisition, Sku, Task, Warehouse
+from app.services.requisitions import (
+    RequisitionConflict, cancel_requisition, create_requisitions, issue_requisition, reserve_task_materials,
+)
+from app.services.stock import InsufficientStock
+from app.utils.response import api_success, api_error
+
+requisitions_bp = Blueprint("requisitions", __name__)
+
+
+def _quantity(value):
+    try:
+        quantity = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return None
+    return quantity if quantity.is_finite() and quantity > 0 else None
+
+
+def _warehouse(user, warehouse_id):
+    wh = db.session.get(Warehouse, warehouse_id) if warehouse_id else None
+    return wh if wh and wh.organization_id == user.organization_id else None
+
+
+def _requisition(user, requisition_id):
+    """The requisition, re-read from the database, if it belongs to the user's organization."""
+    req = db.session.get(ProjectRequisition, requisition_id, populate_existing=True)
+    if not req or req.project.organization_id != user.organization_id:
+        return None
+    return req
+
+
+def _created(ids):
+    reqs = ProjectRequisition.query.filter(ProjectRequisition.id.in_(ids)).all()
+    return api_success(data=[r.to_dict() for r in reqs], message="Stock reserved", status_code=201)
+
+
+@requisitions_bp.route("", methods=["GET"])
+@jwt_required()
+@require_permission("inventory.view")
+def list_requisitions():
+    """Requisitions in the organization; filter by ?project_id=, ?task_id=, ?warehouse_id=, ?status=."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    q = ProjectRequisition.query.join(Project).filter(Project.organization_id == user.organization_id)
+    for field in ("project_id", "task_id", "warehouse_id", "status"):
+        value = request.args.get(field)
+        if value:
+            q = q.filter(getattr(ProjectRequisition, field) == value)
+    reqs = q.order_by(ProjectRequisition.created_at.desc()).all()
+    return api_success(data=[r.to_dict() for r in reqs])
+
+
+@requisitions_bp.route("", methods=["POST"])
+@jwt_required()
+@require_permission("inventory.edit")
+@idempotent
+def create():
+    """Reserve stock: {"project_id", "task_id"?, "warehouse_id", "lines": [{"sku_id", "quantity"}]}.
+
+    All lines are reserved or none is (409 with the shortages).
+    """
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    data = request.get_json() or {}
+    project = db.session.get(Project, data.get("project_id")) if data.get("project_id") else None
+    if not project or project.organization_id != user.organization_id:
+        return api_error("Project not found", status_code=404)
+    task_id = data.get("task_id")
+    if task_id:
+        task = db.session.get(Task, task_id)
+        if not task or task.project_id != project.id:
+            return api_error("Task not found", status_code=404)
+    wh = _warehouse(user, data.get("warehouse_id"))
+    if not wh:
+        return api_error("Warehouse not found", status_code=404)
+    entries = data.get("lines") if "lines" in data else [data]
+    if not isinstance(entries, list) or not entries:
+        return api_error("lines must be a non-empty list", status_code=400)
+    lines = []
+    for i, entry in enumerate(entries):
+        entry = entry or {}
+        quantity = _quantity(entry.get("quantity"))
+        if not entry.get("sku_id") or quantity is None:
+            return api_error("Each line needs sku_id and a positive quantity", errors={"index": i}, status_code=400)
+        lines.append((entry["sku_id"], quantity))
+    sku_ids = {sku_id for sku_id, _ in lines}
+    if Sku.query.filter(Sku.id.in_(sku_ids), Sku.organization_id == user.organization_id).count() != len(sku_ids):
+        return api_error("SKU not found", status_code=404)
+    try:
+        ids = create_requisitions(user.organization_id, project.id, wh.id, lines, task_id=task_id, user_id=user.id)
+    except InsufficientStock as exc:
+        db.session.rollback()
+        return api_error("Insufficient stock", errors={"shortages": exc.shortages}, status_code=409)
+    db.session.commit()
+    return _created(ids)
+
+
+@requisitions_bp.route("/tasks/<task_id>", methods=["POST"])
+@jwt_required()
+@require_permission("inventory.edit")
+@idempotent
+def reserve_for_task(task_id):
+    """Reserve what every material of the task still needs from {"warehouse_id"}, all or nothing."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    task = db.session.get(Task, task_id)
+    project = db.session.get(Project, task.project_id) if task else None
+    if not project or project.organization_id != user.organization_id:
+        return api_error("Task not found", status_code=404)
+    wh = _warehouse(user, (request.get_json(silent=True) or {}).get("warehouse_id"))
+    if not wh:
+        return api_error("Warehouse not found", status_code=404)
+    try:
+        ids = reserve_task_materials(user.organization_id, task, wh.id, user_id=user.id)
+    except InsufficientStock as exc:
+        db.session.rollback()
+        return api_error("Insufficient stock", errors={"shortages": exc.shortages}, status_code=409)
+    db.session.commit()
+    return _created(ids)
+
+
+@requisitions_bp.route("/<requisition_id>/issue", methods=["POST"])
+@jwt_required()
+@require_permission("inventory.edit")
+@idempotent
+def issue(requisition_id):
+    """Issue reserved stock to the project: {"quantity"} (default: everything outstanding)."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    req = _requisition(user, requisition_id)
+    if not req:
+        return api_error("Requisition not found", status_code=404)
+    data = request.get_json(silent=True) or {}
+    quantity = None
+    if data.get("quantity") is not None:
+        quantity = _quantity(data["quantity"])
+        if quantity is None:
+            return api_error("quantity must be a positive number", status_code=400)
+    try:
+        issue_requisition(user.organization_id, req, quantity, user_id=user.id)
+    except RequisitionConflict as exc:
+        db.session.rollback()
+        return api_error(str(exc), status_code=409)
+    db.session.commit()
+    return api_success(data=_requisition(user, requisition_id).to_dict(), message="Stock issued")
+
+
+@requisitions_bp.route("/<requisition_id>/cancel", methods=["POST"])
+@jwt_required()
+@require_permission("inventory.edit")
+@idempotent
+def cancel(requisition_id):
+    """Cancel an open requisition and release the stock it still holds."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    req = _requisition(user, requisition_id)
+    if not req:
+        return api_error("Requisition not found", status_code=404)
+    try:
+        cancel_requisition(user.organization_id, req, user_id=user.id)
+    except RequisitionConflict as exc:
+        db.session.rollback()
+        return api_error(str(exc), status_code=409)
+    db.session.commit()
+    return api_success(data=_requisition(user, requisition_id).to_dict(), message="Requisition cancelled")
@@ -1,15 +1,25 @@
 """Roles API (org-scoped)."""
 from flask import Blueprint, request
+from sqlalchemy import func
 
 from flask_jwt_extended import jwt_required
-from app.api.decorators import get_current_user, require_permission
+from app.api.decorators import get_current_user, idempotent, require_permission
 from app.extensions import db
 from app.models import Role, Permission, RolePermission, UserRole
+from app.utils.concurrency import check_if_match, with_etag
+from app.utils.delta_sync import delta_response, parse_updated_since, record_deletion
+from app.utils.invalidation import publish
 from app.utils.response import api_success, api_error
 
 roles_bp = Blueprint("roles", __name__)
 
 
+def _role_to_dict(r):
+    d = r.to_dict()
+    d["permission_ids"] = [rp.permission_id for rp in r.role_permissions]
+    return d
+
+
 @roles_bp.route("", methods=["GET"])
 @jwt_required()
 @require_permission("auth.view")
@@ -17,13 +27,13 @@ def list_roles():
     user = get_current_user()
     if not user:
         return api_error("Unauthorized", status_code=401)
-    roles = Role.query.filter_by(organization_id=user.organization_id).all()
-    data = []
-    for r in roles:
-        d = r.to_dict()
-        d["permission_ids"] = [rp.permission_id for rp in r.role_permissions]
-        data.append(d)
-    return api_success(data=data)
+    since, error = parse_updated_since()
+    if error:
+        return error
+    q = Role.query.filter_by(organization_id=user.organization_id)
+    if since:
+        return delta_response(user.organization_id, "roles", q, Role, since, _role_to_dict)
+    return api_success(data=[_role_to_dict(r) for r in q.all()])
 
 
 @roles_bp.route("/permissions", methods=["GET"])
@@ -47,12 +57,13 @@ def get_role(role_id):
     perm_ids = [rp.permission_id for rp in r.role_permissions]
     data = r.to_dict()
     data["permission_ids"] = perm_ids
-    return api_success(data=data)
+    return with_etag(api_success(data=data), r)
 
 
 @roles_bp.route("", methods=["POST"])
 @jwt_required()
 @require_permission("auth.edit")
+@idempotent
 def create_role():
     user = get_current_user()
     if not user:
@@ -87,6 +98,9 @@ def update_role(role_id):
     r = db.session.get(Role, role_id)
     if not r or r.organization_id != user.organization_id:
         return api_error("Role not found", status_code=404)
+    error = check_if_match(r)
+    if error:
+        return error
     data = request.get_json() or {}
     name = (data.get("name") or "").strip()
     if name:
@@ -99,10 +113,13 @@ def update_role(role_id):
         for pid in permission_ids:
             if Permission.query.get(pid):
                 db.session.add(RolePermission(role_id=r.id, permission_id=pid))
+        r.updated_at = func.now()
+        publish(user.organization_id, "permissions")
+    publish(user.organization_id, "roles")
     db.session.commit()
     data_out = r.to_dict()
     data_out["permission_ids"] = [rp.permission_id for rp in r.role_permissions]
-    return api_success(data=data_out, message="Role updated")
+    return with_etag(api_success(data=data_out, message="Role updated"), r)
 
 
 @roles_bp.route("/<role_id>", methods=["DELETE"])
@@ -116,5 +133,8 @@ def delete_role(role_id):
     if not r or r.organization_id != user.organization_id:
         return api_error("Role not found", status_code=404)
     db.session.delete(r)
+    record_deletion(user.organization_id, "roles", r.id)
+    publish(user.organization_id, "roles")
+    publish(user.organization_id, "permissions")
     db.session.commit()
     return api_success(message="Role deleted")
@@ -1,12 +1,18 @@
 """Inventory SKUs API."""
-from decimal import Decimal
+from datetime import date
+from decimal import Decimal, InvalidOperation
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
 
-from app.api.decorators import get_current_user, require_permission
+from app.api.decorators import get_current_user, idempotent, require_permission
 from app.extensions import db
 from app.models import Sku
+from app.services.atp import available_to_promise
+from app.utils.invalidation import publish
+from app.utils.concurrency import check_if_match, with_etag
+from app.utils.delta_sync import delta_response, parse_updated_since
 from app.utils.response import api_success, api_error
+from app.utils.sequences import next_number
 
 skus_bp = Blueprint("skus", __name__)
 
@@ -18,7 +24,13 @@ def list_skus():
     user = get_current_user()
     if not user:
         return api_error("Unauthorized", status_code=401)
-    items = Sku.query.filter_by(organization_id=user.organization_id).order_by(Sku.code).all()
+    since, error = parse_updated_since()
+    if error:
+        return error
+    q = Sku.query.filter_by(organization_id=user.organization_id)
+    if since:
+        return delta_response(user.organization_id, "skus", q, Sku, since, Sku.to_dict)
+    items = q.order_by(Sku.code).all()
     return api_success(data=[s.to_dict() for s in items])
 
 
@@ -32,12 +44,37 @@ def get_sku(sku_id):
     s = db.session.get(Sku, sku_id)
     if not s or s.organization_id != user.organization_id:
         return api_error("SKU not found", status_code=404)
-    return api_success(data=s.to_dict())
+    return with_etag(api_success(data=s.to_dict()), s)
+
+
+@skus_bp.route("/<sku_id>/atp", methods=["GET"])
+@jwt_required()
+@require_permission("inventory.view")
+def get_sku_atp(sku_id):
+    """Available-to-promise across warehouses; with ?quantity= (and ?date=YYYY-MM-DD, default today)
+    also whether that quantity can be promised by the date, and the earliest date it can."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    s = db.session.get(Sku, sku_id)
+    if not s or s.organization_id != user.organization_id:
+        return api_error("SKU not found", status_code=404)
+    quantity = on_date = None
+    if request.args.get("quantity"):
+        try:
+            quantity = Decimal(request.args["quantity"])
+            on_date = date.fromisoformat(request.args["date"]) if request.args.get("date") else date.today()
+        except (InvalidOperation, ValueError):
+            return api_error("quantity must be a number and date YYYY-MM-DD", status_code=400)
+        if not quantity.is_finite() or quantity <= 0:
+            return api_error("quantity must be positive", status_code=400)
+    return api_success(data=available_to_promise(user.organization_id, s.id, quantity, on_date))
 
 
 @skus_bp.route("", methods=["POST"])
 @jwt_required()
 @require_permission("inventory.edit")
+@idempotent
 def create_sku():
     user = get_current_user()
     if not user:
@@ -48,7 +85,7 @@ def create_sku():
     if not name:
         return api_error("name is required", status_code=400)
     if not code:
-        code = f"SKU-{Sku.query.filter_by(organization_id=user.organization_id).count() + 1:04d}"
+        code = next_number(user.organization_id, "sku")
     if Sku.query.filter_by(organization_id=user.organization_id, code=code).first():
         return api_error("SKU code already exists", status_code=400)
     s = Sku(
@@ -61,6 +98,7 @@ def create_sku():
         is_active=data.get("is_active", True),
     )
     db.session.add(s)
+    publish(user.organization_id, "skus")
     db.session.commit()
     return api_success(data=s.to_dict(), message="SKU created", status_code=201)
 
@@ -75,6 +113,9 @@ def update_sku(sku_id):
     s = db.session.get(Sku, sku_id)
     if not s or s.organization_id != user.organization_id:
         return api_error("SKU not found", status_code=404)
+    error = check_if_match(s)
+    if error:
+        return error
     data = request.get_json() or {}
     for key in ("name", "code", "unit"):
         if key in data and data[key] is not None:
@@ -85,5 +126,6 @@ def update_sku(sku_id):
         s.reorder_quantity = Decimal(str(data["reorder_quantity"]))
     if "is_active" in data:
         s.is_active = bool(data["is_active"])
+    publish(user.organization_id, "skus")
     db.session.commit()
-    return api_success(data=s.to_dict())
+    return with_etag(api_success(data=s.to_dict()), s)
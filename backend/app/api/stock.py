@@ -1,31 +1,174 @@
-"""Inventory Stock levels API."""
-from decimal import Decimal
+"""Inventory Stock levels API. Quantities change only through ledger movements (app.services.stock)."""
+import uuid
+from datetime import date
+from decimal import Decimal, InvalidOperation
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
+from sqlalchemy import func
 
-from app.api.decorators import get_current_user, require_permission
+from app.api.decorators import admission_controlled, get_current_user, idempotent, require_permission, statement_timeout
 from app.extensions import db
-from app.models import StockLevel, Warehouse, Sku
+from app.models import StockLevel, StockMovement, Warehouse, Sku
+from app.services.jobs import enqueue
+from app.services.stock import InsufficientStock, apply_deltas, get_level, low_stock, movement, post_movements
+from app.services.stock_checkpoints import levels_as_of
+from app.services.valuation import valuation_report
+from app.utils.delta_sync import delta_response, parse_updated_since
+from app.utils.export import export_response
 from app.utils.response import api_success, api_error
 
 stock_bp = Blueprint("stock", __name__)
 
 
+def _stock_query(user):
+    """Stock levels in the user's organization's warehouses, optionally for one ?warehouse_id=."""
+    warehouse_id = request.args.get("warehouse_id")
+    q = db.session.query(StockLevel).join(Warehouse).filter(Warehouse.organization_id == user.organization_id)
+    if warehouse_id:
+        q = q.filter(StockLevel.warehouse_id == warehouse_id)
+    return q
+
+
 @stock_bp.route("", methods=["GET"])
 @jwt_required()
 @require_permission("inventory.view")
 def list_stock():
+    """Current stock levels, or with ?as_of=YYYY-MM-DD the non-zero levels at the end of that day (UTC)."""
     user = get_current_user()
     if not user:
         return api_error("Unauthorized", status_code=401)
-    warehouse_id = request.args.get("warehouse_id")
-    q = db.session.query(StockLevel).join(Warehouse).filter(Warehouse.organization_id == user.organization_id)
-    if warehouse_id:
-        q = q.filter(StockLevel.warehouse_id == warehouse_id)
+    if request.args.get("as_of"):
+        try:
+            as_of = date.fromisoformat(request.args["as_of"])
+        except ValueError:
+            return api_error("as_of must be YYYY-MM-DD", status_code=400)
+        levels, checkpoint_date = levels_as_of(user.organization_id, as_of, warehouse_id=request.args.get("warehouse_id"))
+        base = f"checkpoint {checkpoint_date.isoformat()}" if checkpoint_date else "current levels"
+        return api_success(data=levels, message=f"Stock as of {as_of.isoformat()} (from {base})")
+    q = _stock_query(user)
+    since, error = parse_updated_since()
+    if error:
+        return error
+    if since:
+        return delta_response(user.organization_id, "stock_levels", q, StockLevel, since, StockLevel.to_dict)
     levels = q.all()
     return api_success(data=[l.to_dict() for l in levels])
 
 
+@stock_bp.route("/export", methods=["GET"])
+@jwt_required()
+@require_permission("inventory.view")
+@admission_controlled("export")
+@statement_timeout("export")
+def export_stock():
+    """Stream stock levels as CSV or NDJSON, with the list filters."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    q = _stock_query(user).order_by(StockLevel.warehouse_id, StockLevel.sku_id)
+    return export_response(q, StockLevel.__table__.columns, "stock")
+
+
+@stock_bp.route("/low", methods=["GET"])
+@jwt_required()
+@require_permission("inventory.view")
+@admission_controlled("report")
+@statement_timeout("report")
+def list_low_stock():
+    """Levels at or below their reorder point, grouped by warehouse, with suggested order quantities."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    groups = {}
+    for row in low_stock(user.organization_id, warehouse_id=request.args.get("warehouse_id")):
+        group = groups.setdefault(row["warehouse_id"], {
+            "warehouse_id": row["warehouse_id"],
+            "warehouse_code": row["warehouse_code"],
+            "warehouse_name": row["warehouse_name"],
+            "items": [],
+        })
+        group["items"].append({
+            "stock_level_id": row["stock_level_id"],
+            "sku_id": row["sku_id"],
+            "sku_code": row["sku_code"],
+            "sku_name": row["sku_name"],
+            "unit": row["unit"],
+            "quantity": float(row["quantity"] or 0),
+            "reserved_quantity": float(row["reserved_quantity"] or 0),
+            "available_quantity": float(row["available_quantity"]),
+            "reorder_point": float(row["reorder_point"]),
+            "reorder_point_source": row["source"],
+            "shortfall": float(row["shortfall"]),
+            "suggested_quantity": float(row["suggested_quantity"]),
+        })
+    return api_success(data=list(groups.values()))
+
+
+@stock_bp.route("/valuation", methods=["GET"])
+@jwt_required()
+@require_permission("inventory.view")
+@admission_controlled("report")
+@statement_timeout("report")
+def get_valuation():
+    """Stock value at weighted-average cost per warehouse and SKU, with warehouse and overall totals."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    groups, total = {}, Decimal(0)
+    for row in valuation_report(user.organization_id, warehouse_id=request.args.get("warehouse_id")):
+        quantity, value = Decimal(row["quantity"] or 0), Decimal(row["total_value"] or 0)
+        group = groups.setdefault(row["warehouse_id"], {
+            "warehouse_id": row["warehouse_id"],
+            "warehouse_code": row["warehouse_code"],
+            "warehouse_name": row["warehouse_name"],
+            "total_value": Decimal(0),
+            "items": [],
+        })
+        group["items"].append({
+            "sku_id": row["sku_id"],
+            "sku_code": row["sku_code"],
+            "sku_name": row["sku_name"],
+            "quantity": float(quantity),
+            "total_value": float(value),
+            "average_cost": float(value / quantity) if quantity > 0 else 0,
+            "last_unit_cost": float(row["last_unit_cost"]) if row["last_unit_cost"] is not None else None,
+        })
+        group["total_value"] += value
+        total += value
+    warehouses = list(groups.values())
+    for group in warehouses:
+        group["total_value"] = float(group["total_value"])
+    return api_success(data={"total_value": float(total), "warehouses": warehouses})
+
+
+@stock_bp.route("/mrp", methods=["POST"])
+@jwt_required()
+@require_permission("inventory.edit")
+@idempotent
+def queue_mrp():
+    """Queue an MRP run (inventory.mrp job). Optional body: {"period_days", "horizon_days"}.
+
+    The job result holds the planned orders and shortage exceptions.
+    """
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    data = request.get_json(silent=True) or {}
+    payload = {}
+    for field in ("period_days", "horizon_days"):
+        if data.get(field) is not None:
+            try:
+                value = int(data[field])
+            except (TypeError, ValueError):
+                value = 0
+            if value < 1:
+                return api_error(f"{field} must be a positive integer", status_code=400)
+            payload[field] = value
+    job = enqueue(user.organization_id, "inventory.mrp", payload, user_id=user.id)
+    db.session.commit()
+    return api_success(data=job.to_dict(), message="MRP run queued", status_code=202)
+
+
 @stock_bp.route("/<stock_level_id>", methods=["GET"])
 @jwt_required()
 @require_permission("inventory.view")
@@ -44,6 +187,7 @@ def get_stock(stock_level_id):
 @stock_bp.route("", methods=["POST"])
 @jwt_required()
 @require_permission("inventory.edit")
+@idempotent
 def create_or_update_stock():
     """Set or update stock level for a warehouse+sku. Creates record if not exists."""
     user = get_current_user()
@@ -56,20 +200,137 @@ def create_or_update_stock():
     reorder_point = data.get("reorder_point")
     if not warehouse_id or not sku_id:
         return api_error("warehouse_id and sku_id are required", status_code=400)
+    try:
+        quantity = _finite(quantity, "quantity") if quantity is not None else None
+        reorder_point = _finite(reorder_point, "reorder_point") if reorder_point is not None else None
+    except ValueError as exc:
+        return api_error(str(exc), status_code=400)
     wh = db.session.get(Warehouse, warehouse_id)
     sku = db.session.get(Sku, sku_id)
     if not wh or wh.organization_id != user.organization_id:
         return api_error("Warehouse not found", status_code=404)
     if not sku or sku.organization_id != user.organization_id:
         return api_error("SKU not found", status_code=404)
-    sl = StockLevel.query.filter_by(warehouse_id=warehouse_id, sku_id=sku_id).first()
-    if not sl:
-        sl = StockLevel(warehouse_id=warehouse_id, sku_id=sku_id, quantity=Decimal(0), reserved_quantity=Decimal(0), reorder_point=Decimal(0))
-        db.session.add(sl)
-        db.session.flush()
+    # Make sure the row exists and hold its lock, so the count-to-delta step below cannot race.
+    apply_deltas({(warehouse_id, sku_id): (Decimal(0), Decimal(0))})
+    sl = get_level(warehouse_id, sku_id)
     if quantity is not None:
-        sl.quantity = Decimal(str(quantity))
+        delta = quantity - (sl.quantity or 0)
+        if delta:
+            post_movements(user.organization_id, [
+                movement(warehouse_id, sku_id, "adjustment", delta, note=data.get("note") or "Stock count")
+            ], user_id=user.id)
+            sl = get_level(warehouse_id, sku_id)
     if reorder_point is not None:
-        sl.reorder_point = Decimal(str(reorder_point))
+        sl.reorder_point = reorder_point
     db.session.commit()
     return api_success(data=sl.to_dict())
+
+
+def _finite(value, field):
+    """value as a finite Decimal, or raise ValueError naming the field."""
+    try:
+        number = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"{field} must be a number")
+    if not number.is_finite():
+        raise ValueError(f"{field} must be a finite number")
+    return number
+
+
+def _movement_rows(entry):
+    """Ledger rows for one requested movement, or raise ValueError."""
+    movement_type = entry.get("movement_type")
+    warehouse_id, sku_id = entry.get("warehouse_id"), entry.get("sku_id")
+    if not warehouse_id or not sku_id:
+        raise ValueError("warehouse_id and sku_id are required")
+    quantity = _finite(entry.get("quantity"), "quantity")
+    note = (entry.get("note") or "").strip()
+    if movement_type == "adjustment":
+        return [movement(warehouse_id, sku_id, "adjustment", quantity, note=note)]
+    if quantity <= 0:
+        raise ValueError("quantity must be positive")
+    if movement_type == "receipt":
+        unit_cost = entry.get("unit_cost")
+        if unit_cost is not None:
+            unit_cost = _finite(unit_cost, "unit_cost")
+            if unit_cost < 0:
+                raise ValueError("unit_cost must not be negative")
+        return [movement(warehouse_id, sku_id, "receipt", quantity, note=note, unit_cost=unit_cost)]
+    if movement_type == "issue":
+        return [movement(warehouse_id, sku_id, "issue", -quantity, note=note)]
+    if movement_type == "transfer":
+        to_warehouse_id = entry.get("to_warehouse_id")
+        if not to_warehouse_id or to_warehouse_id == warehouse_id:
+            raise ValueError("to_warehouse_id must be another warehouse")
+        transfer_id = str(uuid.uuid4())
+        # The receiving side is costed at what the sending side gives up (see app.services.valuation).
+        return [
+            movement(warehouse_id, sku_id, "transfer", -quantity, reference_type="transfer", reference_id=transfer_id, note=note),
+            movement(to_warehouse_id, sku_id, "transfer", quantity, reference_type="transfer", reference_id=transfer_id,
+                     note=note),
+        ]
+    raise ValueError("movement_type must be receipt, issue, adjustment or transfer")
+
+
+@stock_bp.route("/movements", methods=["POST"])
+@jwt_required()
+@require_permission("inventory.edit")
+@idempotent
+def create_movements():
+    """Post one movement, or {"movements": [...]}, to the stock ledger in one transaction.
+
+    Issues and transfers may not take available stock below zero (409).
+    """
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    data = request.get_json() or {}
+    entries = data.get("movements") if "movements" in data else [data]
+    if not isinstance(entries, list) or not entries:
+        return api_error("movements must be a non-empty list", status_code=400)
+    rows = []
+    for i, entry in enumerate(entries):
+        try:
+            rows.extend(_movement_rows(entry or {}))
+        except ValueError as exc:
+            return api_error(str(exc), errors={"index": i}, status_code=400)
+    warehouse_ids = {r["warehouse_id"] for r in rows}
+    sku_ids = {r["sku_id"] for r in rows}
+    found_warehouses = db.session.query(func.count(Warehouse.id)).filter(
+        Warehouse.id.in_(warehouse_ids), Warehouse.organization_id == user.organization_id
+    ).scalar()
+    if found_warehouses != len(warehouse_ids):
+        return api_error("Warehouse not found", status_code=404)
+    found_skus = db.session.query(func.count(Sku.id)).filter(
+        Sku.id.in_(sku_ids), Sku.organization_id == user.organization_id
+    ).scalar()
+    if found_skus != len(sku_ids):
+        return api_error("SKU not found", status_code=404)
+    try:
+        posted = post_movements(user.organization_id, rows, user_id=user.id, require_available=True)
+    except InsufficientStock as exc:
+        db.session.rollback()
+        return api_error("Insufficient stock", errors={"shortages": exc.shortages}, status_code=409)
+    db.session.commit()
+    ids = [r["id"] for r in posted]
+    movements = StockMovement.query.filter(StockMovement.id.in_(ids)).order_by(StockMovement.created_at).all()
+    return api_success(data=[m.to_dict() for m in movements], message="Stock movements posted", status_code=201)
+
+
+@stock_bp.route("/movements", methods=["GET"])
+@jwt_required()
+@require_permission("inventory.view")
+def list_movements():
+    """Ledger entries, newest first; filter by ?warehouse_id=, ?sku_id=, ?movement_type=; ?limit= (max 1000)."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    q = StockMovement.query.filter_by(organization_id=user.organization_id)
+    for field in ("warehouse_id", "sku_id", "movement_type"):
+        value = request.args.get(field)
+        if value:
+            q = q.filter(getattr(StockMovement, field) == value)
+    limit = min(request.args.get("limit", 100, type=int), 1000)
+    movements = q.order_by(StockMovement.created_at.desc()).limit(limit).all()
+    return api_success(data=[m.to_dict() for m in movements])
@@ -5,9 +5,12 @@ from decimal import Decimal
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
 
-from app.api.decorators import get_current_user, require_permission
+from app.api.decorators import admission_controlled, get_current_user, idempotent, require_permission, statement_timeout
 from app.extensions import db
 from app.models import Timesheet, Task, Employee
+from app.services.outbox import emit
+from app.utils.delta_sync import delta_response, parse_updated_since
+from app.utils.export import export_response
 from app.utils.response import api_success, api_error
 
 timesheets_bp = Blueprint("timesheets", __name__)
@@ -22,13 +25,8 @@ def _parse_date(v):
         return None
 
 
-@timesheets_bp.route("", methods=["GET"])
-@jwt_required()
-@require_permission("pm.view")
-def list_timesheets():
-    user = get_current_user()
-    if not user:
-        return api_error("Unauthorized", status_code=401)
+def _timesheet_query(user):
+    """Timesheets of the user's organization, filtered by employee, task and date range."""
     employee_id = request.args.get("employee_id")
     task_id = request.args.get("task_id")
     from_date = request.args.get("from_date")
@@ -42,13 +40,44 @@ def list_timesheets():
         q = q.filter(Timesheet.work_date >= _parse_date(from_date))
     if to_date:
         q = q.filter(Timesheet.work_date <= _parse_date(to_date))
+    return q
+
+
+@timesheets_bp.route("", methods=["GET"])
+@jwt_required()
+@require_permission("pm.view")
+def list_timesheets():
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    q = _timesheet_query(user)
+    since, error = parse_updated_since()
+    if error:
+        return error
+    if since:
+        return delta_response(user.organization_id, "timesheets", q, Timesheet, since, Timesheet.to_dict)
     q = q.order_by(Timesheet.work_date.desc())
     return api_success(data=[t.to_dict() for t in q.all()])
 
 
+@timesheets_bp.route("/export", methods=["GET"])
+@jwt_required()
+@require_permission("pm.view")
+@admission_controlled("export")
+@statement_timeout("export")
+def export_timesheets():
+    """Stream timesheets as CSV or NDJSON, with the list filters."""
+    user = get_current_user()
+    if not user:
+        return api_error("Unauthorized", status_code=401)
+    q = _timesheet_query(user).order_by(Timesheet.work_date.desc())
+    return export_response(q, Timesheet.__table__.columns, "timesheets")
+
+
 @timesheets_bp.route("", methods=["POST"])
 @jwt_required()
 @require_permission("pm.edit")
+@idempotent
 def create_timesheet():
     user = get_current_user()
     if not user:
@@ -94,5 +123,10 @@ def approve_timesheet(timesheet_id):
         return api_error("Timesheet not found", status_code=404)
     ts.status = "approved"
     ts.approved_by_user_id = user.id
+    emit(user.organization_id, "timesheet.approved", {
+        "timesheet_id": ts.id,
+        "employee_id": ts.employee_id,
+        "work_date": ts.work_date.isoformat(),
+    })
     db.session.commit()
     return api_success(data=ts.to_dict(), message="Timesheet approved")
@@ -1,10 +1,14 @@
 """Users API (org-scoped)."""
 from flask import Blueprint, request
+from sqlalchemy import func
 
 from flask_jwt_extended import jwt_required
-from app.api.decorators import get_current_user, require_permission
+from app.api.decorators import get_current_user, idempotent, require_permission
 from app.extensions import db
 from app.models import User, UserRole, Role
+from app.utils.concurrency import check_if_match, with_etag
+from app.utils.delta_sync import delta_response, parse_updated_since, record_deletion
+from app.utils.invalidation import publish
 from app.utils.response import api_success, api_error
 from app.utils.auth_utils import hash_password
 
@@ -25,7 +29,13 @@ def list_users():
     if not user:
         return api_error("Unauthorized", status_code=401)
     org_id = user.organization_id
-    users = User.query.filter_by(organization_id=org_id).all()
+    since, error = parse_updated_since()
+    if error:
+        return error
+    q = User.query.filter_by(organization_id=org_id)
+    if since:
+        return delta_response(org_id, "users", q, User, since, _user_to_dict)
+    users = q.all()
     return api_success(data=[_user_to_dict(u) for u in users])
 
 
@@ -39,12 +49,13 @@ def get_user(user_id):
     u = db.session.get(User, user_id)
     if not u or u.organization_id != current.organization_id:
         return api_error("User not found", status_code=404)
-    return api_success(data=_user_to_dict(u))
+    return with_etag(api_success(data=_user_to_dict(u)), u)
 
 
 @users_bp.route("", methods=["POST"])
 @jwt_required()
 @require_permission("auth.edit")
+@idempotent
 def create_user():
     current = get_current_user()
     if not current:
@@ -91,6 +102,9 @@ def update_user(user_id):
     u = db.session.get(User, user_id)
     if not u or u.organization_id != current.organization_id:
         return api_error("User not found", status_code=404)
+    error = check_if_match(u)
+    if error:
+        return error
     data = request.get_json() or {}
     full_name = (data.get("full_name") or data.get("fullName") or "").strip()
     if full_name:
@@ -107,8 +121,11 @@ def update_user(user_id):
             r = db.session.get(Role, role_id)
             if r and r.organization_id == current.organization_id:
                 db.session.add(UserRole(user_id=u.id, role_id=role_id))
+        u.updated_at = func.now()
+        publish(current.organization_id, "permissions")
+    publish(current.organization_id, "users")
     db.session.commit()
-    return api_success(data=_user_to_dict(u), message="User updated")
+    return with_etag(api_success(data=_user_to_dict(u), message="User updated"), u)
 
 
 @users_bp.route("/<user_id>", methods=["DELETE"])
@@ -124,6 +141,9 @@ def delete_user(user_id):
     if not u or u.organization_id != current.organization_id:
         return api_error("User not found", status_code=404)
     db.session.delete(u)
+    record_deletion(current.organization_id, "users", u.id)
+    publish(current.organization_id, "users")
+    publish(current.organization_id, "permissions")
     db.session.commit()
     return api_success(message="User deleted")
 
@@ -145,5 +165,8 @@ def set_user_roles(user_id):
         r = db.session.get(Role, role_id)
         if r and r.organization_id == current.organization_id:
             db.session.add(UserRole(user_id=u.id, role_id=role_id))
+    u.updated_at = func.now()
+    publish(current.organization_id, "users")
+    publish(current.organization_id, "permissions")
     db.session.commit()
     return api_success(data=_user_to_dict(u), message="Roles updated")
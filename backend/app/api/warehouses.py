@@ -2,10 +2,14 @@
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
 
-from app.api.decorators import get_current_user, require_permission
+from app.api.decorators import get_current_user, idempotent, require_permission
 from app.extensions import db
 from app.models import Warehouse
+from app.utils.invalidation import publish
+from app.utils.concurrency import check_if_match, with_etag
+from app.utils.delta_sync import delta_response, parse_updated_since
 from app.utils.response import api_success, api_error
+from app.utils.sequences import next_number
 
 warehouses_bp = Blueprint("warehouses", __name__)
 
@@ -17,7 +21,13 @@ def list_warehouses():
     user = get_current_user()
     if not user:
         return api_error("Unauthorized", status_code=401)
-    items = Warehouse.query.filter_by(organization_id=user.organization_id).order_by(Warehouse.name).all()
+    since, error = parse_updated_since()
+    if error:
+        return error
+    q = Warehouse.query.filter_by(organization_id=user.organization_id)
+    if since:
+        return delta_response(user.organization_id, "warehouses", q, Warehouse, since, Warehouse.to_dict)
+    items = q.order_by(Warehouse.name).all()
     return api_success(data=[w.to_dict() for w in items])
 
 
@@ -31,12 +41,13 @@ def get_warehouse(warehouse_id):
     w = db.session.get(Warehouse, warehouse_id)
     if not w or w.organization_id != user.organization_id:
         return api_error("Warehouse not found", status_code=404)
-    return api_success(data=w.to_dict())
+    return with_etag(api_success(data=w.to_dict()), w)
 
 
 @warehouses_bp.route("", methods=["POST"])
 @jwt_required()
 @require_permission("inventory.edit")
+@idempotent
 def create_warehouse():
     user = get_current_user()
     if not user:
@@ -47,7 +58,7 @@ def create_warehouse():
     if not name:
         return api_error("name is required", status_code=400)
     if not code:
-        code = f"WH-{Warehouse.query.filter_by(organization_id=user.organization_id).count() + 1:04d}"
+        code = next_number(user.organization_id, "warehouse")
     if Warehouse.query.filter_by(organization_id=user.organization_id, code=code).first():
         return api_error("Warehouse code already exists", status_code=400)
     w = Warehouse(
@@ -58,6 +69,7 @@ def create_warehouse():
         is_default=bool(data.get("is_default", False)),
     )
     db.session.add(w)
+    publish(user.organization_id, "warehouses")
     db.session.commit()
     return api_success(data=w.to_dict(), message="Warehouse created", status_code=201)
 
@@ -72,11 +84,15 @@ def update_warehouse(warehouse_id):
     w = db.session.get(Warehouse, warehouse_id)
     if not w or w.organization_id != user.organization_id:
         return api_error("Warehouse not found", status_code=404)
+    error = check_if_match(w)
+    if error:
+        return error
     data = request.get_json() or {}
     for key in ("name", "code", "address"):
         if key in data and data[key] is not None:
             setattr(w, key, str(data[key]).strip())
     if "is_default" in data:
         w.is_default = bool(data["is_default"])
+    publish(user.organization_id, "warehouses")
     db.session.commit()
-    return api_success(data=w.to_dict())
+    return with_etag(api_success(data=w.to_dict()), w)
@@ -0,0 +1,660 @@
+"""Flask CLI commands. Run from the backend folder, e.g. `flask sync purge-tombstones`."""
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+sync_cli = AppGroup("sync", help="Delta-sync maintenance.")
+outbox_cli = AppGroup("outbox", help="Transactional outbox worker.")
+jobs_cli = AppGroup("jobs", help="Background job workers.")
+admission_cli = AppGroup("admission", help="Heavy-endpoint admission control.")
+idempotency_cli = AppGroup("idempotency", help="Idempotency-Key maintenance.")
+data_cli = AppGroup("data", help="Bulk data import.")
+tenant_cli = AppGroup("tenant", help="Whole-organization backup, restore, cloning and deletion.")
+stock_cli = AppGroup("stock", help="Stock ledger maintenance.")
+partitions_cli = AppGroup("partitions", help="Monthly table partitions (PostgreSQL).")
+bench_cli = AppGroup("bench", help="Database benchmarks (PostgreSQL).")
+
+
+@sync_cli.command("purge-tombstones")
+@click.option("--days", type=int, default=None, help="Keep tombstones newer than this many days.")
+def purge_tombstones_command(days):
+    """Delete tombstones older than the retention window."""
+    from app.utils.delta_sync import purge_tombstones
+
+    if days is None:
+        days = current_app.config["DELTA_SYNC_TOMBSTONE_RETENTION_DAYS"]
+    removed = purge_tombstones(days)
+    click.echo(f"Removed {removed} tombstones older than {days} days")
+
+
+@outbox_cli.command("work")
+@click.option("--batch-size", type=int, default=None, help="Events claimed per transaction.")
+@click.option("--poll-interval", type=float, default=None, help="Seconds to sleep when the queue is empty.")
+@click.option("--once", is_flag=True, help="Exit once no due events remain.")
+def outbox_work_command(batch_size, poll_interval, once):
+    """Dispatch pending outbox events to their handlers."""
+    from app.services.outbox import run_worker
+
+    run_worker(
+        batch_size=batch_size or current_app.config["OUTBOX_BATCH_SIZE"],
+        poll_interval=poll_interval if poll_interval is not None else current_app.config["OUTBOX_POLL_INTERVAL"],
+        once=once,
+    )
+
+
+@outbox_cli.command("purge")
+@click.option("--days", type=int, default=7, help="Keep dispatched events newer than this many days.")
+def outbox_purge_command(days):
+    """Delete dispatched events older than --days."""
+    from app.services.outbox import purge_processed
+
+    click.echo(f"Removed {purge_processed(days)} dispatched events")
+
+
+@jobs_cli.command("work")
+@click.option("--worker-id", default=None, help="Name recorded on claimed jobs (default host:pid).")
+@click.option("--poll-interval", type=float, default=None, help="Seconds to sleep when no job is runnable.")
+@click.option("--once", is_flag=True, help="Exit once no job is runnable.")
+def jobs_work_command(worker_id, poll_interval, once):
+    """Claim and run background jobs. Start one process per desired worker."""
+    from app.services.jobs import run_worker
+
+    run_worker(
+        worker_id=worker_id,
+        poll_interval=poll_interval if poll_interval is not None else current_app.config["JOB_POLL_INTERVAL"],
+        once=once,
+    )
+
+
+@admission_cli.command("stats")
+def admission_stats_command():
+    """Print in-flight heavy requests and saturation per organization."""
+    metrics = current_app.extensions["admission"].metrics()
+    if not metrics:
+        click.echo("No heavy requests in flight")
+    for org_id, m in sorted(metrics.items(), key=lambda kv: -kv[1]["saturation"]):
+        click.echo(
+            f"{org_id}  saturation={m['saturation']:.0%}  units={m['in_flight_units']}/{m['capacity']}  "
+            f"by_class={m['in_flight_by_class']}  admitted={m['admitted']} queued={m['queued']} rejected={m['rejected']}"
+        )
+
+
+@idempotency_cli.command("purge")
+def idempotency_purge_command():
+    """Delete idempotency keys past their TTL."""
+    from app.utils.idempotency import purge_expired
+
+    click.echo(f"Removed {purge_expired()} expired idempotency keys")
+
+
+@data_cli.command("import")
+@click.argument("entity", type=click.Choice(["skus", "customers", "employees", "leads"]))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--org", "org_code", required=True, help="Organization code.")
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), default=None, help="Default: from the file extension.")
+@click.option("--dry-run", is_flag=True, help="Validate only.")
+def data_import_command(entity, path, org_code, fmt, dry_run):
+    """Bulk-create records for an organization from a CSV or NDJSON file."""
+    from app.models import Organization
+    from app.services.imports import read_rows, run_import
+
+    org = Organization.query.filter_by(code=org_code.strip().upper()).first()
+    if not org:
+        raise click.ClickException(f"Organization {org_code} not found")
+    fmt = fmt or ("ndjson" if path.lower().endswith((".ndjson", ".jsonl")) else "csv")
+    started = time.monotonic()
+    with open(path, "rb") as f:
+        report = run_import(
+            org.id, entity, read_rows(f, fmt), chunk_size=current_app.config["IMPORT_CHUNK_SIZE"], dry_run=dry_run
+        )
+    elapsed = time.monotonic() - started
+    click.echo(
+        f"{report.created} of {report.total} rows imported, {report.error_count} failed "
+        f"in {elapsed:.1f}s ({report.total / max(elapsed, 1e-6):,.0f} rows/s)"
+    )
+    for error in report.errors[:50]:
+        click.echo(f"  row {error['row']}: {error['error']}")
+
+
+@tenant_cli.command("backup")
+@click.option("--org", "org_code", required=True, help="Organization code.")
+@click.option("--out", "out_path", required=True, type=click.Path(dir_okay=False), help="Archive to write (.zip).")
+@click.option("--format", "fmt", type=click.Choice(["ndjson", "copy"]), default="ndjson", help="copy needs PostgreSQL.")
+def tenant_backup_command(org_code, out_path, fmt):
+    """Dump every table of one organization into a zip archive."""
+    from app.models import Organization
+    from app.services.tenants import dump_tenant
+
+    org = Organization.query.filter_by(code=org_code.strip().upper()).first()
+    if not org:
+        raise click.ClickException(f"Organization {org_code} not found")
+    with open(out_path, "wb") as f:
+        manifest = dump_tenant(org.id, f, fmt, progress=lambda done, total, table: click.echo(f"  {table}"))
+    click.echo(f"Wrote {sum(t['rows'] for t in manifest['tables'])} rows to {out_path}")
+
+
+@tenant_cli.command("restore")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--remap", is_flag=True, help="Load as a new organization with fresh ids.")
+@click.option("--code", default=None, help="Code for the new organization (with --remap).")
+@click.option("--name", default=None, help="Name for the new organization (with --remap).")
+def tenant_restore_command(path, remap, code, name):
+    """Load a tenant backup in one transaction."""
+    from app.services.tenants import restore_tenant
+
+    try:
+        result = restore_tenant(path, remap=remap, code=code, name=name,
+                                progress=lambda done, total, table: click.echo(f"  {table}"))
+    except (ValueError, LookupError) as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f"Restored {result['rows']} rows into organization {result['organization_id']}")
+
+
+@tenant_cli.command("clone")
+@click.option("--org", "org_code", required=True, help="Organization to copy.")
+@click.option("--code", required=True, help="Code for the new organization.")
+@click.option("--name", default=None, help="Name for the new organization.")
+def tenant_clone_command(org_code, code, name):
+    """Copy an organization into a new one with fresh ids (set-based, one transaction)."""
+    from app.models import Organization
+    from app.services.tenants import clone_tenant
+
+    org = Organization.query.filter_by(code=org_code.strip().upper()).first()
+    if not org:
+        raise click.ClickException(f"Organization {org_code} not found")
+    started = time.monotonic()
+    try:
+        result = clone_tenant(org.id, code, name=name, progress=lambda done, total, table: click.echo(f"  {table}"))
+    except (ValueError, LookupError) as exc:
+        raise click.ClickException(str(exc))
+    click.echo(
+        f"Copied {result['rows']} rows into organization {result['organization_id']} "
+        f"in {time.monotonic() - started:.1f}s"
+    )
+
+
+@tenant_cli.command("delete")
+@click.option("--org", "org_code", required=True, help="Organization to delete.")
+@click.option("--chunk-size", type=int, default=None, help="Rows per transaction (default TENANT_DELETE_CHUNK_SIZE).")
+@click.confirmation_option(prompt="This deletes the organization and all of its data. Continue?")
+def tenant_delete_command(org_code, chunk_size):
+    """Delete an organization and all its data in bounded chunks."""
+    from app.models import Organization
+    from app.services.tenants import delete_tenant
+
+    org = Organization.query.filter_by(code=org_code.strip().upper()).first()
+    if not org:
+        raise click.ClickException(f"Organization {org_code} not found")
+    started = time.monotonic()
+    deleted = delete_tenant(org.id, chunk_size=chunk_size, progress=lambda done, total, table: click.echo(f"  {table}"))
+    click.echo(f"Deleted {sum(deleted.values())} rows in {time.monotonic() - started:.1f}s")
+
+
+@stock_cli.command("rebuild")
+@click.option("--org", "org_code", default=None, help="Organization code (default: all).")
+@click.option("--dry-run", is_flag=True, help="Report differences without fixing them.")
+def stock_rebuild_command(org_code, dry_run):
+    """Re-derive stock levels from the stock movement ledger."""
+    from app.models import Organization
+    from app.services.stock import rebuild_levels
+
+    org_id = None
+    if org_code:
+        org = Organization.query.filter_by(code=org_code.strip().upper()).first()
+        if not org:
+            raise click.ClickException(f"Organization {org_code} not found")
+        org_id = org.id
+    result = rebuild_levels(org_id, dry_run=dry_run)
+    for diff in result["diffs"]:
+        click.echo(f"  {diff['warehouse_id']} {diff['sku_id']}: level {diff['level']} ledger {diff['ledger']}")
+    click.echo(
+        f"Checked {result['checked']} stock levels: {result['mismatched']} differed from the ledger, "
+        f"{result['created']} missing" + (" (dry run, nothing changed)" if dry_run else "")
+    )
+
+
+@stock_cli.command("verify-valuation")
+@click.option("--org", "org_code", default=None, help="Organization code (default: all).")
+@click.option("--fix", is_flag=True, help="Overwrite drifted valuations with the replayed ones.")
+def stock_verify_valuation_command(org_code, fix):
+    """Replay the ledger at weighted-average cost and diff against the maintained valuations."""
+    from app.models import Organization
+    from app.services.valuation import verify_valuations
+
+    org_id = None
+    if org_code:
+        org = Organization.query.filter_by(code=org_code.strip().upper()).first()
+        if not org:
+            raise click.ClickException(f"Organization {org_code} not found")
+        org_id = org.id
+    started = time.monotonic()
+    result = verify_valuations(org_id, fix=fix)
+    for diff in result["diffs"]:
+        click.echo(f"  {diff['warehouse_id']} {diff['sku_id']}: state {diff['state']} ledger {diff['ledger']}")
+    click.echo(
+        f"Checked {result['checked']} valuations: {result['mismatched']} differed from the ledger, "
+        f"{result['created']} missing" + (" (fixed)" if fix else "") + f" ({time.monotonic() - started:.1f}s)"
+    )
+    if (result["mismatched"] or result["created"]) and not fix:
+        raise click.ClickException("Valuation drift detected; rerun with --fix to repair")
+
+
+@stock_cli.command("checkpoint")
+@click.option("--org", "org_code", default=None, help="Organization code (default: all).")
+@click.option("--date", "day", default=None, help="Day to checkpoint, YYYY-MM-DD (default: the one due per STOCK_CHECKPOINT_PERIOD).")
+def stock_checkpoint_command(org_code, day):
+    """Snapshot stock levels at the end of a day, for as-of queries."""
+    from datetime import date
+
+    from app.extensions import db
+    from app.models import Organization
+    from app.services.stock_checkpoints import due_date, take_checkpoint
+
+    try:
+        day = date.fromisoformat(day) if day else due_date(current_app.config["STOCK_CHECKPOINT_PERIOD"])
+    except ValueError:
+        raise click.ClickException("--date must be YYYY-MM-DD")
+    q = Organization.query
+    if org_code:
+        q = q.filter_by(code=org_code.strip().upper())
+    orgs = q.order_by(Organization.code).all()
+    if org_code and not orgs:
+        raise click.ClickException(f"Organization {org_code} not found")
+    for org in orgs:
+        started = time.monotonic()
+        try:
+            checkpoint = take_checkpoint(org.id, day)
+        except ValueError as exc:
+            raise click.ClickException(str(exc))
+        db.session.commit()
+        if checkpoint is None:
+            click.echo(f"  {org.code}: already has a checkpoint for {day}")
+        else:
+            click.echo(f"  {org.code}: {checkpoint.level_count} levels ({time.monotonic() - started:.1f}s)")
+
+
+@stock_cli.command("replenish")
+@click.option("--org", "org_code", required=True, help="Organization code.")
+@click.option("--warehouse", "warehouse_code", default=None, help="Only this warehouse (code).")
+@click.option("--dry-run", is_flag=True, help="Show what would be ordered without creating purchase orders.")
+def stock_replenish_command(org_code, warehouse_code, dry_run):
+    """Create draft purchase orders for low stock not already on order."""
+    from app.extensions import db
+    from app.models import Organization, Warehouse
+    from app.services.replenishment import run_replenishment
+
+    org = Organization.query.filter_by(code=org_code.strip().upper()).first()
+    if not org:
+        raise click.ClickException(f"Organization {org_code} not found")
+    warehouse_id = None
+    if warehouse_code:
+        wh = Warehouse.query.filter_by(organization_id=org.id, code=warehouse_code.strip()).first()
+        if not wh:
+            raise click.ClickException(f"Warehouse {warehouse_code} not found")
+        warehouse_id = wh.id
+    started = time.monotonic()
+    result = run_replenishment(org.id, warehouse_id=warehouse_id, dry_run=dry_run)
+    db.session.commit()
+    for po in result["purchase_orders"]:
+        click.echo(f"  {po['number'] or '(dry run)'}: warehouse {po['warehouse_id']}, {po['lines']} lines")
+    click.echo(
+        f"{len(result['purchase_orders'])} purchase orders, {result['lines']} lines, "
+        f"{result['skipped_on_order']} SKUs already on order ({time.monotonic() - started:.1f}s)"
+    )
+
+
+@stock_cli.command("mrp")
+@click.option("--org", "org_code", required=True, help="Organization code.")
+@click.option("--period-days", type=int, default=None, help="Planning bucket size (default MRP_PERIOD_DAYS).")
+@click.option("--horizon-days", type=int, default=None, help="How far ahead to plan (default MRP_HORIZON_DAYS).")
+@click.option("--show", type=int, default=20, help="Planned orders and exceptions to print.")
+def stock_mrp_command(org_code, period_days, horizon_days, show):
+    """Run MRP for an organization and print the plan (nothing is written)."""
+    from app.models import Organization
+    from app.services.mrp import run_mrp
+
+    org = Organization.query.filter_by(code=org_code.strip().upper()).first()
+    if not org:
+        raise click.ClickException(f"Organization {org_code} not found")
+    started = time.monotonic()
+    plan = run_mrp(org.id, period_days=period_days, horizon_days=horizon_days)
+    elapsed = time.monotonic() - started
+    for order in plan["planned_orders"][:show]:
+        click.echo(f"  plan  {order['sku_code']}: {order['quantity']} due {order['due_date']}")
+    for exc in plan["exceptions"][:show]:
+        click.echo(f"  SHORT {exc['sku_code']}: {exc['quantity']} needed now ({len(exc['task_ids'])} tasks)")
+    click.echo(
+        f"{plan['skus']} SKUs, {plan['demand_rows']} demand rows over {len(plan['periods'])} periods: "
+        f"{len(plan['planned_orders'])} planned orders, {len(plan['exceptions'])} shortages, "
+        f"{plan['beyond_horizon']} beyond the horizon ({elapsed:.2f}s)"
+    )
+
+
+@partitions_cli.command("maintain")
+def partitions_maintain_command():
+    """Create upcoming monthly partitions and detach those past retention."""
+    from app.utils.partitions import maintain_all
+
+    for table, result in maintain_all().items():
+        click.echo(
+            f"{table}: created {', '.join(result['created']) or 'none'}; "
+            f"detached {', '.join(result['detached']) or 'none'}"
+        )
+
+
+@partitions_cli.command("list")
+def partitions_list_command():
+    """Show the attached monthly partitions and their row estimates."""
+    from app.extensions import db
+    from app.utils.partitions import PARTITIONED_TABLES, is_partitioned, list_partitions
+
+    with db.engine.connect() as conn:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(conn, table):
+                click.echo(f"{table}: not partitioned")
+                continue
+            for month, name in sorted(list_partitions(conn, table).items()):
+                rows = conn.exec_driver_sql(f"SELECT reltuples::bigint FROM pg_class WHERE relname = '{name}'").scalar()
+                click.echo(f"{name}  {month:%Y-%m}  ~{max(rows, 0):,} rows")
+
+
+@bench_cli.command("uuid-keys")
+@click.option("--rows", type=int, default=1_000_000, help="Rows inserted per key version.")
+@click.option("--batch-size", type=int, default=10_000, help="Rows per COPY batch.")
+def bench_uuid_keys_command(rows, batch_size):
+    """Insert throughput and primary-key index size with UUIDv4 vs UUIDv7 keys.
+
+    Each version fills its own temporary table shaped like a large tenant table
+    (uuid primary key, organization_id, a few payload columns) with COPY, then
+    reports rows/s overall and for the last tenth of the load (when the index
+    no longer fits in cache) plus the primary-key index size.
+    """
+    from app.extensions import db
+    from app.models.base import UUID_FACTORIES
+    from app.utils.db_utils import IterStream
+
+    if db.engine.dialect.name != "postgresql":
+        raise click.ClickException("The benchmark needs PostgreSQL")
+    org_id = str(UUID_FACTORIES[4]())
+    with db.engine.connect() as conn:
+        for version, factory in sorted(UUID_FACTORIES.items()):
+            table = f"bench_uuid_v{version}"
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {table}")
+            conn.exec_driver_sql(
+                f"CREATE TEMPORARY TABLE {table} (id uuid PRIMARY KEY, organization_id uuid NOT NULL, "
+                "hours numeric(6,2), note text, created_at timestamptz NOT NULL DEFAULT now())"
+            )
+            conn.commit()
+            cursor = conn.connection.dbapi_connection.cursor()
+            started = time.monotonic()
+            tail_started, tail_from = None, rows - rows // 10
+            for start in range(0, rows, batch_size):
+                if tail_started is None and start >= tail_from:
+                    tail_started, tail_from = time.monotonic(), start
+                count = min(batch_size, rows - start)
+                lines = (f"{factory()}\t{org_id}\t7.50\tbenchmark row\n".encode() for _ in range(count))
+                cursor.copy_expert(f"COPY {table} (id, organization_id, hours, note) FROM STDIN", IterStream(lines))
+                conn.commit()
+            finished = time.monotonic()
+            cursor.close()
+            index_bytes = conn.exec_driver_sql(f"SELECT pg_relation_size('{table}_pkey')").scalar()
+            table_bytes = conn.exec_driver_sql(f"SELECT pg_relation_size('{table}')").scalar()
+            tail_rate = (rows - tail_from) / max(finished - (tail_started or started), 1e-6)
+            click.echo(
+                f"UUIDv{version}: {rows / max(finished - started, 1e-6):,.0f} rows/s "
+                f"(last 10%: {tail_rate:,.0f} rows/s), "
+                f"pkey index {index_bytes / 2**20:,.1f} MiB, table {table_bytes / 2**20:,.1f} MiB"
+            )
+            conn.exec_driver_sql(f"DROP TABLE {table}")
+            conn.commit()
+
+
+@bench_cli.command("timesheet-ranges")
+@click.option("--history", default="12,36,72,120", help="Comma-separated months of history to measure at.")
+@click.option("--rows-per-month", type=int, default=50_000)
+@click.option("--repeat", type=int, default=20, help="Query runs per measurement (median is reported).")
+def bench_timesheet_ranges_command(history, rows_per_month, repeat):
+    """One-month timesheet range query latency, monthly-partitioned vs a single table, as history grows.
+
+    Both layouts get the same rows in temporary tables (with an
+    (organization_id, work_date) index); history is added month by month going
+    back in time, and at each checkpoint the payroll-style query (approved
+    hours per employee for the latest month) is timed on both.
+    """
+    import statistics
+    from datetime import date
+
+    from app.extensions import db
+    from app.utils.partitions import add_months, month_start
+
+    if db.engine.dialect.name != "postgresql":
+        raise click.ClickException("The benchmark needs PostgreSQL")
+    checkpoints = sorted({int(m) for m in history.split(",") if m.strip()})
+    columns = "id uuid NOT NULL, organization_id uuid NOT NULL, employee_id uuid NOT NULL, " \
+              "work_date date NOT NULL, hours numeric(6,2) NOT NULL, status varchar(32) NOT NULL"
+    latest = month_start(date.today())
+    query = (
+        "SELECT employee_id, sum(hours) FROM {table} WHERE organization_id = %(org)s "
+        "AND work_date >= %(lower)s AND work_date < %(upper)s AND status = 'approved' GROUP BY employee_id"
+    )
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS bench_ts_part, bench_ts_flat")
+        conn.exec_driver_sql(f"CREATE TEMPORARY TABLE bench_ts_part ({columns}) PARTITION BY RANGE (work_date)")
+        conn.exec_driver_sql(f"CREATE TEMPORARY TABLE bench_ts_flat ({columns})")
+        for table in ("bench_ts_part", "bench_ts_flat"):
+            conn.exec_driver_sql(f"CREATE INDEX ON {table} (organization_id, work_date)")
+        org = conn.exec_driver_sql("SELECT gen_random_uuid()").scalar()
+        conn.commit()
+
+        def timed(table):
+            runs = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.exec_driver_sql(query.format(table=table), {
+                    "org": org, "lower": latest, "upper": add_months(latest, 1),
+                }).all()
+                runs.append((time.perf_counter() - started) * 1000)
+            return statistics.median(runs)
+
+        click.echo(f"{'months':>7} {'rows':>12} {'partitioned ms':>15} {'single table ms':>16}")
+        loaded = 0
+        for checkpoint in checkpoints:
+            while loaded < checkpoint:
+                month = add_months(latest, -loaded)
+                upper = add_months(month, 1)
+                conn.exec_driver_sql(
+                    f"CREATE TEMPORARY TABLE bench_ts_part_{loaded} PARTITION OF bench_ts_part "
+                    f"FOR VALUES FROM ('{month}') TO ('{upper}')"
+                )
+                for table in ("bench_ts_part", "bench_ts_flat"):
+                    # 50 organizations share the table; ours is one of them.
+                    conn.exec_driver_sql(
+                        f"INSERT INTO {table} SELECT gen_random_uuid(), "
+                        "CASE WHEN i %% 50 = 0 THEN %(org)s::uuid ELSE md5((i %% 50)::text)::uuid END, "
+                        "md5((i %% 500)::text)::uuid, %(month)s::date + (i %% (%(upper)s::date - %(month)s::date)), "
+                        "8, CASE WHEN i %% 4 = 0 THEN 'draft' ELSE 'approved' END "
+                        "FROM generate_series(1, %(rows)s) AS i",
+                        {"org": org, "month": month, "upper": upper, "rows": rows_per_month},
+                    )
+                conn.commit()
+                loaded += 1
+            conn.exec_driver_sql("ANALYZE bench_ts_part")
+            conn.exec_driver_sql("ANALYZE bench_ts_flat")
+            conn.commit()
+            click.echo(
+                f"{checkpoint:>7} {checkpoint * rows_per_month:>12,} "
+                f"{timed('bench_ts_part'):>15.2f} {timed('bench_ts_flat'):>16.2f}"
+            )
+        conn.exec_driver_sql("DROP TABLE bench_ts_part, bench_ts_flat")
+        conn.commit()
+
+
+@bench_cli.command("stock-concurrency")
+@click.option("--org", "org_code", required=True, help="Organization to run in (a scratch warehouse and SKU are created and removed).")
+@click.option("--workers", type=int, default=8, help="Parallel writer threads.")
+@click.option("--ops", type=int, default=200, help="Movements posted by each writer.")
+def bench_stock_concurrency_command(org_code, workers, ops):
+    """Stress the stock ledger with parallel writers and check that no update is lost.
+
+    Every writer posts --ops movements (+3 receipts and -1 issues, in
+    separate transactions) against the same warehouse and SKU. At the end the
+    stock level must equal both the expected total and the ledger sum.
+    """
+    import threading
+    from decimal import Decimal
+
+    from app.extensions import db
+    from app.models import Organization, Sku, StockLevel, StockMovement, Warehouse
+    from app.services.stock import movement, post_movements
+
+    org = Organization.query.filter_by(code=org_code.strip().upper()).first()
+    if not org:
+        raise click.ClickException(f"Organization {org_code} not found")
+    tag = f"BENCH-{int(time.time())}"
+    warehouse = Warehouse(organization_id=org.id, name=tag, code=tag)
+    sku = Sku(organization_id=org.id, name=tag, code=tag)
+    db.session.add_all([warehouse, sku])
+    db.session.commit()
+    warehouse_id, sku_id, org_id = warehouse.id, sku.id, org.id
+    app = current_app._get_current_object()
+    errors = []
+
+    def writer(n):
+        with app.app_context():
+            try:
+                for i in range(ops):
+                    delta = 3 if (i + n) % 2 == 0 else -1
+                    post_movements(org_id, [movement(warehouse_id, sku_id, "receipt" if delta > 0 else "issue", delta)])
+                    db.session.commit()
+            except Exception as exc:  # reported below
+                db.session.rollback()
+                errors.append(repr(exc))
+
+    expected = sum(3 if (i + n) % 2 == 0 else -1 for n in range(workers) for i in range(ops))
+    started = time.monotonic()
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+    level = db.session.scalar(
+        db.select(StockLevel.quantity).filter_by(warehouse_id=warehouse_id, sku_id=sku_id)
+    ) or Decimal(0)
+    ledger = db.session.scalar(
+        db.select(db.func.sum(StockMovement.quantity_delta)).filter_by(warehouse_id=warehouse_id, sku_id=sku_id)
+    ) or Decimal(0)
+    db.session.delete(db.session.get(Sku, sku_id))
+    db.session.delete(db.session.get(Warehouse, warehouse_id))
+    db.session.commit()
+    click.echo(
+        f"{workers * ops} movements by {workers} writers in {elapsed:.1f}s "
+        f"({workers * ops / max(elapsed, 1e-6):,.0f}/s); expected {expected}, level {level}, ledger {ledger}"
+    )
+    for error in errors[:10]:
+        click.echo(f"  writer error: {error}")
+    if errors or level != expected or ledger != expected:
+        raise click.ClickException("Lost or failed updates detected")
+    click.echo("No lost updates")
+
+
+@bench_cli.command("reservations")
+@click.option("--org", "org_code", required=True, help="Organization to run in (a scratch project, warehouse and SKU are created and removed).")
+@click.option("--workers", type=int, default=8, help="Parallel threads reserving.")
+@click.option("--stock", type=int, default=100, help="Units on hand to compete for.")
+@click.option("--attempts", type=int, default=50, help="Reservations of 1-3 units tried by each thread.")
+def bench_reservations_command(org_code, workers, stock, attempts):
+    """Race parallel requisition reservations for the same stock and check nothing is over-allocated.
+
+    Together the threads ask for far more than --stock. Each reservation is its
+    own transaction and either fits or is refused. At the end the reserved
+    quantity must equal the sum of the accepted requisitions and must not exceed
+    the stock on hand.
+    """
+    import threading
+    from decimal import Decimal
+
+    from app.extensions import db
+    from app.models import Organization, Project, ProjectRequisition, Sku, StockLevel, Warehouse
+    from app.services.requisitions import create_requisitions
+    from app.services.stock import InsufficientStock, movement, post_movements
+
+    org = Organization.query.filter_by(code=org_code.strip().upper()).first()
+    if not org:
+        raise click.ClickException(f"Organization {org_code} not found")
+    tag = f"BENCH-{int(time.time())}"
+    warehouse = Warehouse(organization_id=org.id, name=tag, code=tag)
+    sku = Sku(organization_id=org.id, name=tag, code=tag)
+    project = Project(organization_id=org.id, name=tag, code=tag)
+    db.session.add_all([warehouse, sku, project])
+    db.session.flush()
+    post_movements(org.id, [movement(warehouse.id, sku.id, "receipt", stock)])
+    db.session.commit()
+    warehouse_id, sku_id, project_id, org_id = warehouse.id, sku.id, project.id, org.id
+    app = current_app._get_current_object()
+    accepted, refused, errors = [], [0], []
+    lock = threading.Lock()
+
+    def reserver(n):
+        with app.app_context():
+            for i in range(attempts):
+                quantity = Decimal(1 + (n + i) % 3)
+                try:
+                    create_requisitions(org_id, project_id, warehouse_id, [(sku_id, quantity)])
+                    db.session.commit()
+                    with lock:
+                        accepted.append(quantity)
+                except InsufficientStock:
+                    db.session.rollback()
+                    with lock:
+                        refused[0] += 1
+                except Exception as exc:  # reported below
+                    db.session.rollback()
+                    errors.append(repr(exc))
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=reserver, args=(n,)) for n in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+    level = db.session.execute(
+        db.select(StockLevel.quantity, StockLevel.reserved_quantity).filter_by(warehouse_id=warehouse_id, sku_id=sku_id)
+    ).one()
+    requisitioned = db.session.scalar(
+        db.select(db.func.sum(ProjectRequisition.quantity_reserved)).filter_by(project_id=project_id)
+    ) or Decimal(0)
+    ProjectRequisition.query.filter_by(project_id=project_id).delete()
+    db.session.delete(db.session.get(Project, project_id))
+    db.session.delete(db.session.get(Sku, sku_id))
+    db.session.delete(db.session.get(Warehouse, warehouse_id))
+    db.session.commit()
+    click.echo(
+        f"{workers * attempts} reservations by {workers} threads in {elapsed:.1f}s: {len(accepted)} accepted, "
+        f"{refused[0]} refused; on hand {level.quantity}, reserved {level.reserved_quantity}, "
+        f"requisitioned {requisitioned}, accepted total {sum(accepted, Decimal(0))}"
+    )
+    for error in errors[:10]:
+        click.echo(f"  error: {error}")
+    if errors or level.reserved_quantity > level.quantity or not (
+        level.reserved_quantity == requisitioned == sum(accepted, Decimal(0))
+    ):
+        raise click.ClickException("Over-allocation or lost reservation detected")
+    click.echo("No over-allocation")
+
+
+def register_cli(app):
+    """Attach all command groups to the app."""
+    app.cli.add_command(sync_cli)
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(admission_cli)
+    app.cli.add_command(idempotency_cli)
+    app.cli.add_command(data_cli)
+    app.cli.add_command(tenant_cli)
+    app.cli.add_command(stock_cli)
+    app.cli.add_command(partitions_cli)
+    app.cli.add_command(bench_cli)
@@ -21,6 +21,87 @@ class Config:
     GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID") or ""
     GOOGLE_CLIENT_SECRET = os.environ.get("GOOGLE_CLIENT_SECRET") or ""
     FRONTEND_URL = os.environ.get("FRONTEND_URL") or "http://localhost:5173"  # used to validate redirect_uri
+    # Cache invalidation bus: "postgres" (LISTEN/NOTIFY) or "memory"; empty = pick from the database URL
+    INVALIDATION_BACKEND = os.environ.get("INVALIDATION_BACKEND") or ""
+    INVALIDATION_CHANNEL = os.environ.get("INVALIDATION_CHANNEL") or "erp_invalidation"
+    # Delta sync (?updated_since=): cursor overlap (keep above the longest write transaction) and how long
+    # deletions stay visible
+    DELTA_SYNC_OVERLAP_SECONDS = int(os.environ.get("DELTA_SYNC_OVERLAP_SECONDS", 5))
+    DELTA_SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get("DELTA_SYNC_TOMBSTONE_RETENTION_DAYS", 30))
+    # Transactional outbox worker (flask outbox work)
+    OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 100))
+    OUTBOX_POLL_INTERVAL = float(os.environ.get("OUTBOX_POLL_INTERVAL", 1.0))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 10))
+    # Background jobs (flask jobs work)
+    JOB_ORG_CONCURRENCY = int(os.environ.get("JOB_ORG_CONCURRENCY", 2))  # running jobs per organization
+    JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 1.0))
+    JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+    JOB_STALE_SECONDS = int(os.environ.get("JOB_STALE_SECONDS", 600))  # no heartbeat for this long = worker died
+    JOB_HEARTBEAT_SECONDS = int(os.environ.get("JOB_HEARTBEAT_SECONDS", 60))  # keep well below JOB_STALE_SECONDS
+    # Monthly partitions (timesheets): job workers create the next months and detach expired ones
+    PARTITION_MONTHS_AHEAD = int(os.environ.get("PARTITION_MONTHS_AHEAD", 3))
+    PARTITION_MAINTENANCE_INTERVAL = int(os.environ.get("PARTITION_MAINTENANCE_INTERVAL", 3600))  # seconds
+    TIMESHEET_RETENTION_MONTHS = int(os.environ.get("TIMESHEET_RETENTION_MONTHS", 0))  # 0 = keep all attached
+    # MRP runs (inventory.mrp job, flask stock mrp): planning bucket size and how far ahead to plan, in days
+    MRP_PERIOD_DAYS = int(os.environ.get("MRP_PERIOD_DAYS", 7))
+    MRP_HORIZON_DAYS = int(os.environ.get("MRP_HORIZON_DAYS", 182))
+    # Stock checkpoints for as-of queries, taken by job workers: "daily", "monthly" or "off"
+    STOCK_CHECKPOINT_PERIOD = os.environ.get("STOCK_CHECKPOINT_PERIOD") or "daily"
+    # How long after midnight UTC a day's checkpoint may be taken; keep above the longest stock-writing transaction
+    STOCK_CHECKPOINT_DELAY_SECONDS = int(os.environ.get("STOCK_CHECKPOINT_DELAY_SECONDS", 3600))
+    # Admission control for heavy endpoints: "local" (per process), "database" (shared) or "module:Class"
+    ADMISSION_CONTROL_ENABLED = os.environ.get("ADMISSION_CONTROL_ENABLED", "1") not in ("0", "false")
+    ADMISSION_STORE = os.environ.get("ADMISSION_STORE") or "local"
+    ADMISSION_ORG_CAPACITY = int(os.environ.get("ADMISSION_ORG_CAPACITY", 8))  # weight units in flight per org
+    ADMISSION_CLASSES = {  # weight counts against ADMISSION_ORG_CAPACITY; limit = concurrent requests per org
+        "payroll": {"weight": 4, "limit": 1},
+        "report": {"weight": 2, "limit": 3},
+        "export": {"weight": 4, "limit": 2},
+        "import": {"weight": 4, "limit": 1},
+    }
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", 2.0))  # seconds to wait before 429
+    ADMISSION_RETRY_AFTER = int(os.environ.get("ADMISSION_RETRY_AFTER", 5))
+    ADMISSION_LEASE_SECONDS = int(os.environ.get("ADMISSION_LEASE_SECONDS", 300))
+    # statement_timeout (ms) per endpoint timeout class; 0 disables. Timed-out requests get 503.
+    STATEMENT_TIMEOUTS = {
+        "interactive": int(os.environ.get("STATEMENT_TIMEOUT_INTERACTIVE_MS", 5000)),
+        "report": int(os.environ.get("STATEMENT_TIMEOUT_REPORT_MS", 30000)),
+        "export": int(os.environ.get("STATEMENT_TIMEOUT_EXPORT_MS", 300000)),
+        "import": int(os.environ.get("STATEMENT_TIMEOUT_IMPORT_MS", 300000)),
+    }
+    STATEMENT_TIMEOUT_RETRY_AFTER = int(os.environ.get("STATEMENT_TIMEOUT_RETRY_AFTER", 10))
+    # Generated document numbers: str.format templates with {n} (sequence value), {year} and per-call fields
+    DOCUMENT_NUMBER_FORMATS = {
+        "customer": "CUST-{n:04d}",
+        "lead_customer": "{prefix}{n:04d}",  # customer created by lead conversion; shares the customer sequence
+        "employee": "EMP-{n:04d}",
+        "invoice": "INV-{n:05d}",
+        "project": "PRJ-{n:04d}",
+        "purchase_order": "PO-{n:05d}",
+        "sku": "SKU-{n:04d}",
+        "warehouse": "WH-{n:04d}",
+    }
+    # >1: each process reserves this many numbers at a time (fewer row locks, but numbers may skip and interleave)
+    DOCUMENT_NUMBER_BLOCK_SIZE = int(os.environ.get("DOCUMENT_NUMBER_BLOCK_SIZE", 1))
+    # Idempotency-Key on create endpoints: how long responses are replayed, and how long a retry
+    # waits for the original request to finish before getting 409
+    IDEMPOTENCY_KEY_TTL_HOURS = int(os.environ.get("IDEMPOTENCY_KEY_TTL_HOURS", 24))
+    IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", 5.0))
+    # A pending key older than this (seconds; keep above the longest request) is taken over by the next retry
+    IDEMPOTENCY_PENDING_TIMEOUT_SECONDS = int(os.environ.get("IDEMPOTENCY_PENDING_TIMEOUT_SECONDS", 600))
+    # Reject PUTs on versioned records that do not send If-Match (428) instead of allowing blind overwrites
+    REQUIRE_IF_MATCH = os.environ.get("REQUIRE_IF_MATCH", "0") in ("1", "true")
+    # Bulk import (POST /api/imports/<entity>, flask data import): rows validated and written per chunk
+    IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", 5000))
+    # Streaming exports (.../export): rows fetched per server-side cursor round trip
+    EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 2000))
+    # Primary keys for new rows: 7 = time-ordered UUIDv7 (index-friendly), 4 = random UUIDv4.
+    # Both fit the same uuid columns, so switching needs no migration.
+    UUID_VERSION = int(os.environ.get("UUID_VERSION", 7))
+    # Tenant backups written by the tenant.backup job; empty = <instance folder>/backups
+    TENANT_BACKUP_DIR = os.environ.get("TENANT_BACKUP_DIR") or ""
+    # Rows deleted per transaction when an organization is offboarded
+    TENANT_DELETE_CHUNK_SIZE = int(os.environ.get("TENANT_DELETE_CHUNK_SIZE", 5000))
 
 
 class DevelopmentConfig(Config):
@@ -42,6 +123,7 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.environ.get("TEST_DATABASE_URL") or "sqlite:///:memory:"
     JWT_ACCESS_TOKEN_EXPIRES = 300
+    INVALIDATION_BACKEND = "memory"
 
 
 config_by_name = {
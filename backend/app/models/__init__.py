@@ -1,17 +1,21 @@
 """Import all models so they are registered with SQLAlchemy. Order matters for FKs."""
-from app.models.base import TimestampMixin, generate_uuid
-from app.models.organization import Organization
+from app.models.base import TimestampMixin, VersionMixin, generate_uuid
+from app.models.organization import Organization, OrganizationSequence
 from app.models.user import User, Role, Permission, RolePermission, UserRole
 from app.models.hrm import Employee, EmployeeAvailability, PayrollRun, PayrollItem
 from app.models.crm import Customer, CustomerContact
 from app.models.project import Project, Milestone, Task, TaskAssignment, TaskMaterial, Timesheet
-from app.models.inventory import Warehouse, Sku, StockLevel, PurchaseOrder, PurchaseOrderLine, ProjectRequisition
+from app.models.inventory import Warehouse, Sku, StockLevel, StockMovement, StockValuation, StockCheckpoint, StockCheckpointLevel, PurchaseOrder, PurchaseOrderLine, ProjectRequisition
 from app.models.crm import Lead, Invoice  # after Project (Lead/Invoice reference Project)
+from app.models.sync import DeletedRecord
+from app.models.system import OutboxEvent, Job, AdmissionLease, IdempotencyKey
 
 __all__ = [
     "TimestampMixin",
+    "VersionMixin",
     "generate_uuid",
     "Organization",
+    "OrganizationSequence",
     "User",
     "Role",
     "Permission",
@@ -28,6 +32,10 @@ __all__ = [
     "Warehouse",
     "Sku",
     "StockLevel",
+    "StockMovement",
+    "StockValuation",
+    "StockCheckpoint",
+    "StockCheckpointLevel",
     "PurchaseOrder",
     "PurchaseOrderLine",
     "ProjectRequisition",
@@ -37,4 +45,9 @@ __all__ = [
     "TaskAssignment",
     "TaskMaterial",
     "Timesheet",
+    "DeletedRecord",
+    "OutboxEvent",
+    "Job",
+    "AdmissionLease",
+    "IdempotencyKey",
 ]
@@ -1,10 +1,12 @@
 """Base mixins for all models."""
+import os
+import time
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, func
+from sqlalchemy import Column, DateTime, Integer, func
 from sqlalchemy.dialects.postgresql import UUID, JSON
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.orm import DeclarativeBase, Mapped, declared_attr, mapped_column
 from sqlalchemy.types import TypeDecorator, CHAR
 
 
@@ -39,5 +41,36 @@ class TimestampMixin:
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
+class VersionMixin:
+    """Row version for optimistic concurrency: SQLAlchemy bumps it on every ORM update and
+    raises StaleDataError if the row changed since it was loaded. Exposed to clients as the ETag."""
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
+    @declared_attr.directive
+    def __mapper_args__(cls):
+        return {"version_id_col": cls.version}
+
+
+def uuid7():
+    """Time-ordered UUID (RFC 9562 version 7): 48-bit Unix milliseconds, then the sub-millisecond
+    fraction in rand_a, then 62 random bits. Keys created close in time land on the same index pages."""
+    ns = time.time_ns()
+    ms, sub_ms = divmod(ns, 1_000_000)
+    rand_a = sub_ms * 4096 // 1_000_000
+    rand_b = int.from_bytes(os.urandom(8), "big") & 0x3FFF_FFFF_FFFF_FFFF
+    value = (ms & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | rand_a << 64 | 0b10 << 62 | rand_b
+    return uuid.UUID(int=value)
+
+
+UUID_FACTORIES = {4: uuid.uuid4, 7: uuid7}
+_uuid_factory = uuid7
+
+
+def set_uuid_version(version):
+    """Choose the UUID version generate_uuid() hands out (UUID_VERSION setting: 4 or 7)."""
+    global _uuid_factory
+    _uuid_factory = UUID_FACTORIES[int(version)]
+
+
 def generate_uuid():
-    return str(uuid.uuid4())
+    return str(_uuid_factory())
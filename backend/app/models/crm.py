@@ -7,10 +7,10 @@ from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.extensions import db
-from app.models.base import TimestampMixin, generate_uuid
+from app.models.base import TimestampMixin, VersionMixin, generate_uuid
 
 
-class Lead(db.Model, TimestampMixin):
+class Lead(db.Model, TimestampMixin, VersionMixin):
     __tablename__ = "leads"
 
     id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
@@ -39,6 +39,8 @@ class Lead(db.Model, TimestampMixin):
     converted_customer = relationship("Customer", foreign_keys=[converted_customer_id])
     converted_project = relationship("Project", foreign_keys=[converted_project_id])
 
+    __table_args__ = (db.Index("ix_leads_org_updated_at", "organization_id", "updated_at"),)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -53,12 +55,13 @@ class Lead(db.Model, TimestampMixin):
             "value": float(self.value) if self.value is not None else 0,
             "converted_customer_id": self.converted_customer_id,
             "converted_project_id": self.converted_project_id,
+            "version": self.version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
 
-class Customer(db.Model, TimestampMixin):
+class Customer(db.Model, TimestampMixin, VersionMixin):
     __tablename__ = "customers"
 
     id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
@@ -75,11 +78,14 @@ class Customer(db.Model, TimestampMixin):
     )
 
     organization = relationship("Organization", back_populates="customers")
-    contacts = relationship("CustomerContact", back_populates="customer", cascade="all, delete-orphan")
+    contacts = relationship("CustomerContact", back_populates="customer", cascade="all, delete-orphan", passive_deletes=True)
     projects = relationship("Project", back_populates="customer", lazy="dynamic")
     invoices = relationship("Invoice", back_populates="customer", lazy="dynamic")
 
-    __table_args__ = (db.UniqueConstraint("organization_id", "code", name="uq_customer_org_code"),)
+    __table_args__ = (
+        db.UniqueConstraint("organization_id", "code", name="uq_customer_org_code"),
+        db.Index("ix_customers_org_updated_at", "organization_id", "updated_at"),
+    )
 
     def to_dict(self):
         return {
@@ -91,6 +97,7 @@ class Customer(db.Model, TimestampMixin):
             "billing_address": self.billing_address,
             "shipping_address": self.shipping_address,
             "source_lead_id": self.source_lead_id,
+            "version": self.version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -125,7 +132,7 @@ class CustomerContact(db.Model, TimestampMixin):
         }
 
 
-class Invoice(db.Model, TimestampMixin):
+class Invoice(db.Model, TimestampMixin, VersionMixin):
     __tablename__ = "invoices"
 
     id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
@@ -148,7 +155,10 @@ class Invoice(db.Model, TimestampMixin):
     customer = relationship("Customer", back_populates="invoices")
     project = relationship("Project", back_populates="invoices")
 
-    __table_args__ = (db.UniqueConstraint("organization_id", "number", name="uq_invoice_org_number"),)
+    __table_args__ = (
+        db.UniqueConstraint("organization_id", "number", name="uq_invoice_org_number"),
+        db.Index("ix_invoices_org_updated_at", "organization_id", "updated_at"),
+    )
 
     def to_dict(self):
         return {
@@ -161,6 +171,7 @@ class Invoice(db.Model, TimestampMixin):
             "amount": float(self.amount) if self.amount is not None else 0,
             "due_date": self.due_date.isoformat() if self.due_date else None,
             "paid_at": self.paid_at.isoformat() if self.paid_at else None,
+            "version": self.version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -7,10 +7,10 @@ from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.extensions import db
-from app.models.base import TimestampMixin, generate_uuid
+from app.models.base import TimestampMixin, VersionMixin, generate_uuid
 
 
-class Employee(db.Model, TimestampMixin):
+class Employee(db.Model, TimestampMixin, VersionMixin):
     __tablename__ = "employees"
 
     id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
@@ -31,12 +31,15 @@ class Employee(db.Model, TimestampMixin):
 
     organization = relationship("Organization", back_populates="employees")
     user = relationship("User", back_populates="employee")
-    availability = relationship("EmployeeAvailability", back_populates="employee", cascade="all, delete-orphan")
-    payroll_items = relationship("PayrollItem", back_populates="employee", lazy="dynamic")
-    task_assignments = relationship("TaskAssignment", back_populates="employee", lazy="dynamic")
-    timesheets = relationship("Timesheet", back_populates="employee", lazy="dynamic")
-
-    __table_args__ = (db.UniqueConstraint("organization_id", "employee_code", name="uq_employee_org_code"),)
+    availability = relationship("EmployeeAvailability", back_populates="employee", cascade="all, delete-orphan", passive_deletes=True)
+    payroll_items = relationship("PayrollItem", back_populates="employee", lazy="dynamic", passive_deletes=True)
+    task_assignments = relationship("TaskAssignment", back_populates="employee", lazy="dynamic", passive_deletes=True)
+    timesheets = relationship("Timesheet", back_populates="employee", lazy="dynamic", passive_deletes=True)
+
+    __table_args__ = (
+        db.UniqueConstraint("organization_id", "employee_code", name="uq_employee_org_code"),
+        db.Index("ix_employees_org_updated_at", "organization_id", "updated_at"),
+    )
 
     def to_dict(self):
         return {
@@ -51,6 +54,7 @@ class Employee(db.Model, TimestampMixin):
             "hire_date": self.hire_date.isoformat() if self.hire_date else None,
             "termination_date": self.termination_date.isoformat() if self.termination_date else None,
             "is_active": self.is_active,
+            "version": self.version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -93,10 +97,12 @@ class PayrollRun(db.Model, TimestampMixin):
     period: Mapped[str] = mapped_column(String(32), nullable=False)  # e.g. "2025-02"
     period_start: Mapped[date] = mapped_column(Date, nullable=False)
     period_end: Mapped[date] = mapped_column(Date, nullable=False)
-    status: Mapped[str] = mapped_column(String(32), default="draft")  # draft, calculated, approved, paid
+    status: Mapped[str] = mapped_column(String(32), default="draft")  # processing, failed, draft, calculated, approved, paid
 
     organization = relationship("Organization", back_populates="payroll_runs")
-    items = relationship("PayrollItem", back_populates="payroll_run", cascade="all, delete-orphan")
+    items = relationship("PayrollItem", back_populates="payroll_run", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (db.Index("ix_payroll_runs_org_updated_at", "organization_id", "updated_at"),)
 
     def to_dict(self):
         return {
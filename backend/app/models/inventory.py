@@ -1,16 +1,17 @@
-"""Inventory models: Warehouse, Sku, StockLevel, PurchaseOrder, PurchaseOrderLine, ProjectRequisition."""
-from datetime import date
+"""Inventory models: Warehouse, Sku, StockLevel, StockMovement, StockValuation, StockCheckpoint, StockCheckpointLevel,
+PurchaseOrder, PurchaseOrderLine, ProjectRequisition."""
+from datetime import date, datetime
 from decimal import Decimal
 
-from sqlalchemy import String, ForeignKey, Numeric, Date, Boolean, Text, Integer
+from sqlalchemy import BigInteger, String, ForeignKey, Numeric, Date, DateTime, Boolean, Text, Integer, func, text
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.extensions import db
-from app.models.base import TimestampMixin, generate_uuid
+from app.models.base import TimestampMixin, VersionMixin, generate_uuid
 
 
-class Warehouse(db.Model, TimestampMixin):
+class Warehouse(db.Model, TimestampMixin, VersionMixin):
     __tablename__ = "warehouses"
 
     id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
@@ -23,11 +24,14 @@ class Warehouse(db.Model, TimestampMixin):
     is_default: Mapped[bool] = mapped_column(Boolean, default=False)
 
     organization = relationship("Organization", back_populates="warehouses")
-    stock_levels = relationship("StockLevel", back_populates="warehouse", cascade="all, delete-orphan")
+    stock_levels = relationship("StockLevel", back_populates="warehouse", cascade="all, delete-orphan", passive_deletes=True)
     purchase_orders = relationship("PurchaseOrder", back_populates="warehouse", lazy="dynamic")
     project_requisitions = relationship("ProjectRequisition", back_populates="warehouse", lazy="dynamic")
 
-    __table_args__ = (db.UniqueConstraint("organization_id", "code", name="uq_warehouse_org_code"),)
+    __table_args__ = (
+        db.UniqueConstraint("organization_id", "code", name="uq_warehouse_org_code"),
+        db.Index("ix_warehouses_org_updated_at", "organization_id", "updated_at"),
+    )
 
     def to_dict(self):
         return {
@@ -37,12 +41,13 @@ class Warehouse(db.Model, TimestampMixin):
             "code": self.code,
             "address": self.address,
             "is_default": self.is_default,
+            "version": self.version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
 
-class Sku(db.Model, TimestampMixin):
+class Sku(db.Model, TimestampMixin, VersionMixin):
     __tablename__ = "skus"
 
     id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
@@ -57,12 +62,17 @@ class Sku(db.Model, TimestampMixin):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
 
     organization = relationship("Organization", back_populates="skus")
-    stock_levels = relationship("StockLevel", back_populates="sku", cascade="all, delete-orphan")
-    purchase_order_lines = relationship("PurchaseOrderLine", back_populates="sku", lazy="dynamic")
-    project_requisitions = relationship("ProjectRequisition", back_populates="sku", lazy="dynamic")
-    task_materials = relationship("TaskMaterial", back_populates="sku", lazy="dynamic")
-
-    __table_args__ = (db.UniqueConstraint("organization_id", "code", name="uq_sku_org_code"),)
+    stock_levels = relationship("StockLevel", back_populates="sku", cascade="all, delete-orphan", passive_deletes=True)
+    purchase_order_lines = relationship("PurchaseOrderLine", back_populates="sku", lazy="dynamic", passive_deletes=True)
+    project_requisitions = relationship("ProjectRequisition", back_populates="sku", lazy="dynamic", passive_deletes=True)
+    task_materials = relationship("TaskMaterial", back_populates="sku", lazy="dynamic", passive_deletes=True)
+
+    __table_args__ = (
+        db.UniqueConstraint("organization_id", "code", name="uq_sku_org_code"),
+        db.Index("ix_skus_org_updated_at", "organization_id", "updated_at"),
+        # SKUs with a default reorder point, for the low-stock scan
+        db.Index("ix_skus_org_reorder_point", "organization_id", postgresql_where=text("reorder_point > 0")),
+    )
 
     def to_dict(self):
         return {
@@ -74,6 +84,7 @@ class Sku(db.Model, TimestampMixin):
             "reorder_point": float(self.reorder_point) if self.reorder_point is not None else 0,
             "reorder_quantity": float(self.reorder_quantity) if self.reorder_quantity is not None else 0,
             "is_active": self.is_active,
+            "version": self.version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -96,7 +107,15 @@ class StockLevel(db.Model, TimestampMixin):
     warehouse = relationship("Warehouse", back_populates="stock_levels")
     sku = relationship("Sku", back_populates="stock_levels")
 
-    __table_args__ = (db.UniqueConstraint("warehouse_id", "sku_id", name="uq_stock_warehouse_sku"),)
+    __table_args__ = (
+        db.UniqueConstraint("warehouse_id", "sku_id", name="uq_stock_warehouse_sku"),
+        db.Index("ix_stock_levels_warehouse_updated_at", "warehouse_id", "updated_at"),
+        # Levels with their own reorder point, keyed by how far available stock is above it (<= 0 is low)
+        db.Index(
+            "ix_stock_levels_below_reorder", "warehouse_id", text("(quantity - reserved_quantity - reorder_point)"),
+            postgresql_where=text("reorder_point > 0"),
+        ),
+    )
 
     @property
     def available_quantity(self):
@@ -116,7 +135,151 @@ class StockLevel(db.Model, TimestampMixin):
         }
 
 
-class PurchaseOrder(db.Model, TimestampMixin):
+class StockMovement(db.Model):
+    """One entry of the append-only stock ledger. StockLevel is the running sum of these per warehouse and SKU."""
+    __tablename__ = "stock_movements"
+
+    TYPES = ("receipt", "issue", "adjustment", "transfer", "reservation")
+
+    id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
+    organization_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False
+    )
+    warehouse_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("warehouses.id", ondelete="CASCADE"), nullable=False
+    )
+    sku_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("skus.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    movement_type: Mapped[str] = mapped_column(String(32), nullable=False)  # one of TYPES
+    quantity_delta: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)  # on hand
+    reserved_delta: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)  # reserved
+    reference_type: Mapped[str | None] = mapped_column(String(64), nullable=True)  # e.g. "purchase_order", "transfer"
+    reference_id: Mapped[str | None] = mapped_column(PG_UUID(as_uuid=False), nullable=True)
+    unit_cost: Mapped[Decimal | None] = mapped_column(Numeric(14, 4), nullable=True)  # inflows only; None = at average cost
+    # Transfers in: the exact value the sending leg gave up (unit_cost is that, per unit, for display)
+    transfer_value: Mapped[Decimal | None] = mapped_column(Numeric(18, 4), nullable=True)
+    # Position in the order movements were applied to their StockValuation row (see app.services.valuation)
+    valuation_seq: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    note: Mapped[str] = mapped_column(Text, default="")
+    created_by_user_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_stock_movements_warehouse_sku_created_at", "warehouse_id", "sku_id", "created_at"),
+        db.Index("ix_stock_movements_org_created_at", "organization_id", "created_at"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "organization_id": self.organization_id,
+            "warehouse_id": self.warehouse_id,
+            "sku_id": self.sku_id,
+            "movement_type": self.movement_type,
+            "quantity_delta": float(self.quantity_delta) if self.quantity_delta is not None else 0,
+            "reserved_delta": float(self.reserved_delta) if self.reserved_delta is not None else 0,
+            "reference_type": self.reference_type,
+            "reference_id": self.reference_id,
+            "unit_cost": float(self.unit_cost) if self.unit_cost is not None else None,
+            "transfer_value": float(self.transfer_value) if self.transfer_value is not None else None,
+            "note": self.note,
+            "created_by_user_id": self.created_by_user_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class StockValuation(db.Model, TimestampMixin):
+    """Weighted-average cost state per warehouse and SKU, updated with every stock movement."""
+    __tablename__ = "stock_valuations"
+
+    id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
+    warehouse_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("warehouses.id", ondelete="CASCADE"), nullable=False
+    )
+    sku_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("skus.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    quantity: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    total_value: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False, default=0)
+    last_unit_cost: Mapped[Decimal | None] = mapped_column(Numeric(14, 4), nullable=True)  # latest costed receipt
+    applied_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")  # movements applied so far
+    # Value change of the latest movement (what an outflow took out, at the average of the locked row)
+    last_value_delta: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False, default=0, server_default="0")
+
+    __table_args__ = (db.UniqueConstraint("warehouse_id", "sku_id", name="uq_stock_valuation_warehouse_sku"),)
+
+    @property
+    def average_cost(self):
+        return (self.total_value or 0) / self.quantity if self.quantity and self.quantity > 0 else Decimal(0)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "warehouse_id": self.warehouse_id,
+            "sku_id": self.sku_id,
+            "quantity": float(self.quantity) if self.quantity is not None else 0,
+            "total_value": float(self.total_value) if self.total_value is not None else 0,
+            "average_cost": float(self.average_cost),
+            "last_unit_cost": float(self.last_unit_cost) if self.last_unit_cost is not None else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+class StockCheckpoint(db.Model):
+    """Stock levels of an organization at the end of snapshot_date (UTC), for as-of queries."""
+    __tablename__ = "stock_checkpoints"
+
+    id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
+    organization_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False
+    )
+    snapshot_date: Mapped[date] = mapped_column(Date, nullable=False)
+    cutoff: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)  # movements created before it
+    level_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("organization_id", "snapshot_date", name="uq_stock_checkpoint_org_date"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "organization_id": self.organization_id,
+            "snapshot_date": self.snapshot_date.isoformat() if self.snapshot_date else None,
+            "cutoff": self.cutoff.isoformat() if self.cutoff else None,
+            "level_count": self.level_count,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class StockCheckpointLevel(db.Model):
+    """One non-zero stock level in a checkpoint."""
+    __tablename__ = "stock_checkpoint_levels"
+
+    id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
+    checkpoint_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("stock_checkpoints.id", ondelete="CASCADE"), nullable=False
+    )
+    warehouse_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("warehouses.id", ondelete="CASCADE"), nullable=False
+    )
+    sku_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("skus.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    quantity: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    reserved_quantity: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint("checkpoint_id", "warehouse_id", "sku_id", name="uq_stock_checkpoint_level"),
+    )
+
+
+class PurchaseOrder(db.Model, TimestampMixin, VersionMixin):
     __tablename__ = "purchase_orders"
 
     id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
@@ -127,7 +290,7 @@ class PurchaseOrder(db.Model, TimestampMixin):
         PG_UUID(as_uuid=False), ForeignKey("warehouses.id", ondelete="RESTRICT"), nullable=False, index=True
     )
     number: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
-    status: Mapped[str] = mapped_column(String(32), default="draft")  # draft, submitted, received, cancelled
+    status: Mapped[str] = mapped_column(String(32), default="draft")  # draft, submitted, partial, received, cancelled
     order_date: Mapped[date] = mapped_column(Date, nullable=True)
     expected_date: Mapped[date] = mapped_column(Date, nullable=True)
     created_by_user_id: Mapped[str] = mapped_column(
@@ -137,9 +300,12 @@ class PurchaseOrder(db.Model, TimestampMixin):
     organization = relationship("Organization", back_populates="purchase_orders")
     warehouse = relationship("Warehouse", back_populates="purchase_orders")
     created_by = relationship("User", foreign_keys=[created_by_user_id])
-    lines = relationship("PurchaseOrderLine", back_populates="purchase_order", cascade="all, delete-orphan")
+    lines = relationship("PurchaseOrderLine", back_populates="purchase_order", cascade="all, delete-orphan", passive_deletes=True)
 
-    __table_args__ = (db.UniqueConstraint("organization_id", "number", name="uq_po_org_number"),)
+    __table_args__ = (
+        db.UniqueConstraint("organization_id", "number", name="uq_po_org_number"),
+        db.Index("ix_purchase_orders_org_updated_at", "organization_id", "updated_at"),
+    )
 
     def to_dict(self):
         return {
@@ -151,6 +317,7 @@ class PurchaseOrder(db.Model, TimestampMixin):
             "order_date": self.order_date.isoformat() if self.order_date else None,
             "expected_date": self.expected_date.isoformat() if self.expected_date else None,
             "created_by_user_id": self.created_by_user_id,
+            "version": self.version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
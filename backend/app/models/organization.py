@@ -1,5 +1,5 @@
 """Organization and tenant model."""
-from sqlalchemy import String
+from sqlalchemy import BigInteger, ForeignKey, String
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -15,18 +15,18 @@ class Organization(db.Model, TimestampMixin):
     code: Mapped[str] = mapped_column(String(64), unique=True, nullable=False, index=True)
     timezone: Mapped[str] = mapped_column(String(64), default="UTC")
 
-    users = relationship("User", back_populates="organization", lazy="dynamic")
-    employees = relationship("Employee", back_populates="organization", lazy="dynamic")
-    customers = relationship("Customer", back_populates="organization", lazy="dynamic")
-    warehouses = relationship("Warehouse", back_populates="organization", lazy="dynamic")
-    roles = relationship("Role", back_populates="organization", lazy="dynamic")
-    leads = relationship("Lead", back_populates="organization", lazy="dynamic")
-    projects = relationship("Project", back_populates="organization", lazy="dynamic")
-    payroll_runs = relationship("PayrollRun", back_populates="organization", lazy="dynamic")
-    timesheets = relationship("Timesheet", back_populates="organization", lazy="dynamic")
-    skus = relationship("Sku", back_populates="organization", lazy="dynamic")
-    purchase_orders = relationship("PurchaseOrder", back_populates="organization", lazy="dynamic")
-    invoices = relationship("Invoice", back_populates="organization", lazy="dynamic")
+    users = relationship("User", back_populates="organization", lazy="dynamic", passive_deletes=True)
+    employees = relationship("Employee", back_populates="organization", lazy="dynamic", passive_deletes=True)
+    customers = relationship("Customer", back_populates="organization", lazy="dynamic", passive_deletes=True)
+    warehouses = relationship("Warehouse", back_populates="organization", lazy="dynamic", passive_deletes=True)
+    roles = relationship("Role", back_populates="organization", lazy="dynamic", passive_deletes=True)
+    leads = relationship("Lead", back_populates="organization", lazy="dynamic", passive_deletes=True)
+    projects = relationship("Project", back_populates="organization", lazy="dynamic", passive_deletes=True)
+    payroll_runs = relationship("PayrollRun", back_populates="organization", lazy="dynamic", passive_deletes=True)
+    timesheets = relationship("Timesheet", back_populates="organization", lazy="dynamic", passive_deletes=True)
+    skus = relationship("Sku", back_populates="organization", lazy="dynamic", passive_deletes=True)
+    purchase_orders = relationship("PurchaseOrder", back_populates="organization", lazy="dynamic", passive_deletes=True)
+    invoices = relationship("Invoice", back_populates="organization", lazy="dynamic", passive_deletes=True)
 
     def to_dict(self):
         return {
@@ -37,3 +37,14 @@ class Organization(db.Model, TimestampMixin):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
+
+
+class OrganizationSequence(db.Model):
+    """Last number handed out per organization and document type (see app.utils.sequences)."""
+    __tablename__ = "organization_sequences"
+
+    organization_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)  # e.g. "invoice", "customer"
+    last_value: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
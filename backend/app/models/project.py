@@ -7,10 +7,10 @@ from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.extensions import db
-from app.models.base import TimestampMixin, generate_uuid
+from app.models.base import TimestampMixin, VersionMixin, generate_uuid
 
 
-class Project(db.Model, TimestampMixin):
+class Project(db.Model, TimestampMixin, VersionMixin):
     __tablename__ = "projects"
 
     id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
@@ -36,11 +36,14 @@ class Project(db.Model, TimestampMixin):
     organization = relationship("Organization", back_populates="projects")
     customer = relationship("Customer", back_populates="projects")
     project_manager = relationship("Employee", foreign_keys=[project_manager_id])
-    milestones = relationship("Milestone", back_populates="project", cascade="all, delete-orphan", order_by="Milestone.sort_order")
-    project_requisitions = relationship("ProjectRequisition", back_populates="project", lazy="dynamic")
+    milestones = relationship("Milestone", back_populates="project", cascade="all, delete-orphan", order_by="Milestone.sort_order", passive_deletes=True)
+    project_requisitions = relationship("ProjectRequisition", back_populates="project", lazy="dynamic", passive_deletes=True)
     invoices = relationship("Invoice", back_populates="project", lazy="dynamic")
 
-    __table_args__ = (db.UniqueConstraint("organization_id", "code", name="uq_project_org_code"),)
+    __table_args__ = (
+        db.UniqueConstraint("organization_id", "code", name="uq_project_org_code"),
+        db.Index("ix_projects_org_updated_at", "organization_id", "updated_at"),
+    )
 
     def to_dict(self):
         return {
@@ -55,6 +58,7 @@ class Project(db.Model, TimestampMixin):
             "end_date": self.end_date.isoformat() if self.end_date else None,
             "project_manager_id": self.project_manager_id,
             "budget_hours": float(self.budget_hours) if self.budget_hours is not None else 0,
+            "version": self.version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -74,7 +78,7 @@ class Milestone(db.Model, TimestampMixin):
     sort_order: Mapped[int] = mapped_column(Integer, default=0)
 
     project = relationship("Project", back_populates="milestones")
-    tasks = relationship("Task", back_populates="milestone", cascade="all, delete-orphan", order_by="Task.sort_order")
+    tasks = relationship("Task", back_populates="milestone", cascade="all, delete-orphan", order_by="Task.sort_order", passive_deletes=True)
 
     def to_dict(self):
         return {
@@ -106,10 +110,10 @@ class Task(db.Model, TimestampMixin):
     estimated_hours: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=0)
 
     milestone = relationship("Milestone", back_populates="tasks")
-    task_assignments = relationship("TaskAssignment", back_populates="task", cascade="all, delete-orphan")
-    task_materials = relationship("TaskMaterial", back_populates="task", cascade="all, delete-orphan")
-    timesheets = relationship("Timesheet", back_populates="task", lazy="dynamic")
-    project_requisitions = relationship("ProjectRequisition", back_populates="task", lazy="dynamic")
+    task_assignments = relationship("TaskAssignment", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+    task_materials = relationship("TaskMaterial", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+    timesheets = relationship("Timesheet", back_populates="task", lazy="dynamic", passive_deletes=True)
+    project_requisitions = relationship("ProjectRequisition", back_populates="task", lazy="dynamic", passive_deletes=True)
 
     @property
     def project_id(self):
@@ -205,7 +209,8 @@ class Timesheet(db.Model, TimestampMixin):
     task_id: Mapped[str] = mapped_column(
         PG_UUID(as_uuid=False), ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True
     )
-    work_date: Mapped[date] = mapped_column(Date, nullable=False)
+    # Partition key (monthly ranges, see app.utils.partitions), so part of the table's primary key.
+    work_date: Mapped[date] = mapped_column(Date, primary_key=True)
     hours: Mapped[Decimal] = mapped_column(Numeric(6, 2), default=0)
     status: Mapped[str] = mapped_column(String(32), default="draft")  # draft, submitted, approved
     notes: Mapped[str] = mapped_column(Text, default="")
@@ -218,6 +223,14 @@ class Timesheet(db.Model, TimestampMixin):
     task = relationship("Task", back_populates="timesheets")
     approved_by = relationship("User", foreign_keys=[approved_by_user_id])
 
+    __table_args__ = (
+        db.Index("ix_timesheets_org_updated_at", "organization_id", "updated_at"),
+        db.Index("ix_timesheets_org_work_date", "organization_id", "work_date"),
+        {"postgresql_partition_by": "RANGE (work_date)"},
+    )
+    # Rows are still identified by id alone.
+    __mapper_args__ = {"primary_key": [id]}
+
     def to_dict(self):
         return {
             "id": self.id,
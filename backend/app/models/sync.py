@@ -0,0 +1,31 @@
+"""Delta-sync support: tombstones for deleted org-scoped rows."""
+from datetime import datetime
+
+from sqlalchemy import String, ForeignKey, DateTime, func
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.extensions import db
+from app.models.base import generate_uuid
+
+
+class DeletedRecord(db.Model):
+    """A row removed from an org-scoped collection, reported to delta-sync clients."""
+    __tablename__ = "deleted_records"
+
+    id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
+    organization_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False
+    )
+    entity: Mapped[str] = mapped_column(String(64), nullable=False)  # e.g. "roles", "users"
+    entity_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (db.Index("ix_deleted_records_org_entity_deleted_at", "organization_id", "entity", "deleted_at"),)
+
+    def to_dict(self):
+        return {
+            "id": self.entity_id,
+            "entity": self.entity,
+            "deleted_at": self.deleted_at.isoformat() if self.deleted_at else None,
+        }
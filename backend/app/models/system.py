@@ -0,0 +1,130 @@
+"""System models: transactional outbox, background jobs, admission leases and idempotency keys."""
+from datetime import datetime
+
+from sqlalchemy import String, ForeignKey, DateTime, Integer, Text, JSON, func, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.extensions import db
+from app.models.base import TimestampMixin, generate_uuid
+
+
+class OutboxEvent(db.Model, TimestampMixin):
+    """A side effect recorded in the same transaction as the change that caused it."""
+    __tablename__ = "outbox_events"
+
+    id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
+    organization_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    event_type: Mapped[str] = mapped_column(String(128), nullable=False)  # e.g. "timesheet.approved"
+    payload: Mapped[dict] = mapped_column(JSON, default=dict)
+    status: Mapped[str] = mapped_column(String(32), default="pending")  # pending, done, failed
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    processed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str] = mapped_column(Text, default="")
+
+    __table_args__ = (
+        db.Index("ix_outbox_events_pending", "available_at", postgresql_where=text("status = 'pending'")),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "organization_id": self.organization_id,
+            "event_type": self.event_type,
+            "payload": self.payload,
+            "status": self.status,
+            "attempts": self.attempts,
+            "available_at": self.available_at.isoformat() if self.available_at else None,
+            "processed_at": self.processed_at.isoformat() if self.processed_at else None,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+class Job(db.Model, TimestampMixin):
+    """A unit of background work claimed by `flask jobs work` processes."""
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
+    organization_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False
+    )
+    created_by_user_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    job_type: Mapped[str] = mapped_column(String(128), nullable=False)  # e.g. "payroll.run"
+    status: Mapped[str] = mapped_column(String(32), default="queued")  # queued, running, succeeded, failed
+    priority: Mapped[int] = mapped_column(Integer, default=0)  # higher runs first
+    payload: Mapped[dict] = mapped_column(JSON, default=dict)
+    result: Mapped[dict] = mapped_column(JSON, nullable=True)
+    error: Mapped[str] = mapped_column(Text, default="")
+    progress: Mapped[int] = mapped_column(Integer, default=0)  # 0-100
+    progress_message: Mapped[str] = mapped_column(String(255), default="")
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    worker_id: Mapped[str] = mapped_column(String(128), nullable=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_jobs_queued", "priority", "created_at", postgresql_where=text("status = 'queued'")),
+        db.Index("ix_jobs_org_status", "organization_id", "status"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "organization_id": self.organization_id,
+            "created_by_user_id": self.created_by_user_id,
+            "job_type": self.job_type,
+            "status": self.status,
+            "priority": self.priority,
+            "progress": self.progress,
+            "progress_message": self.progress_message,
+            "error": self.error,
+            "attempts": self.attempts,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+class AdmissionLease(db.Model):
+    """An admitted heavy request, held until it finishes (shared admission store)."""
+    __tablename__ = "admission_leases"
+
+    id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
+    organization_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    endpoint_class: Mapped[str] = mapped_column(String(64), nullable=False)
+    weight: Mapped[int] = mapped_column(Integer, default=1)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class IdempotencyKey(db.Model):
+    """First response to a create request sent with an Idempotency-Key header, replayed on retries."""
+    __tablename__ = "idempotency_keys"
+
+    id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
+    organization_id: Mapped[str] = mapped_column(
+        PG_UUID(as_uuid=False), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)  # sha256 of method, path and body
+    status: Mapped[str] = mapped_column(String(32), default="pending")  # pending, done
+    response_status: Mapped[int] = mapped_column(Integer, nullable=True)
+    response_body: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint("organization_id", "user_id", "key", name="uq_idempotency_keys_org_user_key"),
+    )
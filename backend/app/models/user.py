@@ -4,10 +4,10 @@ from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.extensions import db
-from app.models.base import TimestampMixin, generate_uuid
+from app.models.base import TimestampMixin, VersionMixin, generate_uuid
 
 
-class User(db.Model, TimestampMixin):
+class User(db.Model, TimestampMixin, VersionMixin):
     __tablename__ = "users"
 
     id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
@@ -22,9 +22,11 @@ class User(db.Model, TimestampMixin):
 
     organization = relationship("Organization", back_populates="users")
     employee = relationship("Employee", back_populates="user", uselist=False)
-    user_roles = relationship("UserRole", back_populates="user", cascade="all, delete-orphan")
+    user_roles = relationship("UserRole", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
     roles = relationship("Role", secondary="user_roles", back_populates="users", viewonly=True)
 
+    __table_args__ = (db.Index("ix_users_org_updated_at", "organization_id", "updated_at"),)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -32,6 +34,7 @@ class User(db.Model, TimestampMixin):
             "email": self.email,
             "full_name": self.full_name,
             "is_active": self.is_active,
+            "version": self.version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -45,7 +48,7 @@ class User(db.Model, TimestampMixin):
         return perms
 
 
-class Role(db.Model, TimestampMixin):
+class Role(db.Model, TimestampMixin, VersionMixin):
     __tablename__ = "roles"
 
     id: Mapped[str] = mapped_column(PG_UUID(as_uuid=False), primary_key=True, default=generate_uuid)
@@ -56,17 +59,20 @@ class Role(db.Model, TimestampMixin):
     description: Mapped[str] = mapped_column(String(512), default="")
 
     organization = relationship("Organization", back_populates="roles")
-    role_permissions = relationship("RolePermission", back_populates="role", cascade="all, delete-orphan")
-    user_roles = relationship("UserRole", back_populates="role", cascade="all, delete-orphan")
+    role_permissions = relationship("RolePermission", back_populates="role", cascade="all, delete-orphan", passive_deletes=True)
+    user_roles = relationship("UserRole", back_populates="role", cascade="all, delete-orphan", passive_deletes=True)
     users = relationship("User", secondary="user_roles", back_populates="roles", viewonly=True)
     permissions = relationship("Permission", secondary="role_permissions", back_populates="roles", viewonly=True)
 
+    __table_args__ = (db.Index("ix_roles_org_updated_at", "organization_id", "updated_at"),)
+
     def to_dict(self):
         return {
             "id": self.id,
             "organization_id": self.organization_id,
             "name": self.name,
             "description": self.description,
+            "version": self.version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -0,0 +1,131 @@
+"""Available-to-promise (ATP) per SKU across warehouses.
+
+For one SKU, each warehouse's position is its available stock now (on hand
+minus reserved; reserved holds the open ProjectRequisition quantities) plus
+inbound supply: the outstanding quantity on submitted or partially received
+PO lines, bucketed by PurchaseOrder.expected_date. Drafts are not supply.
+Two grouped queries load it. The result is cached per process in
+local_cache under the entity "atp:<sku_id>", and stock movements and PO
+writes evict it through publish_atp(). Checking a quantity and date against
+the cached position is pure Python.
+"""
+from decimal import Decimal
+
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models import PurchaseOrder, PurchaseOrderLine, StockLevel, Warehouse
+from app.utils.invalidation import local_cache, publish
+
+INBOUND_PO_STATUSES = ("submitted", "partial")
+ZERO = Decimal(0)
+
+
+def atp_entity(sku_id):
+    return f"atp:{sku_id}"
+
+
+def publish_atp(org_id, sku_ids):
+    """Evict the cached ATP of these SKUs on every worker once the transaction commits."""
+    for sku_id in set(sku_ids):
+        publish(org_id, atp_entity(sku_id))
+
+
+def _load_position(org_id, sku_id):
+    """{warehouse_id: {"on_hand", "reserved", "inbound": [(date, qty)], "undated_inbound"}} from SQL aggregates."""
+    position = {}
+
+    def warehouse(warehouse_id):
+        return position.setdefault(warehouse_id, {
+            "on_hand": ZERO, "reserved": ZERO, "inbound": [], "undated_inbound": ZERO,
+        })
+
+    levels = db.session.execute(
+        select(StockLevel.warehouse_id, func.coalesce(StockLevel.quantity, 0), func.coalesce(StockLevel.reserved_quantity, 0))
+        .join(Warehouse, Warehouse.id == StockLevel.warehouse_id)
+        .where(Warehouse.organization_id == org_id, StockLevel.sku_id == sku_id)
+    )
+    for warehouse_id, quantity, reserved in levels:
+        entry = warehouse(warehouse_id)
+        entry["on_hand"], entry["reserved"] = Decimal(quantity), Decimal(reserved)
+
+    outstanding = PurchaseOrderLine.quantity_ordered - func.coalesce(PurchaseOrderLine.quantity_received, 0)
+    inbound = db.session.execute(
+        select(PurchaseOrder.warehouse_id, PurchaseOrder.expected_date, func.sum(outstanding))
+        .join(PurchaseOrderLine, PurchaseOrderLine.purchase_order_id == PurchaseOrder.id)
+        .where(
+            PurchaseOrder.organization_id == org_id,
+            PurchaseOrder.status.in_(INBOUND_PO_STATUSES),
+            PurchaseOrderLine.sku_id == sku_id,
+            outstanding > 0,
+        )
+        .group_by(PurchaseOrder.warehouse_id, PurchaseOrder.expected_date)
+        .order_by(PurchaseOrder.warehouse_id, PurchaseOrder.expected_date)
+    )
+    for warehouse_id, expected_date, quantity in inbound:
+        entry = warehouse(warehouse_id)
+        if expected_date is None:
+            entry["undated_inbound"] += Decimal(quantity)
+        else:
+            entry["inbound"].append((expected_date, Decimal(quantity)))
+    return position
+
+
+def sku_position(org_id, sku_id):
+    """The cached per-warehouse position of a SKU. Treat it as read-only: it is shared between requests."""
+    return local_cache.get_or_set(org_id, atp_entity(sku_id), "position", lambda: _load_position(org_id, sku_id))
+
+
+def available_to_promise(org_id, sku_id, quantity=None, on_date=None):
+    """Per-warehouse availability timeline for a SKU, and whether quantity can be promised by on_date
+    (without on_date: from what is available now).
+
+    Each warehouse gets a timeline of {"date", "inbound", "available"} points, where
+    available is cumulative: available now plus everything expected up to that date.
+    "earliest_date" is the first date the quantity is covered: None means now, and
+    it is omitted when known supply never covers it. Undated inbound is reported
+    but never promised.
+    """
+    warehouses, total_now, events = [], ZERO, []
+    for warehouse_id, entry in sorted(sku_position(org_id, sku_id).items()):
+        available = entry["on_hand"] - entry["reserved"]
+        total_now += available
+        timeline = [{"date": None, "inbound": 0.0, "available": float(available)}]
+        running = available
+        for expected_date, inbound in entry["inbound"]:
+            running += inbound
+            timeline.append({"date": expected_date.isoformat(), "inbound": float(inbound), "available": float(running)})
+            events.append((expected_date, inbound))
+        row = {
+            "warehouse_id": warehouse_id,
+            "on_hand": float(entry["on_hand"]),
+            "reserved": float(entry["reserved"]),
+            "available_now": float(available),
+            "undated_inbound": float(entry["undated_inbound"]),
+            "timeline": timeline,
+        }
+        if quantity is not None:
+            row.update(_promise(available, entry["inbound"], quantity, on_date))
+        warehouses.append(row)
+    result = {"sku_id": sku_id, "available_now": float(total_now), "warehouses": warehouses}
+    if quantity is not None:
+        result["quantity"] = float(quantity)
+        result["date"] = on_date.isoformat() if on_date else None
+        result.update(_promise(total_now, sorted(events), quantity, on_date))
+    return result
+
+
+def _promise(available, inbound, quantity, on_date):
+    """{"available_by_date", "can_promise", "earliest_date"} for one warehouse or the total."""
+    by_date = available + sum((q for d, q in inbound if on_date is not None and d <= on_date), ZERO)
+    result = {"available_by_date": float(by_date), "can_promise": by_date >= quantity}
+    if available >= quantity:
+        result["earliest_date"] = None
+        return result
+    running = available
+    for expected_date, inbound_quantity in inbound:
+        running += inbound_quantity
+        if running >= quantity:
+            result["earliest_date"] = expected_date.isoformat()
+            break
+    return result
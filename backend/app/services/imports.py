@@ -0,0 +1,306 @@
+"""Bulk import of SKUs, customers, employees and leads from CSV or NDJSON.
+
+Rows are read as a stream and processed in chunks of IMPORT_CHUNK_SIZE:
+
+1. each row is validated and normalized, including string lengths and
+   numeric precision against the table's columns (a value the database would
+   reject would fail the whole chunk); failures are collected per row (line
+   number and message) and the row is skipped;
+2. codes are checked against the organization's existing codes, loaded once
+   into a set, and against codes seen earlier in the file; missing codes are
+   taken from the document sequence in one allocation per chunk;
+3. the chunk is written in one statement: on PostgreSQL via COPY into a
+   temporary staging table merged with INSERT ... SELECT ... ON CONFLICT DO
+   NOTHING, elsewhere as a multi-row INSERT. Rows that lost a race with a
+   concurrent insert are reported as duplicates.
+
+Each chunk commits on its own, so a failed import keeps the chunks before it.
+"""
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import Numeric, String, insert, select, text
+
+from app.extensions import db
+from app.models import Customer, Employee, Lead, Sku, generate_uuid
+from app.utils.db_utils import copy_text, dialect_insert
+from app.utils.invalidation import publish
+from app.utils.sequences import allocate, format_number
+
+MAX_REPORTED_ERRORS = 1000
+
+
+def _text(row, *keys, required=False, default=""):
+    for key in keys:
+        value = row.get(key)
+        if value is not None and str(value).strip() != "":
+            return str(value).strip()
+    if required:
+        raise ValueError(f"{keys[0]} is required")
+    return default
+
+
+def _decimal(row, *keys):
+    raw = _text(row, *keys, default="0")
+    try:
+        return Decimal(raw)
+    except InvalidOperation:
+        raise ValueError(f"{keys[0]} must be a number") from None
+
+
+def _bool(row, key, default=True):
+    value = row.get(key)
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+def _date(row, *keys):
+    raw = _text(row, *keys)
+    if not raw:
+        return None
+    try:
+        return date.fromisoformat(raw.split("T")[0])
+    except ValueError:
+        raise ValueError(f"{keys[0]} must be an ISO date") from None
+
+
+def _sku_row(row):
+    return {
+        "code": _text(row, "code"),
+        "name": _text(row, "name", required=True),
+        "unit": _text(row, "unit", default="unit"),
+        "reorder_point": _decimal(row, "reorder_point"),
+        "reorder_quantity": _decimal(row, "reorder_quantity"),
+        "is_active": _bool(row, "is_active"),
+    }
+
+
+def _customer_row(row):
+    return {
+        "code": _text(row, "code"),
+        "name": _text(row, "name", required=True),
+        "tax_id": _text(row, "tax_id"),
+        "billing_address": _text(row, "billing_address"),
+        "shipping_address": _text(row, "shipping_address"),
+    }
+
+
+def _employee_row(row):
+    return {
+        "employee_code": _text(row, "employee_code", "employeeCode"),
+        "full_name": _text(row, "full_name", "fullName", required=True),
+        "job_title": _text(row, "job_title"),
+        "department": _text(row, "department"),
+        "base_salary_monthly": _decimal(row, "base_salary_monthly", "base_salary"),
+        "hire_date": _date(row, "hire_date", "hireDate"),
+        "is_active": _bool(row, "is_active"),
+    }
+
+
+def _lead_row(row):
+    return {
+        "company_name": _text(row, "company_name", required=True),
+        "contact_name": _text(row, "contact_name"),
+        "email": _text(row, "email"),
+        "phone": _text(row, "phone"),
+        "status": _text(row, "status", default="prospect"),
+        "stage": _text(row, "stage"),
+        "value": _decimal(row, "value"),
+    }
+
+
+def _check_columns(table, row):
+    """Reject values that do not fit their column: strings over its length, numbers over its precision."""
+    for key, value in row.items():
+        column = table.columns.get(key)
+        if column is None or value is None:
+            continue
+        if isinstance(column.type, String) and column.type.length and len(value) > column.type.length:
+            raise ValueError(f"{key} must be at most {column.type.length} characters")
+        if isinstance(column.type, Numeric) and isinstance(value, Decimal):
+            if not value.is_finite():
+                raise ValueError(f"{key} must be a number")
+            precision, scale = column.type.precision, column.type.scale or 0
+            if precision and abs(value.quantize(Decimal(1).scaleb(-scale))) >= Decimal(10) ** (precision - scale):
+                raise ValueError(f"{key} has more than {precision - scale} digits before the decimal point")
+
+
+@dataclass
+class Importer:
+    model: type
+    parse: callable
+    code_field: str = None  # unique per organization; None = no duplicate detection
+    sequence: str = None  # document sequence for rows without a code
+    cache_entity: str = None  # invalidation entity to publish after import
+
+
+IMPORTERS = {
+    "skus": Importer(Sku, _sku_row, "code", "sku", "skus"),
+    "customers": Importer(Customer, _customer_row, "code", "customer"),
+    "employees": Importer(Employee, _employee_row, "employee_code", "employee"),
+    "leads": Importer(Lead, _lead_row),
+}
+
+
+@dataclass
+class ImportReport:
+    total: int = 0
+    created: int = 0
+    errors: list = field(default_factory=list)
+    error_count: int = 0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": line, "error": message})
+
+    def to_dict(self):
+        return {
+            "total": self.total,
+            "created": self.created,
+            "failed": self.error_count,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+        }
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, dict) from a binary stream of CSV (with header) or NDJSON."""
+    reader = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        rows = csv.DictReader(reader)
+        for row in rows:
+            yield rows.line_num, row
+        return
+    for line_no, line in enumerate(reader, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_no, row if isinstance(row, dict) else None
+
+
+def _existing_codes(org_id, importer):
+    column = getattr(importer.model, importer.code_field)
+    return set(db.session.scalars(select(column).where(importer.model.organization_id == org_id)))
+
+
+def _write_postgres(importer, rows):
+    """COPY rows into a staging table and merge; returns the codes (or count) actually inserted."""
+    table = importer.model.__table__.name
+    staging = f"import_staging_{table}"
+    columns = list(rows[0])
+    conn = db.session.connection()
+    conn.execute(text(f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"))
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(copy_text(row[c]) for c in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+    column_list = ", ".join(columns)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+    merge = f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging}"
+    if importer.code_field:
+        merge += f" ON CONFLICT (organization_id, {importer.code_field}) DO NOTHING RETURNING {importer.code_field}"
+        return set(conn.execute(text(merge)).scalars())
+    return conn.execute(text(merge)).rowcount
+
+
+def _write_generic(importer, rows):
+    if importer.code_field:
+        column = getattr(importer.model, importer.code_field)
+        stmt = (
+            dialect_insert(importer.model)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["organization_id", importer.code_field])
+            .returning(column)
+        )
+        return set(db.session.execute(stmt).scalars())
+    db.session.execute(insert(importer.model).values(rows))
+    return len(rows)
+
+
+def _flush_chunk(org_id, importer, chunk, seen_codes, report, dry_run):
+    """Assign missing codes, write the chunk and commit it."""
+    if not chunk:
+        return
+    if importer.code_field:
+        missing = [row for _, row in chunk if not row[importer.code_field]]
+        assigned = 0
+        while assigned < len(missing):
+            for n in allocate(org_id, importer.sequence, len(missing) - assigned):
+                code = format_number(importer.sequence, n)
+                if code in seen_codes:
+                    continue  # taken by a code entered by hand; allocate another
+                seen_codes.add(code)
+                missing[assigned][importer.code_field] = code
+                assigned += 1
+    if dry_run:
+        report.created += len(chunk)
+        db.session.rollback()
+        return
+    rows = [row for _, row in chunk]
+    write = _write_postgres if db.engine.dialect.name == "postgresql" else _write_generic
+    inserted = write(importer, rows)
+    if isinstance(inserted, set):
+        for line, row in chunk:
+            if row[importer.code_field] in inserted:
+                report.created += 1
+            else:
+                report.add_error(line, f"{importer.code_field} already exists")
+    else:
+        report.created += inserted
+    db.session.commit()
+
+
+def run_import(org_id, entity, rows, user_id=None, chunk_size=5000, dry_run=False):
+    """Import an iterable of (line number, dict) rows for one organization. Returns an ImportReport."""
+    importer = IMPORTERS[entity]
+    report = ImportReport()
+    seen_codes = _existing_codes(org_id, importer) if importer.code_field else set()
+    chunk = []
+    for line, raw in rows:
+        report.total += 1
+        if raw is None:
+            report.add_error(line, "Row is not a JSON object")
+            continue
+        try:
+            row = importer.parse(raw)
+            _check_columns(importer.model.__table__, row)
+        except ValueError as exc:
+            report.add_error(line, str(exc))
+            continue
+        if importer.code_field and row[importer.code_field]:
+            code = row[importer.code_field]
+            if code in seen_codes:
+                report.add_error(line, f"{importer.code_field} already exists")
+                continue
+            seen_codes.add(code)
+        row["id"] = generate_uuid()
+        row["organization_id"] = org_id
+        if entity == "leads":
+            row["assigned_to_user_id"] = user_id
+        if hasattr(importer.model, "version"):
+            row["version"] = 1
+        chunk.append((line, row))
+        if len(chunk) >= chunk_size:
+            _flush_chunk(org_id, importer, chunk, seen_codes, report, dry_run)
+            chunk = []
+    _flush_chunk(org_id, importer, chunk, seen_codes, report, dry_run)
+    if importer.cache_entity and report.created and not dry_run:
+        publish(org_id, importer.cache_entity)
+        db.session.commit()
+    return report
@@ -0,0 +1,276 @@
+"""Database-backed background jobs.
+
+enqueue() inserts a queued Job; `flask jobs work` processes claim them with
+FOR UPDATE SKIP LOCKED, highest priority first, while keeping at most
+JOB_ORG_CONCURRENCY jobs running per organization. Handlers receive a
+JobContext and report progress through it; progress is written on its own
+connection so pollers see it while the job's transaction is still open.
+
+While a handler runs, its worker refreshes the job's heartbeat every
+JOB_HEARTBEAT_SECONDS from a side thread, independently of progress reports.
+A running job whose heartbeat is older than JOB_STALE_SECONDS is taken to
+belong to a dead worker and is requeued, so keep JOB_STALE_SECONDS several
+heartbeats long; how long a handler goes between reports does not matter.
+"""
+import importlib
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import func, select, update
+
+from app.extensions import db
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+# Modules whose import registers job types via @job_type.
+JOB_MODULES = (
+    "app.services.mrp",
+    "app.services.payroll",
+    "app.services.replenishment",
+    "app.services.tenants",
+)
+
+_job_types = {}
+_failure_handlers = {}
+
+
+def job_type(name, on_failure=None):
+    """Decorator: register fn(ctx) as the handler for jobs of this type. Its return value is the job result.
+
+    on_failure(ctx) runs in the transaction that fails a job for good (no attempts left), so
+    whatever the job was working on can be put back into a usable state.
+    """
+    def decorator(fn):
+        _job_types[name] = fn
+        if on_failure is not None:
+            _failure_handlers[name] = on_failure
+        return fn
+    return decorator
+
+
+def load_job_types():
+    for module in JOB_MODULES:
+        importlib.import_module(module)
+
+
+class JobContext:
+    """What a job handler sees: its payload, its organization and a progress reporter."""
+
+    def __init__(self, job):
+        self.job_id = job.id
+        self.organization_id = job.organization_id
+        self.user_id = job.created_by_user_id
+        self.payload = job.payload or {}
+
+    def report(self, progress, message=""):
+        """Record progress (0-100) and refresh the heartbeat, outside the job's transaction."""
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(Job)
+                .where(Job.id == self.job_id)
+                .values(progress=max(0, min(int(progress), 100)), progress_message=message[:255], heartbeat_at=func.now())
+            )
+
+
+def enqueue(org_id, name, payload=None, priority=0, user_id=None):
+    """Queue a job in the current transaction; it becomes visible to workers on commit."""
+    job = Job(
+        organization_id=org_id,
+        created_by_user_id=user_id,
+        job_type=name,
+        status="queued",
+        priority=priority,
+        payload=payload or {},
+        progress=0,
+        attempts=0,
+    )
+    db.session.add(job)
+    return job
+
+
+def _mark_failed(job, error):
+    """Fail a job for good and run its type's on_failure hook, in the current transaction."""
+    job.status = "failed"
+    job.error = error
+    job.finished_at = datetime.now(timezone.utc)
+    on_failure = _failure_handlers.get(job.job_type)
+    if on_failure is None:
+        return
+    try:
+        with db.session.begin_nested():
+            on_failure(JobContext(job))
+    except Exception:
+        logger.exception("on_failure of job %s (%s) failed", job.id, job.job_type)
+
+
+def _is_postgres():
+    return db.engine.dialect.name == "postgresql"
+
+
+def requeue_stale():
+    """Put back (or fail) running jobs whose worker stopped sending heartbeats."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=current_app.config.get("JOB_STALE_SECONDS", 600))
+    max_attempts = current_app.config.get("JOB_MAX_ATTEMPTS", 3)
+    stale = db.session.scalars(
+        select(Job)
+        .where(Job.status == "running", func.coalesce(Job.heartbeat_at, Job.started_at) < cutoff)
+        .with_for_update(skip_locked=True)
+    ).all()
+    for job in stale:
+        if job.attempts >= max_attempts:
+            _mark_failed(job, "Worker stopped responding")
+        else:
+            job.status = "queued"
+            job.worker_id = None
+    db.session.commit()
+    return len(stale)
+
+
+def claim_next(worker_id):
+    """Claim the next runnable job, respecting per-organization concurrency. Returns a Job or None."""
+    cap = current_app.config.get("JOB_ORG_CONCURRENCY", 2)
+    saturated = (
+        select(Job.organization_id)
+        .where(Job.status == "running")
+        .group_by(Job.organization_id)
+        .having(func.count() >= cap)
+    )
+    candidates = db.session.scalars(
+        select(Job)
+        .where(Job.status == "queued", Job.organization_id.not_in(saturated))
+        .order_by(Job.priority.desc(), Job.created_at)
+        .limit(10)
+        .with_for_update(skip_locked=True)
+    ).all()
+    for job in candidates:
+        if _is_postgres():
+            # Serialize claimers per organization so two workers cannot both take the last slot. Try, don't
+            # wait: we already hold row locks, and waiting could deadlock with a worker locking in another order.
+            locked = db.session.scalar(
+                select(func.pg_try_advisory_xact_lock(func.hashtext("jobs:" + job.organization_id)))
+            )
+            if not locked:
+                continue
+            running = db.session.scalar(
+                select(func.count()).select_from(Job).where(Job.organization_id == job.organization_id, Job.status == "running")
+            )
+            if running >= cap:
+                continue
+        now = datetime.now(timezone.utc)
+        job.status = "running"
+        job.worker_id = worker_id
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = now
+        job.heartbeat_at = now
+        db.session.commit()
+        return job
+    db.session.commit()
+    return None
+
+
+class _Heartbeat:
+    """Refresh a running job's heartbeat on its own connection until the handler returns."""
+
+    def __init__(self, job, interval):
+        self._job_id = job.id
+        self._worker_id = job.worker_id
+        self._interval = interval
+        self._engine = db.engine
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"job-heartbeat-{job.id}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _beat(self):
+        while not self._stop.wait(self._interval):
+            try:
+                with self._engine.begin() as conn:
+                    conn.execute(
+                        update(Job)
+                        .where(Job.id == self._job_id, Job.status == "running", Job.worker_id == self._worker_id)
+                        .values(heartbeat_at=func.now())
+                    )
+            except Exception:
+                logger.exception("Heartbeat for job %s failed", self._job_id)
+
+
+def run_job(job):
+    """Execute a claimed job and record its outcome."""
+    job_id = job.id
+    handler = _job_types.get(job.job_type)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job type {job.job_type!r}")
+        with _Heartbeat(job, current_app.config.get("JOB_HEARTBEAT_SECONDS", 60)):
+            result = handler(JobContext(job))
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        logger.exception("Job %s (%s) failed", job_id, job.job_type)
+        job = db.session.get(Job, job_id)
+        error = f"{type(exc).__name__}: {exc}"[:2000]
+        if job is None:  # removed with its organization during the attempt (a failed tenant.delete)
+            logger.error("Job %s failed and was removed with its organization: %s", job_id, error)
+            return
+        if job.attempts < current_app.config.get("JOB_MAX_ATTEMPTS", 3) and handler is not None:
+            job.error = error
+            job.status = "queued"
+            job.worker_id = None
+        else:
+            _mark_failed(job, error)
+        db.session.commit()
+        return
+    job = db.session.get(Job, job_id)
+    if job is None:  # the handler deleted its own organization (tenant.delete)
+        logger.info("Job %s finished and was removed with its organization: %s", job_id, result)
+        return
+    job.status = "succeeded"
+    job.result = result if result is not None else {}
+    job.progress = 100
+    job.error = ""
+    job.finished_at = datetime.now(timezone.utc)
+    db.session.commit()
+
+
+def run_worker(worker_id=None, poll_interval=1.0, once=False):
+    """Claim and run jobs until interrupted (or until none are runnable when once=True)."""
+    from app.services.stock_checkpoints import take_due_checkpoints
+    from app.utils.partitions import maintain_all
+
+    load_job_types()
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    last_stale_check = 0.0
+    last_maintenance = 0.0
+    maintenance_interval = current_app.config.get("PARTITION_MAINTENANCE_INTERVAL", 3600)
+    while True:
+        try:
+            if time.monotonic() - last_stale_check > 60:
+                requeue_stale()
+                last_stale_check = time.monotonic()
+            if time.monotonic() - last_maintenance > maintenance_interval:
+                last_maintenance = time.monotonic()
+                maintain_all()
+                take_due_checkpoints()
+            job = claim_next(worker_id)
+        except Exception:
+            db.session.rollback()
+            logger.exception("Job claim failed")
+            job = None
+        if job is not None:
+            run_job(job)
+            continue
+        if once:
+            return
+        time.sleep(poll_interval)
@@ -0,0 +1,183 @@
+"""Material requirements planning (MRP) over project task materials.
+
+run_mrp() nets time-phased demand against supply for every SKU of an organization:
+
+- demand: what each open task still needs (quantity_required - quantity_consumed,
+  less what open requisitions already hold for it), due on Task.start_date
+- supply: available stock now (on hand minus reserved) and the outstanding
+  quantity of open purchase orders (drafts included, so replenishment output
+  is not ordered twice) on their expected_date
+
+Dates are bucketed into periods of period_days from today. Anything earlier,
+or undated, falls in period 0, and anything past the horizon is left out.
+Quantities are held in flat array('q') buffers of hundredths indexed by
+sku * periods + period, so the netting pass is integer arithmetic over
+contiguous memory, with no per-row objects. The pass keeps a projected
+balance per SKU. When the balance goes negative it plans an order for the
+shortfall, at least Sku.reorder_quantity, due at the start of that period.
+A shortfall in period 0 cannot be met by a new order in time, so it is
+also reported as a shortage exception.
+"""
+from array import array
+from datetime import date, timedelta
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models import (
+    Milestone, Project, ProjectRequisition, PurchaseOrder, PurchaseOrderLine, Sku, StockLevel, Task, TaskMaterial,
+    Warehouse,
+)
+from app.services.jobs import job_type
+
+CLOSED_TASK_STATUSES = ("completed", "cancelled")
+CLOSED_PROJECT_STATUSES = ("completed", "cancelled")
+SUPPLY_PO_STATUSES = ("draft", "submitted", "partial")
+OPEN_REQUISITION_STATUSES = ("reserved", "partial")
+
+
+def _hundredths(value):
+    return int((Decimal(value or 0) * 100).to_integral_value())
+
+
+def _quantity(hundredths):
+    return float(Decimal(hundredths) / 100)
+
+
+def run_mrp(org_id, today=None, period_days=None, horizon_days=None, progress=None):
+    """Net demand against supply per SKU and period. Read-only.
+
+    Returns {"periods", "planned_orders": [{"sku_id", "sku_code", "due_date", "quantity",
+    "net_requirement"}], "exceptions": [{"type": "shortage", "sku_id", "sku_code",
+    "date", "quantity", "task_ids"}], "skus", "demand_rows", "beyond_horizon"}.
+    """
+    today = today or date.today()
+    period_days = period_days or current_app.config.get("MRP_PERIOD_DAYS", 7)
+    horizon_days = horizon_days or current_app.config.get("MRP_HORIZON_DAYS", 182)
+    periods = max(1, -(-horizon_days // period_days))
+    report = progress or (lambda done, message: None)
+
+    def period_of(d):
+        if d is None or d <= today:
+            return 0
+        p = (d - today).days // period_days
+        return p if p < periods else None
+
+    skus = db.session.execute(
+        select(Sku.id, Sku.code, Sku.reorder_quantity).where(Sku.organization_id == org_id).order_by(Sku.code)
+    ).all()
+    index = {sku_id: i for i, (sku_id, _, _) in enumerate(skus)}
+    size = len(skus) * periods
+    demand = array("q", bytes(8 * size))
+    supply = array("q", bytes(8 * size))
+    on_hand = array("q", bytes(8 * len(skus)))
+    demand_tasks = {}  # (sku index, period) -> task ids, for period 0 only (shortage exceptions)
+    report(10, "loading demand")
+
+    held = {
+        (task_id, sku_id): _hundredths(quantity)
+        for task_id, sku_id, quantity in db.session.execute(
+            select(ProjectRequisition.task_id, ProjectRequisition.sku_id,
+                   func.sum(ProjectRequisition.quantity_reserved - ProjectRequisition.quantity_issued))
+            .join(Project, Project.id == ProjectRequisition.project_id)
+            .where(Project.organization_id == org_id, ProjectRequisition.task_id.isnot(None),
+                   ProjectRequisition.status.in_(OPEN_REQUISITION_STATUSES))
+            .group_by(ProjectRequisition.task_id, ProjectRequisition.sku_id)
+        )
+    }
+    demand_rows = beyond = 0
+    materials = db.session.execute(
+        select(TaskMaterial.task_id, TaskMaterial.sku_id, TaskMaterial.quantity_required,
+               TaskMaterial.quantity_consumed, Task.start_date)
+        .join(Task, Task.id == TaskMaterial.task_id)
+        .join(Milestone, Milestone.id == Task.milestone_id)
+        .join(Project, Project.id == Milestone.project_id)
+        .where(
+            Project.organization_id == org_id,
+            Project.status.notin_(CLOSED_PROJECT_STATUSES),
+            Task.status.notin_(CLOSED_TASK_STATUSES),
+            TaskMaterial.quantity_required > func.coalesce(TaskMaterial.quantity_consumed, 0),
+        )
+        .execution_options(yield_per=10000)
+    )
+    for task_id, sku_id, required, consumed, start_date in materials:
+        need = _hundredths(required) - _hundredths(consumed) - held.get((task_id, sku_id), 0)
+        i = index.get(sku_id)
+        if need <= 0 or i is None:
+            continue
+        p = period_of(start_date)
+        if p is None:
+            beyond += 1
+            continue
+        demand_rows += 1
+        demand[i * periods + p] += need
+        if p == 0:
+            demand_tasks.setdefault(i, []).append(task_id)
+    report(40, "loading supply")
+
+    available = db.session.execute(
+        select(StockLevel.sku_id, func.sum(StockLevel.quantity - StockLevel.reserved_quantity))
+        .join(Warehouse, Warehouse.id == StockLevel.warehouse_id)
+        .where(Warehouse.organization_id == org_id)
+        .group_by(StockLevel.sku_id)
+    )
+    for sku_id, quantity in available:
+        if sku_id in index:
+            on_hand[index[sku_id]] = _hundredths(quantity)
+    outstanding = PurchaseOrderLine.quantity_ordered - func.coalesce(PurchaseOrderLine.quantity_received, 0)
+    inbound = db.session.execute(
+        select(PurchaseOrderLine.sku_id, PurchaseOrder.expected_date, func.sum(outstanding))
+        .join(PurchaseOrder, PurchaseOrder.id == PurchaseOrderLine.purchase_order_id)
+        .where(PurchaseOrder.organization_id == org_id, PurchaseOrder.status.in_(SUPPLY_PO_STATUSES), outstanding > 0)
+        .group_by(PurchaseOrderLine.sku_id, PurchaseOrder.expected_date)
+    )
+    for sku_id, expected_date, quantity in inbound:
+        i, p = index.get(sku_id), period_of(expected_date)
+        if i is not None and p is not None:
+            supply[i * periods + p] += _hundredths(quantity)
+    report(70, "netting")
+
+    period_start = [today + timedelta(days=p * period_days) for p in range(periods)]
+    planned, exceptions = [], []
+    for i, (sku_id, code, reorder_quantity) in enumerate(skus):
+        lot = _hundredths(reorder_quantity)
+        balance = on_hand[i]
+        base = i * periods
+        for p in range(periods):
+            balance += supply[base + p] - demand[base + p]
+            if balance >= 0:
+                continue
+            shortfall = -balance
+            if p == 0:
+                exceptions.append({
+                    "type": "shortage", "sku_id": sku_id, "sku_code": code, "date": today.isoformat(),
+                    "quantity": _quantity(shortfall), "task_ids": demand_tasks.get(i, [])[:100],
+                })
+            quantity = max(shortfall, lot)
+            planned.append({
+                "sku_id": sku_id, "sku_code": code, "due_date": period_start[p].isoformat(),
+                "quantity": _quantity(quantity), "net_requirement": _quantity(shortfall),
+            })
+            balance += quantity
+    report(95, f"{len(planned)} planned orders")
+    return {
+        "periods": [d.isoformat() for d in period_start],
+        "planned_orders": planned,
+        "exceptions": exceptions,
+        "skus": len(skus),
+        "demand_rows": demand_rows,
+        "beyond_horizon": beyond,
+    }
+
+
+@job_type("inventory.mrp")
+def mrp_job(ctx):
+    """MRP run for the job's organization; the plan is the job result."""
+    return run_mrp(
+        ctx.organization_id,
+        period_days=ctx.payload.get("period_days"),
+        horizon_days=ctx.payload.get("horizon_days"),
+        progress=ctx.report,
+    )
@@ -0,0 +1,109 @@
+"""Transactional outbox.
+
+emit() adds an OutboxEvent to the current session, so the event commits or
+rolls back together with the business change. A worker (`flask outbox work`)
+claims pending events with FOR UPDATE SKIP LOCKED, so any number of workers
+can run side by side, and dispatches each one to its registered handlers
+inside a savepoint. Failed events are retried with exponential backoff until
+OUTBOX_MAX_ATTEMPTS, then parked as "failed".
+"""
+import importlib
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# Modules whose import registers handlers via @handles.
+HANDLER_MODULES = (
+    "app.services.payroll",
+)
+
+_handlers = {}
+
+
+def handles(event_type):
+    """Decorator: register fn(event) as a handler for event_type."""
+    def decorator(fn):
+        _handlers.setdefault(event_type, []).append(fn)
+        return fn
+    return decorator
+
+
+def load_handlers():
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def emit(org_id, event_type, payload=None):
+    """Record an event in the current transaction."""
+    event = OutboxEvent(organization_id=org_id, event_type=event_type, payload=payload or {}, status="pending", attempts=0)
+    db.session.add(event)
+    return event
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=min(2 ** attempts, 300))
+
+
+def dispatch_batch(batch_size=100):
+    """Claim up to batch_size due events, run their handlers and commit. Returns the count claimed."""
+    max_attempts = current_app.config.get("OUTBOX_MAX_ATTEMPTS", 10)
+    events = db.session.scalars(
+        select(OutboxEvent)
+        .where(OutboxEvent.status == "pending", OutboxEvent.available_at <= func.now())
+        .order_by(OutboxEvent.available_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    for event in events:
+        now = datetime.now(timezone.utc)
+        try:
+            with db.session.begin_nested():
+                for handler in _handlers.get(event.event_type, []):
+                    handler(event)
+        except Exception as exc:
+            logger.exception("Outbox handler failed for %s %s", event.event_type, event.id)
+            event.attempts = (event.attempts or 0) + 1
+            event.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+            if event.attempts >= max_attempts:
+                event.status = "failed"
+            else:
+                event.available_at = now + _retry_delay(event.attempts)
+            continue
+        event.status = "done"
+        event.processed_at = now
+    db.session.commit()
+    return len(events)
+
+
+def run_worker(batch_size=100, poll_interval=1.0, once=False):
+    """Dispatch events until interrupted (or until the queue is drained when once=True)."""
+    load_handlers()
+    while True:
+        try:
+            claimed = dispatch_batch(batch_size)
+        except Exception:
+            db.session.rollback()
+            logger.exception("Outbox batch failed")
+            claimed = 0
+        if once and claimed == 0:
+            return
+        if claimed < batch_size:
+            time.sleep(0 if once else poll_interval)
+
+
+def purge_processed(days):
+    """Delete events that were dispatched more than `days` ago."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    removed = OutboxEvent.query.filter(
+        OutboxEvent.status == "done", OutboxEvent.processed_at < cutoff
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
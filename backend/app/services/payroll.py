@@ -0,0 +1,101 @@
+"""Payroll calculation shared by the payroll API, background workers and outbox handlers."""
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import func, insert
+
+from app.extensions import db
+from app.models import Employee, PayrollItem, PayrollRun, Timesheet
+from app.services.jobs import job_type
+from app.services.outbox import handles
+
+
+def approved_hours_by_employee(org_id, period_start, period_end, employee_ids=None):
+    """{employee_id: approved hours} for the period, in one grouped query."""
+    q = db.session.query(Timesheet.employee_id, func.coalesce(func.sum(Timesheet.hours), 0)).filter(
+        Timesheet.organization_id == org_id,
+        Timesheet.work_date >= period_start,
+        Timesheet.work_date <= period_end,
+        Timesheet.status == "approved",
+    )
+    if employee_ids is not None:
+        q = q.filter(Timesheet.employee_id.in_(employee_ids))
+    return {emp_id: Decimal(str(hours)) for emp_id, hours in q.group_by(Timesheet.employee_id)}
+
+
+def timesheet_amount(hours):
+    # Simple: timesheet amount = hours * rate (you can add hourly_rate to Employee later)
+    return Decimal(str(hours)) * Decimal("0")  # placeholder: no hourly rate in schema
+
+
+def build_payroll_items(run, progress=None, chunk_size=500):
+    """Insert a PayrollItem for every active employee of the run's organization.
+
+    Items are written with multi-row inserts of chunk_size rows; progress(done, total)
+    is called after each chunk. Returns the number of items created.
+    """
+    employees = (
+        db.session.query(Employee.id, Employee.base_salary_monthly)
+        .filter(Employee.organization_id == run.organization_id, Employee.is_active.is_(True))
+        .order_by(Employee.id)
+        .all()
+    )
+    hours = approved_hours_by_employee(run.organization_id, run.period_start, run.period_end)
+    total = len(employees)
+    for start in range(0, total, chunk_size):
+        rows = []
+        for emp_id, salary in employees[start:start + chunk_size]:
+            base = salary or Decimal(0)
+            amount = timesheet_amount(hours.get(emp_id, 0))
+            rows.append({
+                "payroll_run_id": run.id,
+                "employee_id": emp_id,
+                "base_amount": base,
+                "timesheet_amount": amount,
+                "total_amount": base + amount,
+                "status": "pending",
+            })
+        db.session.execute(insert(PayrollItem), rows)
+        if progress is not None:
+            progress(start + len(rows), total)
+    return total
+
+
+def fail_payroll_run(ctx):
+    """A payroll.run job gave up: mark its run failed instead of leaving it processing."""
+    run = db.session.get(PayrollRun, ctx.payload.get("payroll_run_id"))
+    if run is not None and run.organization_id == ctx.organization_id and run.status == "processing":
+        run.status = "failed"
+
+
+@job_type("payroll.run", on_failure=fail_payroll_run)
+def run_payroll_job(ctx):
+    """Background variant of POST /api/hrm/payroll for large organizations."""
+    run = db.session.get(PayrollRun, ctx.payload["payroll_run_id"])
+    if run is None or run.organization_id != ctx.organization_id:
+        raise LookupError("Payroll run not found")
+    count = build_payroll_items(
+        run, progress=lambda done, total: ctx.report(done * 100 // max(total, 1), f"{done}/{total} employees")
+    )
+    run.status = "draft"
+    return {"payroll_run_id": run.id, "items": count}
+
+
+@handles("timesheet.approved")
+def refresh_payroll_for_timesheet(event):
+    """Recalculate the employee's items in draft payroll runs covering the approved work date."""
+    employee_id = event.payload["employee_id"]
+    work_date = date.fromisoformat(event.payload["work_date"])
+    runs = PayrollRun.query.filter(
+        PayrollRun.organization_id == event.organization_id,
+        PayrollRun.status == "draft",
+        PayrollRun.period_start <= work_date,
+        PayrollRun.period_end >= work_date,
+    ).all()
+    for run in runs:
+        item = PayrollItem.query.filter_by(payroll_run_id=run.id, employee_id=employee_id).first()
+        if not item:
+            continue
+        hours = approved_hours_by_employee(run.organization_id, run.period_start, run.period_end, [employee_id])
+        item.timesheet_amount = timesheet_amount(hours.get(employee_id, 0))
+        item.total_amount = (item.base_amount or Decimal(0)) + item.timesheet_amount
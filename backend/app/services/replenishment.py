@@ -0,0 +1,106 @@
+"""Replenishment: turn low stock into draft purchase orders in one pass.
+
+run_replenishment() reads the low-stock scan (app.services.stock.low_stock),
+drops SKUs that already have an open PO line in the same warehouse, and
+writes one draft PurchaseOrder per warehouse with a line per SKU for its
+suggested quantity. POs and lines go in as two multi-row inserts. The PO
+numbers come from one sequence allocation, and everything happens in the
+caller's transaction. Runs for the same organization are serialized with an
+advisory lock on PostgreSQL, so two runs cannot both order the same shortfall.
+"""
+from datetime import date
+
+from sqlalchemy import func, insert, select
+
+from app.extensions import db
+from app.models import PurchaseOrder, PurchaseOrderLine
+from app.models.base import generate_uuid
+from app.services.jobs import job_type
+from app.services.stock import low_stock
+from app.utils.sequences import allocate, format_number
+
+OPEN_PO_STATUSES = ("draft", "submitted", "partial")
+
+
+def open_po_coverage(org_id, warehouse_id=None):
+    """{(warehouse_id, sku_id)} with quantity still outstanding on an open purchase order."""
+    q = (
+        select(PurchaseOrder.warehouse_id, PurchaseOrderLine.sku_id)
+        .join(PurchaseOrderLine, PurchaseOrderLine.purchase_order_id == PurchaseOrder.id)
+        .where(
+            PurchaseOrder.organization_id == org_id,
+            PurchaseOrder.status.in_(OPEN_PO_STATUSES),
+            PurchaseOrderLine.quantity_ordered > func.coalesce(PurchaseOrderLine.quantity_received, 0),
+        )
+        .distinct()
+    )
+    if warehouse_id:
+        q = q.where(PurchaseOrder.warehouse_id == warehouse_id)
+    return set(db.session.execute(q).all())
+
+
+def run_replenishment(org_id, user_id=None, warehouse_id=None, expected_date=None, dry_run=False):
+    """Create draft POs for every low-stock SKU not already on order. Does not commit.
+
+    Returns {"purchase_orders": [{"id", "number", "warehouse_id", "lines"}], "lines", "skipped_on_order"}.
+    """
+    if db.session.get_bind().dialect.name == "postgresql":
+        db.session.execute(select(func.pg_advisory_xact_lock(func.hashtext("replenishment:" + org_id))))
+    covered = open_po_coverage(org_id, warehouse_id)
+    plan, skipped = {}, 0
+    for row in low_stock(org_id, warehouse_id=warehouse_id):
+        if (row["warehouse_id"], row["sku_id"]) in covered:
+            skipped += 1
+            continue
+        if row["suggested_quantity"] > 0:
+            plan.setdefault(row["warehouse_id"], []).append(row)
+    summary = {"purchase_orders": [], "lines": sum(len(rows) for rows in plan.values()), "skipped_on_order": skipped}
+    if dry_run or not plan:
+        summary["purchase_orders"] = [
+            {"id": None, "number": None, "warehouse_id": w, "lines": len(rows)} for w, rows in plan.items()
+        ]
+        return summary
+
+    today = date.today()
+    orders, lines = [], []
+    for n, (wh_id, rows) in zip(allocate(org_id, "purchase_order", len(plan)), sorted(plan.items())):
+        po_id = generate_uuid()
+        orders.append({
+            "id": po_id,
+            "organization_id": org_id,
+            "warehouse_id": wh_id,
+            "number": format_number("purchase_order", n),
+            "status": "draft",
+            "order_date": today,
+            "expected_date": expected_date,
+            "created_by_user_id": user_id,
+        })
+        lines.extend(
+            {
+                "id": generate_uuid(),
+                "purchase_order_id": po_id,
+                "sku_id": row["sku_id"],
+                "quantity_ordered": row["suggested_quantity"],
+                "quantity_received": 0,
+                "unit_price": 0,
+            }
+            for row in rows
+        )
+        summary["purchase_orders"].append(
+            {"id": po_id, "number": orders[-1]["number"], "warehouse_id": wh_id, "lines": len(rows)}
+        )
+    db.session.execute(insert(PurchaseOrder), orders)
+    db.session.execute(insert(PurchaseOrderLine), lines)
+    return summary
+
+
+@job_type("inventory.replenish")
+def replenish_job(ctx):
+    """Draft purchase orders for the organization's low stock (optionally one warehouse)."""
+    expected = ctx.payload.get("expected_date")
+    return run_replenishment(
+        ctx.organization_id,
+        user_id=ctx.user_id,
+        warehouse_id=ctx.payload.get("warehouse_id"),
+        expected_date=date.fromisoformat(expected) if expected else None,
+    )
@@ -0,0 +1,161 @@
+"""Project requisitions: stock reserved for a project (or task), then issued or cancelled.
+
+A requisition's outstanding quantity (quantity_reserved - quantity_issued)
+is held in StockLevel.reserved_quantity while the requisition is open
+(status reserved or partial). Every state change is a conditional UPDATE
+whose WHERE clause carries the check, on both the stock level
+(app.services.stock.reserve_stock) and the requisition itself. Two requests
+racing on the same row cannot both succeed: the loser updates no row and
+gets InsufficientStock or RequisitionConflict.
+"""
+from decimal import Decimal
+
+from sqlalchemy import case, func, insert, select, update
+
+from app.extensions import db
+from app.models import ProjectRequisition, Task, TaskMaterial
+from app.models.base import generate_uuid
+from app.services.stock import ZERO, movement, post_movements, reserve_stock
+
+OPEN_STATUSES = ("reserved", "partial")
+REFERENCE_TYPE = "project_requisition"
+
+
+class RequisitionConflict(Exception):
+    """The requisition is no longer open, or changed while the request was in flight."""
+
+
+def create_requisitions(org_id, project_id, warehouse_id, lines, task_id=None, user_id=None):
+    """Reserve stock for [(sku_id, quantity)] and create one open requisition per line.
+
+    All or nothing: raises InsufficientStock if any line cannot be reserved (the
+    caller rolls back). Returns the new requisition ids.
+    """
+    rows = [
+        {
+            "id": generate_uuid(),
+            "project_id": project_id,
+            "task_id": task_id,
+            "sku_id": sku_id,
+            "warehouse_id": warehouse_id,
+            "quantity_reserved": quantity,
+            "quantity_issued": ZERO,
+            "status": "reserved",
+        }
+        for sku_id, quantity in lines
+    ]
+    if not rows:
+        return []
+    reserve_stock(org_id, [
+        movement(warehouse_id, r["sku_id"], "reservation", reserved_delta=r["quantity_reserved"],
+                 reference_type=REFERENCE_TYPE, reference_id=r["id"])
+        for r in rows
+    ], user_id=user_id)
+    db.session.execute(insert(ProjectRequisition), rows)
+    return [r["id"] for r in rows]
+
+
+def task_material_needs(task_id):
+    """[(sku_id, quantity)] each material of the task still needs reserved:
+    required - consumed - what open requisitions for the task already hold."""
+    held = dict(db.session.execute(
+        select(ProjectRequisition.sku_id,
+               func.sum(ProjectRequisition.quantity_reserved - ProjectRequisition.quantity_issued))
+        .where(ProjectRequisition.task_id == task_id, ProjectRequisition.status.in_(OPEN_STATUSES))
+        .group_by(ProjectRequisition.sku_id)
+    ).all())
+    needs = []
+    materials = db.session.execute(
+        select(TaskMaterial.sku_id, TaskMaterial.quantity_required, TaskMaterial.quantity_consumed)
+        .where(TaskMaterial.task_id == task_id)
+        .order_by(TaskMaterial.sku_id)
+    )
+    for sku_id, required, consumed in materials:
+        need = (required or ZERO) - (consumed or ZERO) - Decimal(held.get(sku_id) or 0)
+        if need > 0:
+            needs.append((sku_id, need))
+    return needs
+
+
+def reserve_task_materials(org_id, task, warehouse_id, user_id=None):
+    """Reserve everything the task's materials still need from one warehouse, all or nothing.
+
+    The task row is locked first, so concurrent calls for the same task run one after
+    the other and the second sees what the first reserved instead of reserving it again.
+    """
+    db.session.execute(select(Task.id).where(Task.id == task.id).with_for_update())
+    return create_requisitions(
+        org_id, task.project_id, warehouse_id, task_material_needs(task.id), task_id=task.id, user_id=user_id
+    )
+
+
+def issue_requisition(org_id, requisition, quantity=None, user_id=None):
+    """Issue quantity (default: all outstanding) of an open requisition to its project.
+
+    On-hand and reserved stock both drop by the quantity, and the task material's
+    consumed quantity rises by it. Raises RequisitionConflict if the requisition
+    is closed, holds less than quantity, or (with no quantity) has nothing outstanding.
+    """
+    outstanding = (requisition.quantity_reserved or ZERO) - (requisition.quantity_issued or ZERO)
+    if quantity is None:
+        if outstanding <= 0:
+            raise RequisitionConflict("Requisition has nothing outstanding to issue")
+        quantity = outstanding
+    quantity = Decimal(str(quantity))
+    if quantity <= 0:
+        raise ValueError("quantity must be positive")
+    result = db.session.execute(
+        update(ProjectRequisition)
+        .where(
+            ProjectRequisition.id == requisition.id,
+            ProjectRequisition.status.in_(OPEN_STATUSES),
+            ProjectRequisition.quantity_reserved - ProjectRequisition.quantity_issued >= quantity,
+        )
+        .values(
+            quantity_issued=ProjectRequisition.quantity_issued + quantity,
+            status=case(
+                (ProjectRequisition.quantity_issued + quantity >= ProjectRequisition.quantity_reserved, "issued"),
+                else_="partial",
+            ),
+            updated_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise RequisitionConflict("Requisition is not open or has less than that outstanding")
+    post_movements(org_id, [
+        movement(requisition.warehouse_id, requisition.sku_id, "issue", -quantity, -quantity,
+                 reference_type=REFERENCE_TYPE, reference_id=requisition.id)
+    ], user_id=user_id)
+    if requisition.task_id:
+        db.session.execute(
+            update(TaskMaterial)
+            .where(TaskMaterial.task_id == requisition.task_id, TaskMaterial.sku_id == requisition.sku_id)
+            .values(quantity_consumed=TaskMaterial.quantity_consumed + quantity, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+    return quantity
+
+
+def cancel_requisition(org_id, requisition, user_id=None):
+    """Close an open requisition and release what it still holds. Returns the released quantity."""
+    issued = requisition.quantity_issued or ZERO
+    result = db.session.execute(
+        update(ProjectRequisition)
+        .where(
+            ProjectRequisition.id == requisition.id,
+            ProjectRequisition.status.in_(OPEN_STATUSES),
+            ProjectRequisition.quantity_issued == issued,
+        )
+        .values(status="cancelled", updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise RequisitionConflict("Requisition is not open")
+    released = (requisition.quantity_reserved or ZERO) - issued
+    if released > 0:
+        post_movements(org_id, [
+            movement(requisition.warehouse_id, requisition.sku_id, "reservation", reserved_delta=-released,
+                     reference_type=REFERENCE_TYPE, reference_id=requisition.id)
+        ], user_id=user_id)
+    return released
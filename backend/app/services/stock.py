@@ -0,0 +1,307 @@
+"""Stock ledger: every change to on-hand or reserved quantity is a StockMovement.
+
+post_movements() appends the movements and applies them to StockLevel (and to
+StockValuation, see app.services.valuation) in the same transaction. It uses
+one INSERT ... ON CONFLICT DO UPDATE that adds the deltas (quantity =
+quantity + delta) instead of writing back a value read earlier. Concurrent
+writers queue on the row lock and each increment lands; none is lost. Rows
+are touched in (warehouse, sku) order so two writers cannot deadlock on each
+other. StockLevel is only a projection: rebuild_levels()
+re-derives it from the ledger.
+
+reserve_stock() is the exception to blind increments: a reservation only lands
+if enough is available, checked in the UPDATE's WHERE clause.
+
+low_stock() finds levels at or below their reorder point in one query.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from sqlalchemy import bindparam, func, insert, literal, select, tuple_, union_all, update
+
+from app.extensions import db
+from app.models import Sku, StockLevel, StockMovement, Warehouse
+from app.models.base import generate_uuid
+from app.services.atp import publish_atp
+from app.services.valuation import apply_valuation
+from app.utils.db_utils import dialect_insert
+from app.utils.invalidation import publish
+
+ZERO = Decimal(0)
+
+
+class InsufficientStock(Exception):
+    """A movement would take available quantity (on hand minus reserved) below zero."""
+
+    def __init__(self, shortages):
+        super().__init__("Insufficient stock")
+        self.shortages = shortages  # [{"warehouse_id", "sku_id", "available"}]
+
+
+def movement(warehouse_id, sku_id, movement_type, quantity_delta=ZERO, reserved_delta=ZERO,
+             reference_type=None, reference_id=None, note="", unit_cost=None):
+    """A movement dict for post_movements(). unit_cost values an inflow (see app.services.valuation)."""
+    if movement_type not in StockMovement.TYPES:
+        raise ValueError(f"movement_type must be one of {', '.join(StockMovement.TYPES)}")
+    return {
+        "warehouse_id": warehouse_id,
+        "sku_id": sku_id,
+        "movement_type": movement_type,
+        "quantity_delta": Decimal(str(quantity_delta)),
+        "reserved_delta": Decimal(str(reserved_delta)),
+        "reference_type": reference_type,
+        "reference_id": reference_id,
+        "unit_cost": Decimal(str(unit_cost)) if unit_cost is not None else None,
+        "transfer_value": None,  # set by apply_valuation() on transfers in
+        "note": note or "",
+    }
+
+
+def apply_deltas(deltas):
+    """Add {(warehouse_id, sku_id): (quantity_delta, reserved_delta)} to StockLevel, creating missing rows."""
+    if not deltas:
+        return
+    rows = [
+        {
+            "id": generate_uuid(),
+            "warehouse_id": warehouse_id,
+            "sku_id": sku_id,
+            "quantity": quantity,
+            "reserved_quantity": reserved,
+            "reorder_point": ZERO,
+        }
+        for (warehouse_id, sku_id), (quantity, reserved) in sorted(deltas.items())
+    ]
+    stmt = dialect_insert(StockLevel)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["warehouse_id", "sku_id"],
+        set_={
+            "quantity": StockLevel.quantity + stmt.excluded.quantity,
+            "reserved_quantity": StockLevel.reserved_quantity + stmt.excluded.reserved_quantity,
+            "updated_at": func.now(),
+        },
+    )
+    db.session.execute(stmt, rows)
+
+
+def _shortages(keys):
+    """Keys whose level now has quantity - reserved_quantity < 0 (rows are locked by our update)."""
+    if not keys:
+        return []
+    available = StockLevel.quantity - StockLevel.reserved_quantity
+    rows = db.session.execute(
+        select(StockLevel.warehouse_id, StockLevel.sku_id, available)
+        .where(tuple_(StockLevel.warehouse_id, StockLevel.sku_id).in_(sorted(keys)), available < 0)
+    ).all()
+    return [{"warehouse_id": w, "sku_id": s, "available": float(a)} for w, s, a in rows]
+
+
+def _ledger_rows(org_id, movements, user_id):
+    return [
+        {**m, "id": generate_uuid(), "organization_id": org_id, "created_by_user_id": user_id, "valuation_seq": None}
+        for m in movements
+    ]
+
+
+def _insert_movements(org_id, movements, user_id):
+    rows = _ledger_rows(org_id, movements, user_id)
+    db.session.execute(insert(StockMovement), rows)
+    return rows
+
+
+def post_movements(org_id, movements, user_id=None, require_available=False):
+    """Append movements to the ledger and apply them to StockLevel, in the current transaction.
+
+    With require_available, raises InsufficientStock (the caller rolls back) if
+    any movement that takes stock out leaves its level with negative
+    available quantity. Returns the inserted movement rows.
+    """
+    if not movements:
+        return []
+    rows = _ledger_rows(org_id, movements, user_id)
+    deltas = defaultdict(lambda: (ZERO, ZERO))
+    outgoing = set()
+    for m in rows:
+        key = (m["warehouse_id"], m["sku_id"])
+        quantity, reserved = deltas[key]
+        deltas[key] = (quantity + m["quantity_delta"], reserved + m["reserved_delta"])
+        if m["quantity_delta"] < 0 or m["reserved_delta"] > 0:
+            outgoing.add(key)
+    apply_deltas(deltas)
+    apply_valuation(rows)  # numbers the rows (valuation_seq), so they are inserted after it
+    db.session.execute(insert(StockMovement), rows)
+    if require_available:
+        shortages = _shortages(outgoing)
+        if shortages:
+            raise InsufficientStock(shortages)
+    publish(org_id, "stock_levels")
+    publish_atp(org_id, (sku_id for _, sku_id in deltas))
+    return rows
+
+
+def reserve_stock(org_id, movements, user_id=None):
+    """Post reservation movements (reserved_delta > 0) only where enough stock is available.
+
+    Each (warehouse, sku) total is applied as one conditional UPDATE:
+    reserved_quantity = reserved_quantity + :qty WHERE quantity - reserved_quantity >= :qty.
+    The check and the increment are a single statement on the row, so parallel
+    reservations can never over-allocate, and no SELECT ... FOR UPDATE round trip
+    is needed. Raises InsufficientStock (the caller rolls back) listing every key
+    that fell short. Returns the inserted movement rows.
+    """
+    if not movements:
+        return []
+    totals = defaultdict(lambda: ZERO)
+    for m in movements:
+        if m["reserved_delta"] <= 0 or m["quantity_delta"] != 0:
+            raise ValueError("reserve_stock only takes positive reservations")
+        totals[(m["warehouse_id"], m["sku_id"])] += m["reserved_delta"]
+    short = {}
+    for (warehouse_id, sku_id), quantity in sorted(totals.items()):
+        result = db.session.execute(
+            update(StockLevel)
+            .where(
+                StockLevel.warehouse_id == warehouse_id,
+                StockLevel.sku_id == sku_id,
+                StockLevel.quantity - StockLevel.reserved_quantity >= quantity,
+            )
+            .values(reserved_quantity=StockLevel.reserved_quantity + quantity, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            short[(warehouse_id, sku_id)] = quantity
+    if short:
+        available = {
+            (w, s): a for w, s, a in db.session.execute(
+                select(StockLevel.warehouse_id, StockLevel.sku_id, StockLevel.quantity - StockLevel.reserved_quantity)
+                .where(tuple_(StockLevel.warehouse_id, StockLevel.sku_id).in_(sorted(short)))
+            )
+        }
+        raise InsufficientStock([
+            {"warehouse_id": w, "sku_id": s, "requested": float(q), "available": float(available.get((w, s)) or 0)}
+            for (w, s), q in sorted(short.items())
+        ])
+    rows = _insert_movements(org_id, movements, user_id)
+    publish(org_id, "stock_levels")
+    publish_atp(org_id, (sku_id for _, sku_id in totals))
+    return rows
+
+
+def get_level(warehouse_id, sku_id):
+    """The current StockLevel row, refreshed past anything cached in the session."""
+    return (
+        StockLevel.query.filter_by(warehouse_id=warehouse_id, sku_id=sku_id)
+        .execution_options(populate_existing=True)
+        .first()
+    )
+
+
+def rebuild_levels(org_id=None, dry_run=False):
+    """Re-derive StockLevel quantities from the ledger and fix rows that drifted.
+
+    Returns {"checked", "mismatched", "created", "diffs"} where diffs lists up to
+    100 mismatches as {"warehouse_id", "sku_id", "level": [q, r], "ledger": [q, r]}.
+    """
+    ledger_q = select(
+        StockMovement.organization_id, StockMovement.warehouse_id, StockMovement.sku_id,
+        func.sum(StockMovement.quantity_delta), func.sum(StockMovement.reserved_delta),
+    ).group_by(StockMovement.organization_id, StockMovement.warehouse_id, StockMovement.sku_id)
+    levels_q = select(StockLevel.id, Warehouse.organization_id, StockLevel.warehouse_id, StockLevel.sku_id,
+                      StockLevel.quantity, StockLevel.reserved_quantity).join(Warehouse)
+    if org_id:
+        ledger_q = ledger_q.where(StockMovement.organization_id == org_id)
+        levels_q = levels_q.where(Warehouse.organization_id == org_id)
+    ledger, owners = {}, {}
+    for o, w, s, q, r in db.session.execute(ledger_q):
+        ledger[(w, s)] = (Decimal(q or 0), Decimal(r or 0))
+        owners[(w, s)] = o
+
+    updates, diffs, changed, checked = [], [], set(), 0
+    for level_id, o, w, s, quantity, reserved in db.session.execute(levels_q):
+        checked += 1
+        expected = ledger.pop((w, s), (ZERO, ZERO))
+        actual = (quantity or ZERO, reserved or ZERO)
+        if actual != expected:
+            updates.append({"_id": level_id, "quantity": expected[0], "reserved_quantity": expected[1]})
+            changed.add((o, s))
+            diffs.append({"warehouse_id": w, "sku_id": s, "level": [float(x) for x in actual],
+                          "ledger": [float(x) for x in expected]})
+    missing = {key: value for key, value in ledger.items() if value != (ZERO, ZERO)}
+    for (w, s), expected in missing.items():
+        changed.add((owners[(w, s)], s))
+        diffs.append({"warehouse_id": w, "sku_id": s, "level": None, "ledger": [float(x) for x in expected]})
+
+    if not dry_run:
+        if updates:
+            db.session.execute(
+                update(StockLevel.__table__)
+                .where(StockLevel.__table__.c.id == bindparam("_id"))
+                .values(quantity=bindparam("quantity"), reserved_quantity=bindparam("reserved_quantity"),
+                        updated_at=func.now()),
+                updates,
+            )
+        apply_deltas(missing)
+        for o in {o for o, _ in changed}:
+            publish(o, "stock_levels")
+            publish_atp(o, (s for owner, s in changed if owner == o))
+        db.session.commit()
+    return {"checked": checked, "mismatched": len(updates), "created": len(missing), "diffs": diffs[:100]}
+
+
+def low_stock(org_id, warehouse_id=None):
+    """Stock levels whose available quantity is at or below the effective reorder point.
+
+    The effective reorder point is StockLevel.reorder_point when set (> 0), else
+    Sku.reorder_point. The two cases are separate branches of one UNION ALL so
+    each can use its partial index (ix_stock_levels_below_reorder and
+    ix_skus_org_reorder_point). Returns dicts ordered by warehouse and SKU code,
+    with suggested_quantity = max(Sku.reorder_quantity, shortfall).
+    """
+    available = StockLevel.quantity - StockLevel.reserved_quantity
+    columns = (
+        StockLevel.id.label("stock_level_id"), StockLevel.warehouse_id, StockLevel.sku_id,
+        Warehouse.code.label("warehouse_code"), Warehouse.name.label("warehouse_name"),
+        Sku.code.label("sku_code"), Sku.name.label("sku_name"), Sku.unit, Sku.reorder_quantity,
+        StockLevel.quantity, StockLevel.reserved_quantity,
+    )
+
+    def branch(reorder_point, source, *conditions):
+        q = (
+            select(*columns, reorder_point.label("reorder_point"), literal(source).label("source"))
+            .join(Warehouse, Warehouse.id == StockLevel.warehouse_id)
+            .join(Sku, Sku.id == StockLevel.sku_id)
+            .where(Warehouse.organization_id == org_id, Sku.is_active.is_(True), *conditions)
+        )
+        return q.where(StockLevel.warehouse_id == warehouse_id) if warehouse_id else q
+
+    level_override = branch(
+        StockLevel.reorder_point, "stock_level",
+        StockLevel.reorder_point > 0,
+        # Same expression as the index: available - reorder_point <= 0
+        StockLevel.quantity - StockLevel.reserved_quantity - StockLevel.reorder_point <= 0,
+    )
+    sku_default = branch(
+        Sku.reorder_point, "sku",
+        func.coalesce(StockLevel.reorder_point, 0) <= 0,
+        Sku.reorder_point > 0,
+        available <= Sku.reorder_point,
+    )
+    combined = union_all(level_override, sku_default).subquery()
+    rows = db.session.execute(
+        select(combined).order_by(combined.c.warehouse_code, combined.c.sku_code)
+    ).mappings()
+
+    results = []
+    for row in rows:
+        quantity = row["quantity"] or ZERO
+        reserved = row["reserved_quantity"] or ZERO
+        reorder_point = Decimal(row["reorder_point"] or 0)
+        shortfall = reorder_point - (quantity - reserved)
+        results.append({
+            **row,
+            "available_quantity": quantity - reserved,
+            "reorder_point": reorder_point,
+            "shortfall": shortfall,
+            "suggested_quantity": max(Decimal(row["reorder_quantity"] or 0), shortfall),
+        })
+    return results
@@ -0,0 +1,215 @@
+"""Stock on hand as of a past date, from periodic checkpoints plus the ledger.
+
+A checkpoint (StockCheckpoint) holds every non-zero stock level of an
+organization at the end of one day, in UTC: the movements created before its
+cutoff, midnight after that day. take_checkpoint() reads the current levels
+minus the movements posted since the cutoff in one statement, so the rows are
+consistent with each other, and writes them with bulk inserts. Job workers
+take them per STOCK_CHECKPOINT_PERIOD: "daily" (yesterday) or "monthly" (the
+last day of the previous month).
+
+A movement's created_at is its transaction's start, so a transaction that
+began before the cutoff and commits after the checkpoint is read would be in
+neither the levels nor the subtraction, and every answer built from that
+checkpoint would miss it. Checkpoints are therefore only taken
+STOCK_CHECKPOINT_DELAY_SECONDS after the cutoff, which must stay above the
+longest transaction that writes stock.
+
+levels_as_of() starts from the nearest checkpoint, the latest on or before the
+date if there is one, else the earliest after it, and applies the movements
+between its cutoff and the date's, forwards or backwards. That is one
+checkpoint read plus a range scan on ix_stock_movements_org_created_at
+bounded by the checkpoint period. Without any checkpoint it works backwards
+from the current levels.
+"""
+import logging
+from datetime import datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import and_, func, insert, select, update
+
+from app.extensions import db
+from app.models import Organization, StockCheckpoint, StockCheckpointLevel, StockLevel, StockMovement, Warehouse
+from app.models.base import generate_uuid
+from app.utils.db_utils import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("daily", "monthly")
+INSERT_CHUNK = 5000
+ZERO = Decimal(0)
+
+
+def cutoff_for(day):
+    """Midnight UTC after day: a checkpoint for day covers the movements created before it."""
+    return datetime.combine(day + timedelta(days=1), time.min, tzinfo=timezone.utc)
+
+
+def _delay():
+    return timedelta(seconds=current_app.config.get("STOCK_CHECKPOINT_DELAY_SECONDS", 3600))
+
+
+def due_date(period, now=None):
+    """The day the latest checkpoint of this period should cover: yesterday, or the end of last month,
+    counted from STOCK_CHECKPOINT_DELAY_SECONDS ago."""
+    today = ((now or datetime.now(timezone.utc)) - _delay()).date()
+    if period == "monthly":
+        return today.replace(day=1) - timedelta(days=1)
+    return today - timedelta(days=1)
+
+
+def take_checkpoint(org_id, day):
+    """Write the checkpoint of an organization for the end of day, in the current transaction.
+
+    Returns the new StockCheckpoint, or None if that day already has one. day must have ended
+    at least STOCK_CHECKPOINT_DELAY_SECONDS ago.
+    """
+    cutoff = cutoff_for(day)
+    if cutoff + _delay() > datetime.now(timezone.utc):
+        raise ValueError("A checkpoint can only be taken STOCK_CHECKPOINT_DELAY_SECONDS after its day has ended")
+    checkpoint_id = db.session.execute(
+        dialect_insert(StockCheckpoint)
+        .values(id=generate_uuid(), organization_id=org_id, snapshot_date=day, cutoff=cutoff, level_count=0)
+        .on_conflict_do_nothing(index_elements=["organization_id", "snapshot_date"])
+        .returning(StockCheckpoint.id)
+    ).scalar()
+    if checkpoint_id is None:
+        return None
+
+    since = (
+        select(StockMovement.warehouse_id, StockMovement.sku_id,
+               func.sum(StockMovement.quantity_delta).label("quantity"),
+               func.sum(StockMovement.reserved_delta).label("reserved"))
+        .where(StockMovement.organization_id == org_id, StockMovement.created_at >= cutoff)
+        .group_by(StockMovement.warehouse_id, StockMovement.sku_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(
+            StockLevel.warehouse_id, StockLevel.sku_id,
+            func.coalesce(StockLevel.quantity, 0) - func.coalesce(since.c.quantity, 0),
+            func.coalesce(StockLevel.reserved_quantity, 0) - func.coalesce(since.c.reserved, 0),
+        )
+        .join(Warehouse, Warehouse.id == StockLevel.warehouse_id)
+        .outerjoin(since, and_(since.c.warehouse_id == StockLevel.warehouse_id, since.c.sku_id == StockLevel.sku_id))
+        .where(Warehouse.organization_id == org_id)
+    ).all()
+    levels = [
+        {"id": generate_uuid(), "checkpoint_id": checkpoint_id, "warehouse_id": warehouse_id, "sku_id": sku_id,
+         "quantity": quantity, "reserved_quantity": reserved}
+        for warehouse_id, sku_id, quantity, reserved in rows
+        if quantity or reserved
+    ]
+    for start in range(0, len(levels), INSERT_CHUNK):
+        db.session.execute(insert(StockCheckpointLevel), levels[start:start + INSERT_CHUNK])
+    db.session.execute(
+        update(StockCheckpoint).where(StockCheckpoint.id == checkpoint_id).values(level_count=len(levels))
+        .execution_options(synchronize_session=False)
+    )
+    return db.session.get(StockCheckpoint, checkpoint_id)
+
+
+def take_due_checkpoints(now=None):
+    """Take the due checkpoint (see due_date) for every organization that lacks it, committing per organization.
+
+    Called periodically by job workers; a no-op when STOCK_CHECKPOINT_PERIOD is not "daily" or "monthly".
+    Returns the number of checkpoints written.
+    """
+    period = current_app.config.get("STOCK_CHECKPOINT_PERIOD", "daily")
+    if period not in PERIODS:
+        return 0
+    day = due_date(period, now)
+    done = select(StockCheckpoint.organization_id).where(StockCheckpoint.snapshot_date == day)
+    org_ids = db.session.execute(select(Organization.id).where(Organization.id.notin_(done))).scalars().all()
+    taken = 0
+    for org_id in org_ids:
+        try:
+            taken += take_checkpoint(org_id, day) is not None
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logger.exception("Stock checkpoint for %s on %s failed", org_id, day)
+    return taken
+
+
+def _checkpoint_levels(checkpoint_id, warehouse_id=None):
+    q = select(StockCheckpointLevel.warehouse_id, StockCheckpointLevel.sku_id,
+               StockCheckpointLevel.quantity, StockCheckpointLevel.reserved_quantity
+               ).where(StockCheckpointLevel.checkpoint_id == checkpoint_id)
+    if warehouse_id:
+        q = q.where(StockCheckpointLevel.warehouse_id == warehouse_id)
+    return {(w, s): (Decimal(quantity), Decimal(reserved)) for w, s, quantity, reserved in db.session.execute(q)}
+
+
+def _current_levels(org_id, warehouse_id=None):
+    q = (
+        select(StockLevel.warehouse_id, StockLevel.sku_id, StockLevel.quantity, StockLevel.reserved_quantity)
+        .join(Warehouse, Warehouse.id == StockLevel.warehouse_id)
+        .where(Warehouse.organization_id == org_id)
+    )
+    if warehouse_id:
+        q = q.where(StockLevel.warehouse_id == warehouse_id)
+    return {(w, s): (Decimal(quantity or 0), Decimal(reserved or 0)) for w, s, quantity, reserved in db.session.execute(q)}
+
+
+def _movement_totals(org_id, start=None, end=None, warehouse_id=None):
+    """(warehouse_id, sku_id, quantity, reserved) rows summed over the movements created in [start, end)."""
+    q = (
+        select(StockMovement.warehouse_id, StockMovement.sku_id,
+               func.sum(StockMovement.quantity_delta), func.sum(StockMovement.reserved_delta))
+        .where(StockMovement.organization_id == org_id)
+        .group_by(StockMovement.warehouse_id, StockMovement.sku_id)
+    )
+    if start is not None:
+        q = q.where(StockMovement.created_at >= start)
+    if end is not None:
+        q = q.where(StockMovement.created_at < end)
+    if warehouse_id:
+        q = q.where(StockMovement.warehouse_id == warehouse_id)
+    return db.session.execute(q).all()
+
+
+def levels_as_of(org_id, day, warehouse_id=None):
+    """Stock levels at the end of day (UTC): [{"warehouse_id", "sku_id", "quantity", "reserved_quantity",
+    "available_quantity", "as_of"}], non-zero levels only, plus the checkpoint date used (None: current levels).
+    """
+    cutoff = cutoff_for(day)
+    checkpoint = db.session.execute(
+        select(StockCheckpoint)
+        .where(StockCheckpoint.organization_id == org_id, StockCheckpoint.snapshot_date <= day)
+        .order_by(StockCheckpoint.snapshot_date.desc()).limit(1)
+    ).scalar_one_or_none()
+    if checkpoint is not None:
+        levels = _checkpoint_levels(checkpoint.id, warehouse_id)
+        deltas, sign = _movement_totals(org_id, checkpoint.cutoff, cutoff, warehouse_id), 1
+    else:
+        checkpoint = db.session.execute(
+            select(StockCheckpoint)
+            .where(StockCheckpoint.organization_id == org_id, StockCheckpoint.snapshot_date > day)
+            .order_by(StockCheckpoint.snapshot_date).limit(1)
+        ).scalar_one_or_none()
+        if checkpoint is not None:
+            levels = _checkpoint_levels(checkpoint.id, warehouse_id)
+            deltas = _movement_totals(org_id, cutoff, checkpoint.cutoff, warehouse_id)
+        else:
+            levels = _current_levels(org_id, warehouse_id)
+            deltas = _movement_totals(org_id, start=cutoff, warehouse_id=warehouse_id)
+        sign = -1
+
+    for w, s, quantity, reserved in deltas:
+        on_hand, held = levels.get((w, s), (ZERO, ZERO))
+        levels[(w, s)] = (on_hand + sign * Decimal(quantity or 0), held + sign * Decimal(reserved or 0))
+    rows = [
+        {
+            "warehouse_id": w,
+            "sku_id": s,
+            "quantity": float(quantity),
+            "reserved_quantity": float(reserved),
+            "available_quantity": float(quantity - reserved),
+            "as_of": day.isoformat(),
+        }
+        for (w, s), (quantity, reserved) in sorted(levels.items())
+        if quantity or reserved
+    ]
+    return rows, checkpoint.snapshot_date if checkpoint is not None else None
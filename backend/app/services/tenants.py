@@ -0,0 +1,584 @@
+"""Tenant-level data operations: backup, restore, cloning and deletion of one organization.
+
+TENANT_TABLES lists every table holding organization data in foreign-key
+order, with how each one is scoped to its organization (an organization_id
+column, or a parent table it hangs off). Operational tables (jobs, outbox,
+idempotency keys, ...) are not tenant data and are left out.
+
+A backup is a zip archive with one member per table, either NDJSON or
+PostgreSQL COPY text format, plus manifest.json (written last) listing the
+tables, their columns and row counts. Members are written as they are read,
+from a single REPEATABLE READ snapshot, so the archive is consistent and
+memory stays flat.
+
+Restore loads the tables in manifest order inside one transaction, with
+COPY on PostgreSQL. With remap=True every tenant id is replaced by a
+deterministic uuid5 of (salt, old id), so foreign keys stay consistent
+without an id map in memory, and the copy can live next to the original:
+the organization gets a new code, user e-mails get a +<code> tag and Google
+links are dropped. Columns that close a reference cycle (lead -> customer /
+project) are loaded as NULL and set once every table is in.
+
+Clone copies an organization inside the database without going through
+Python rows: a temporary id map (old id -> fresh random id) is filled with
+one INSERT ... SELECT per table, then every table is copied with one
+INSERT ... SELECT that joins each id column through the map. The same
+renaming as a remapped restore applies.
+
+Deletion (offboarding) empties the tenant tables in reverse foreign-key
+order, TENANT_DELETE_CHUNK_SIZE rows per transaction, so no transaction
+holds many locks and no rows are loaded into Python; the organization row
+itself goes last and takes the (by then tiny) ON DELETE CASCADE remainder.
+"""
+import json
+import os
+import uuid
+import zipfile
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import (
+    Boolean, Date, DateTime, Integer, JSON, Numeric, bindparam, column, func, inspect, literal, null, select, table,
+    text, update,
+)
+
+from app.extensions import db
+from app.models import Organization
+from app.services.jobs import job_type
+from app.utils.db_utils import IterStream, copy_text, copy_unescape, delete_in_chunks
+
+FORMAT_VERSION = 1
+FORMATS = ("ndjson", "copy")
+
+
+@dataclass(frozen=True)
+class TenantTable:
+    name: str
+    parent: tuple = None  # (fk column, parent table) when the table has no organization_id
+    deferred: tuple = ()  # FK columns that point forward in the order (reference cycles)
+    refs: tuple = ()  # id columns without a foreign key (polymorphic references) to remap as well
+
+
+TENANT_TABLES = [
+    TenantTable("organizations"),
+    TenantTable("organization_sequences"),
+    TenantTable("users"),
+    TenantTable("roles"),
+    TenantTable("role_permissions", ("role_id", "roles")),
+    TenantTable("user_roles", ("user_id", "users")),
+    TenantTable("employees"),
+    TenantTable("employee_availability", ("employee_id", "employees")),
+    TenantTable("leads", deferred=("converted_customer_id", "converted_project_id")),
+    TenantTable("customers"),
+    TenantTable("customer_contacts", ("customer_id", "customers")),
+    TenantTable("projects"),
+    TenantTable("milestones", ("project_id", "projects")),
+    TenantTable("tasks", ("milestone_id", "milestones")),
+    TenantTable("task_assignments", ("task_id", "tasks")),
+    TenantTable("warehouses"),
+    TenantTable("skus"),
+    TenantTable("task_materials", ("task_id", "tasks")),
+    TenantTable("timesheets"),
+    TenantTable("stock_levels", ("warehouse_id", "warehouses")),
+    TenantTable("stock_movements", refs=("reference_id",)),
+    TenantTable("stock_valuations", ("warehouse_id", "warehouses")),
+    TenantTable("stock_checkpoints"),
+    TenantTable("stock_checkpoint_levels", ("checkpoint_id", "stock_checkpoints")),
+    TenantTable("purchase_orders"),
+    TenantTable("purchase_order_lines", ("purchase_order_id", "purchase_orders")),
+    TenantTable("project_requisitions", ("project_id", "projects")),
+    TenantTable("invoices"),
+    TenantTable("payroll_runs"),
+    TenantTable("payroll_items", ("payroll_run_id", "payroll_runs")),
+]
+TENANT_TABLES_BY_NAME = {t.name: t for t in TENANT_TABLES}
+
+
+def table_for(tenant_table):
+    return db.metadata.tables[tenant_table.name]
+
+
+def scope_condition(tenant_table, org_id):
+    """WHERE clause selecting the organization's rows of a tenant table."""
+    table = table_for(tenant_table)
+    if tenant_table.name == "organizations":
+        return table.c.id == org_id
+    if "organization_id" in table.c:
+        return table.c.organization_id == org_id
+    fk_column, parent_name = tenant_table.parent
+    parent = TENANT_TABLES_BY_NAME[parent_name]
+    parent_ids = select(table_for(parent).c.id).where(scope_condition(parent, org_id))
+    return table.c[fk_column].in_(parent_ids)
+
+
+def id_columns(table):
+    """Columns holding tenant row ids: the table's own UUID id, FKs into tenant tables and declared refs."""
+    refs = TENANT_TABLES_BY_NAME[table.name].refs if table.name in TENANT_TABLES_BY_NAME else ()
+    names = []
+    for col in table.columns:
+        if col.name == "id" and col.primary_key:
+            names.append(col.name)
+        elif col.name in refs:
+            names.append(col.name)
+        elif any(fk.column.table.name in TENANT_TABLES_BY_NAME for fk in col.foreign_keys):
+            names.append(col.name)
+    return names
+
+
+def _is_postgres(conn):
+    return conn.dialect.name == "postgresql"
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _schema_revision(conn):
+    if not inspect(conn).has_table("alembic_version"):
+        return None
+    return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+# --- backup -----------------------------------------------------------------
+
+def _dump_copy(conn, stmt, out):
+    compiled = stmt.compile(dialect=conn.dialect)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        sql = cursor.mogrify(str(compiled), compiled.params).decode()
+        cursor.copy_expert(f"COPY ({sql}) TO STDOUT", out)
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def _dump_ndjson(conn, stmt, out, batch_size):
+    count = 0
+    result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+    for partition in result.partitions(batch_size):
+        out.write("".join(json.dumps({k: _plain(v) for k, v in row._mapping.items()}) + "\n" for row in partition).encode())
+        count += len(partition)
+    return count
+
+
+def dump_tenant(org_id, fileobj, fmt="ndjson", progress=None):
+    """Write a backup archive of one organization to fileobj (which need not be seekable).
+
+    Returns the manifest. progress(done, total, table_name) is called after each table.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    batch_size = current_app.config.get("EXPORT_BATCH_SIZE", 2000)
+    with db.engine.connect() as conn:
+        if _is_postgres(conn):
+            conn = conn.execution_options(isolation_level="REPEATABLE READ")
+        elif fmt == "copy":
+            raise ValueError("COPY format backups need PostgreSQL")
+        with conn.begin():
+            org = conn.execute(select(Organization.__table__).where(Organization.__table__.c.id == org_id)).first()
+            if org is None:
+                raise LookupError("Organization not found")
+            manifest = {
+                "format_version": FORMAT_VERSION,
+                "format": fmt,
+                "organization_id": org_id,
+                "organization_code": org.code,
+                "schema_revision": _schema_revision(conn),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "tables": [],
+            }
+            with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                for i, tenant_table in enumerate(TENANT_TABLES, start=1):
+                    table = table_for(tenant_table)
+                    stmt = select(table).where(scope_condition(tenant_table, org_id))
+                    member = f"{tenant_table.name}.{fmt}"
+                    with archive.open(member, "w", force_zip64=True) as out:
+                        if fmt == "copy":
+                            rows = _dump_copy(conn, stmt, out)
+                        else:
+                            rows = _dump_ndjson(conn, stmt, out, batch_size)
+                    manifest["tables"].append({
+                        "name": tenant_table.name,
+                        "file": member,
+                        "columns": [c.name for c in table.columns],
+                        "rows": rows,
+                    })
+                    if progress is not None:
+                        progress(i, len(TENANT_TABLES), tenant_table.name)
+                archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+    return manifest
+
+
+# --- restore ----------------------------------------------------------------
+
+def remapped_id(salt, old_id):
+    return str(uuid.uuid5(uuid.NAMESPACE_OID, f"{salt}:{old_id}"))
+
+
+def _tag_email(email, code):
+    local, _, domain = email.partition("@")
+    return f"{local}+{code.lower()}@{domain}" if domain else f"{email}+{code.lower()}"
+
+
+def _python_value(column, raw):
+    """COPY text field -> value for a generic (non-COPY) insert."""
+    value = copy_unescape(raw)
+    if value is None:
+        return None
+    column_type = column.type
+    if isinstance(column_type, Boolean):
+        return value in ("t", "true", "True", "1")
+    if isinstance(column_type, DateTime):
+        return datetime.fromisoformat(value.replace(" ", "T"))
+    if isinstance(column_type, Date):
+        return date.fromisoformat(value[:10])
+    if isinstance(column_type, Numeric):
+        return Decimal(value)
+    if isinstance(column_type, Integer):
+        return int(value)
+    if isinstance(column_type, JSON):
+        return json.loads(value)
+    return value
+
+
+class _RowRewriter:
+    """Turns archive lines into COPY text fields, applying id remapping and overrides."""
+
+    def __init__(self, tenant_table, columns, fmt, salt=None, overrides=None):
+        table = table_for(tenant_table)
+        self.columns = columns
+        self.fmt = fmt
+        self.salt = salt
+        remap = set(id_columns(table)) if salt else set()
+        self.remap_idx = [i for i, c in enumerate(columns) if c in remap]
+        self.deferred_idx = [i for i, c in enumerate(columns) if c in tenant_table.deferred]
+        self.override_idx = [(columns.index(c), fn) for c, fn in (overrides or {}).items() if c in columns]
+        self.pk_idx = columns.index("id") if "id" in columns else None
+        self.deferred = []  # (id, {column: value}) to apply after all tables are loaded
+
+    def fields(self, line):
+        if self.fmt == "copy":
+            fields = line.decode().rstrip("\n").split("\t")
+        else:
+            row = json.loads(line)
+            fields = [copy_text(row.get(c)) for c in self.columns]
+        for i in self.remap_idx:
+            if fields[i] != r"\N":
+                fields[i] = remapped_id(self.salt, fields[i])
+        for i, fn in self.override_idx:
+            fields[i] = copy_text(fn(copy_unescape(fields[i])))
+        if self.deferred_idx:
+            values = {self.columns[i]: fields[i] for i in self.deferred_idx if fields[i] != r"\N"}
+            if values:
+                self.deferred.append((fields[self.pk_idx], values))
+                for i in self.deferred_idx:
+                    fields[i] = r"\N"
+        return fields
+
+
+def _load_copy(conn, table_name, columns, rows):
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        stream = IterStream(("\t".join(fields) + "\n").encode() for fields in rows)
+        cursor.copy_expert(f"COPY {table_name} ({', '.join(columns)}) FROM STDIN", stream)
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def _load_generic(conn, table, columns, rows, batch_size=1000):
+    count, batch = 0, []
+    table_columns = [table.c[c] for c in columns]
+    for fields in rows:
+        batch.append({c.name: _python_value(c, f) for c, f in zip(table_columns, fields)})
+        if len(batch) >= batch_size:
+            conn.execute(table.insert(), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.execute(table.insert(), batch)
+        count += len(batch)
+    return count
+
+
+def restore_tenant(path, remap=False, code=None, name=None, progress=None):
+    """Load a backup archive. Returns {"organization_id", "rows", "tables"}.
+
+    Without remap the organization is restored under its original ids and must
+    not exist. With remap it is restored as a new organization (code required).
+    """
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read("manifest.json"))
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError("Unsupported backup format version")
+        fmt = manifest["format"]
+        old_org_id = manifest["organization_id"]
+        salt = uuid.uuid4().hex if remap else None
+        org_id = remapped_id(salt, old_org_id) if remap else old_org_id
+        overrides = {}
+        if remap:
+            if not code:
+                raise ValueError("A new organization code is required when remapping ids")
+            code = code.strip().upper()
+            overrides["organizations"] = {"code": lambda _: code}
+            if name:
+                overrides["organizations"]["name"] = lambda _: name
+            overrides["users"] = {"email": lambda e: _tag_email(e, code), "google_id": lambda _: None}
+        if db.session.get(Organization, org_id) is not None:
+            raise ValueError("Organization already exists; restore with remap=True to load a copy")
+        if remap and Organization.query.filter_by(code=code).first():
+            raise ValueError(f"Organization code {code} is already taken")
+        db.session.rollback()
+
+        total_rows = 0
+        with db.engine.begin() as conn:
+            use_copy = _is_postgres(conn)
+            if fmt == "copy" and not use_copy:
+                raise ValueError("COPY format backups need PostgreSQL")
+            rewriters = []
+            for i, entry in enumerate(manifest["tables"], start=1):
+                tenant_table = TENANT_TABLES_BY_NAME[entry["name"]]
+                table = table_for(tenant_table)
+                columns = [c for c in entry["columns"] if c in table.c]
+                dropped = [j for j, c in enumerate(entry["columns"]) if c not in table.c]
+                rewriter = _RowRewriter(tenant_table, entry["columns"], fmt, salt, overrides.get(entry["name"]))
+                rewriters.append((table, rewriter))
+                with archive.open(entry["file"]) as member:
+                    rows = (rewriter.fields(line) for line in member if line.strip())
+                    if dropped:
+                        rows = ([f for j, f in enumerate(fields) if j not in dropped] for fields in rows)
+                    if use_copy:
+                        total_rows += _load_copy(conn, table.name, columns, rows)
+                    else:
+                        total_rows += _load_generic(conn, table, columns, rows)
+                if progress is not None:
+                    progress(i, len(manifest["tables"]), entry["name"])
+            for table, rewriter in rewriters:
+                for pk, values in rewriter.deferred:
+                    conn.execute(
+                        update(table).where(table.c.id == bindparam("_pk")).values(**{c: bindparam(c) for c in values}),
+                        {"_pk": pk, **{c: copy_unescape(v) for c, v in values.items()}},
+                    )
+    return {"organization_id": org_id, "rows": total_rows, "tables": len(manifest["tables"])}
+
+
+# --- clone ------------------------------------------------------------------
+
+CLONE_MAP = table("tenant_clone_ids", column("old_id"), column("new_id"))
+
+
+def _create_clone_map(conn):
+    if _is_postgres(conn):
+        conn.execute(text(
+            "CREATE TEMPORARY TABLE tenant_clone_ids (old_id uuid PRIMARY KEY, new_id uuid NOT NULL) ON COMMIT DROP"
+        ))
+    else:
+        conn.execute(text("DROP TABLE IF EXISTS temp.tenant_clone_ids"))
+        conn.execute(text("CREATE TEMPORARY TABLE tenant_clone_ids (old_id CHAR(32) PRIMARY KEY, new_id CHAR(32) NOT NULL)"))
+
+
+def _random_uuid(conn):
+    """SQL expression for a fresh id in the dialect's native UUID storage."""
+    if _is_postgres(conn):
+        return func.gen_random_uuid()
+    return func.lower(func.hex(func.randomblob(16)))
+
+
+def _clone_overrides(code, name):
+    """{table: {column: function(source column) -> SQL expression}} for the copy's unique columns."""
+    overrides = {
+        "organizations": {"code": lambda _: literal(code)},
+        "users": {"email": lambda c: func.replace(c, "@", f"+{code.lower()}@"), "google_id": lambda _: null()},
+    }
+    if name:
+        overrides["organizations"]["name"] = lambda _: literal(name)
+    return overrides
+
+
+def _clone_select(tenant_table, org_id, overrides):
+    """SELECT producing the copied rows of one table, ids translated through the map."""
+    source = table_for(tenant_table)
+    remap = set(id_columns(source))
+    joined = source
+    values = []
+    for c in source.columns:
+        if c.name in tenant_table.deferred:
+            values.append(null())
+        elif c.name in remap:
+            ids = CLONE_MAP.alias(f"map_{c.name}")
+            on = ids.c.old_id == c
+            joined = joined.join(ids, on) if c.primary_key or not c.nullable else joined.outerjoin(ids, on)
+            # A polymorphic ref may hold an id that is no row's (a transfer's shared reference id): keep it as is.
+            values.append(func.coalesce(ids.c.new_id, c) if c.name in tenant_table.refs else ids.c.new_id)
+        elif c.name in overrides:
+            values.append(overrides[c.name](c))
+        else:
+            values.append(c)
+    return select(*values).select_from(joined).where(scope_condition(tenant_table, org_id))
+
+
+def _restore_deferred(conn, tenant_table, new_org_id):
+    """Point the copy's cycle-closing FKs at the copied rows, in one UPDATE per column."""
+    target = table_for(tenant_table)
+    source = target.alias("source")
+    for name in tenant_table.deferred:
+        own, ref = CLONE_MAP.alias("own"), CLONE_MAP.alias("ref")
+        new_value = (
+            select(ref.c.new_id)
+            .select_from(source.join(own, own.c.old_id == source.c.id).join(ref, ref.c.old_id == source.c[name]))
+            .where(own.c.new_id == target.c.id)
+            .scalar_subquery()
+        )
+        conn.execute(update(target).where(scope_condition(tenant_table, new_org_id)).values({name: new_value}))
+
+
+def clone_tenant(org_id, code, name=None, progress=None):
+    """Copy an organization into a new one with fresh ids, in one transaction.
+
+    Returns {"organization_id", "rows", "tables"}. progress(done, total, table_name)
+    is called after each table is copied.
+    """
+    code = (code or "").strip().upper()
+    if not code:
+        raise ValueError("A code for the new organization is required")
+    if db.session.get(Organization, org_id) is None:
+        raise LookupError("Organization not found")
+    if Organization.query.filter_by(code=code).first():
+        raise ValueError(f"Organization code {code} is already taken")
+    db.session.rollback()
+
+    overrides = _clone_overrides(code, name)
+    total_rows = 0
+    with db.engine.begin() as conn:
+        _create_clone_map(conn)
+        for tenant_table in TENANT_TABLES:
+            source = table_for(tenant_table)
+            if "id" in source.c:
+                conn.execute(CLONE_MAP.insert().from_select(
+                    ["old_id", "new_id"],
+                    select(source.c.id, _random_uuid(conn)).where(scope_condition(tenant_table, org_id)),
+                ))
+        if _is_postgres(conn):
+            conn.execute(text("ANALYZE tenant_clone_ids"))
+        for i, tenant_table in enumerate(TENANT_TABLES, start=1):
+            target = table_for(tenant_table)
+            stmt = target.insert().from_select(
+                [c.name for c in target.columns],
+                _clone_select(tenant_table, org_id, overrides.get(tenant_table.name, {})),
+            )
+            total_rows += conn.execute(stmt).rowcount
+            if progress is not None:
+                progress(i, len(TENANT_TABLES), tenant_table.name)
+        organizations = Organization.__table__
+        new_org_id = conn.execute(select(organizations.c.id).where(organizations.c.code == code)).scalar()
+        for tenant_table in TENANT_TABLES:
+            if tenant_table.deferred:
+                _restore_deferred(conn, tenant_table, new_org_id)
+        if not _is_postgres(conn):
+            conn.execute(text("DROP TABLE temp.tenant_clone_ids"))
+    return {"organization_id": new_org_id, "rows": total_rows, "tables": len(TENANT_TABLES)}
+
+
+# --- delete -----------------------------------------------------------------
+
+def _operational_tables():
+    """Non-tenant tables with an organization_id (outbox, idempotency keys, ...), jobs excluded."""
+    return [
+        t for t in db.metadata.tables.values()
+        if "organization_id" in t.c and t.name not in TENANT_TABLES_BY_NAME and t.name != "jobs"
+    ]
+
+
+def delete_tenant(org_id, chunk_size=None, progress=None):
+    """Delete an organization and all its data in bounded chunks. Returns {table: rows deleted}.
+
+    Users are deactivated first so nobody works in a half-deleted tenant.
+    progress(done, total, table_name) is called after each table.
+    """
+    organizations = Organization.__table__
+    if db.session.get(Organization, org_id) is None:
+        raise LookupError("Organization not found")
+    db.session.rollback()
+    chunk_size = chunk_size or current_app.config.get("TENANT_DELETE_CHUNK_SIZE", 5000)
+    users = table_for(TENANT_TABLES_BY_NAME["users"])
+    with db.engine.begin() as conn:
+        conn.execute(update(users).where(users.c.organization_id == org_id).values(is_active=False))
+
+    steps = _operational_tables() + [table_for(t) for t in reversed(TENANT_TABLES) if t.name != "organizations"]
+    deleted = {}
+    for i, step in enumerate(steps, start=1):
+        tenant_table = TENANT_TABLES_BY_NAME.get(step.name)
+        condition = scope_condition(tenant_table, org_id) if tenant_table else step.c.organization_id == org_id
+        deleted[step.name] = delete_in_chunks(step, condition, chunk_size)
+        if progress is not None:
+            progress(i, len(steps) + 1, step.name)
+    with db.engine.begin() as conn:
+        deleted["organizations"] = conn.execute(organizations.delete().where(organizations.c.id == org_id)).rowcount
+    if progress is not None:
+        progress(len(steps) + 1, len(steps) + 1, "organizations")
+    return deleted
+
+
+# --- jobs -------------------------------------------------------------------
+
+def backup_dir():
+    path = current_app.config.get("TENANT_BACKUP_DIR") or os.path.join(current_app.instance_path, "backups")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@job_type("tenant.backup")
+def backup_job(ctx):
+    """Write a backup of the job's organization into TENANT_BACKUP_DIR."""
+    fmt = ctx.payload.get("format") or "ndjson"
+    filename = f"{ctx.organization_id}-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.zip"
+    path = os.path.join(backup_dir(), filename)
+    with open(path, "wb") as f:
+        manifest = dump_tenant(
+            ctx.organization_id, f, fmt,
+            progress=lambda done, total, table: ctx.report(done * 100 // total, f"{table} ({done}/{total})"),
+        )
+    return {
+        "file": filename,
+        "format": fmt,
+        "bytes": os.path.getsize(path),
+        "rows": sum(t["rows"] for t in manifest["tables"]),
+    }
+
+
+@job_type("tenant.restore")
+def restore_job(ctx):
+    """Restore a backup from TENANT_BACKUP_DIR as a new organization (ids remapped)."""
+    filename = os.path.basename(ctx.payload["file"])
+    if not filename.startswith(ctx.organization_id):
+        raise PermissionError("Backups can only be restored by the organization that made them")
+    path = os.path.join(backup_dir(), filename)
+    return restore_tenant(
+        path, remap=True, code=ctx.payload.get("code"), name=ctx.payload.get("name"),
+        progress=lambda done, total, table: ctx.report(done * 100 // total, f"{table} ({done}/{total})"),
+    )
+
+
+@job_type("tenant.clone")
+def clone_job(ctx):
+    """Copy the job's organization into a new organization (sandbox / training copy)."""
+    return clone_tenant(
+        ctx.organization_id, ctx.payload.get("code"), name=ctx.payload.get("name"),
+        progress=lambda done, total, table: ctx.report(done * 100 // total, f"{table} ({done}/{total})"),
+    )
+
+
+@job_type("tenant.delete")
+def delete_job(ctx):
+    """Offboard the job's organization. The job row is removed with it, so the outcome is only logged."""
+    deleted = delete_tenant(
+        ctx.organization_id,
+        progress=lambda done, total, table: ctx.report(done * 100 // total, f"{table} ({done}/{total})"),
+    )
+    return {"rows": sum(deleted.values()), "tables": deleted}
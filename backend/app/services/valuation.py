@@ -0,0 +1,217 @@
+"""Inventory valuation at weighted-average cost, maintained incrementally.
+
+StockValuation holds quantity and total value per warehouse and SKU.
+apply_valuation() folds every quantity-changing movement into it inside
+post_movements():
+
+- an inflow with a unit_cost (PO receipts, costed receipts) adds quantity * unit_cost
+- an outflow is valued at the current average (total_value / quantity), so it leaves the average unchanged
+- an uncosted inflow (adjustments, PO lines without a price) is also valued at the current average
+- a transfer in adds exactly the value its sending leg took out, as returned by that leg's
+  upsert (last_value_delta), so a transfer moves value without creating or destroying it;
+  the movement records that value as transfer_value, and unit_cost only for display
+
+Each step is a single INSERT ... ON CONFLICT DO UPDATE whose SET computes
+the new value from the row as locked, so concurrent writers compose like
+they do on stock_levels. The report reads this state directly.
+
+The average depends on the order movements are applied in, and neither
+created_at (transaction start) nor id follows the lock order. So every
+step also bumps StockValuation.applied_count and returns it, and the
+movement records it as valuation_seq. verify_valuations() replays the
+ledger from scratch in valuation_seq order with the same rules and diffs
+the result against the maintained state.
+"""
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from sqlalchemy import bindparam, case, func, select, update
+
+from app.extensions import db
+from app.models import Sku, StockMovement, StockValuation, Warehouse
+from app.models.base import generate_uuid
+from app.utils.db_utils import dialect_insert
+
+ZERO = Decimal(0)
+VALUE_PLACES = Decimal("0.0001")
+VALUE_TOLERANCE = Decimal("0.01")  # replay vs. maintained value; numeric division rounds slightly differently
+
+
+def _value(amount):
+    return Decimal(amount).quantize(VALUE_PLACES, rounding=ROUND_HALF_UP)
+
+
+def _transfer_source(m, sources):
+    """The outflow leg a transfer's receiving leg takes its cost from, if it is in the same call."""
+    if m["movement_type"] == "transfer" and m["quantity_delta"] > 0 and m.get("unit_cost") is None:
+        return sources.get(m["reference_id"])
+    return None
+
+
+def apply_valuation(movements):
+    """Fold movements (ledger row dicts, in order) into StockValuation in the current transaction.
+
+    Movements are applied in rounds of one per (warehouse, sku), so several
+    movements for the same key in one call still apply in their given order.
+    The receiving leg of a transfer goes in a round after its sending leg and is
+    adds the value that leg took out of the locked row (last_value_delta).
+    Sets "valuation_seq", and "transfer_value" and "unit_cost" on transfers in; insert the movements afterwards.
+    """
+    rounds, next_round, round_of, sources = [], defaultdict(int), {}, {}
+    for m in movements:
+        if not m["quantity_delta"]:
+            continue
+        key = (m["warehouse_id"], m["sku_id"])
+        r = next_round[key]
+        source = _transfer_source(m, sources)
+        if source is not None:
+            r = max(r, round_of[id(source)] + 1)
+        elif m["movement_type"] == "transfer" and m["quantity_delta"] < 0:
+            sources[m["reference_id"]] = m
+        while len(rounds) <= r:
+            rounds.append({})
+        rounds[r][key] = m
+        round_of[id(m)] = r
+        next_round[key] = r + 1
+
+    current = StockValuation.__table__.c
+    taken_out = {}  # id(movement) -> value it removed, for transfers out
+    for batch in rounds:
+        rows = []
+        for (warehouse_id, sku_id), m in sorted(batch.items()):
+            quantity = m["quantity_delta"]
+            source = _transfer_source(m, sources)
+            if source is not None:
+                m["transfer_value"] = _value(taken_out[id(source)])
+                m["unit_cost"] = _value(m["transfer_value"] / quantity)
+            cost = m.get("unit_cost")
+            costed = cost is not None and quantity > 0
+            if m.get("transfer_value") is not None:
+                value = m["transfer_value"]
+            else:
+                value = _value(quantity * Decimal(cost)) if costed else ZERO
+            rows.append({
+                "id": generate_uuid(),
+                "warehouse_id": warehouse_id,
+                "sku_id": sku_id,
+                "quantity": quantity,
+                "total_value": value,
+                "last_value_delta": value,
+                "last_unit_cost": Decimal(cost) if costed else None,
+                "applied_count": 1,
+            })
+        stmt = dialect_insert(StockValuation)
+        incoming = stmt.excluded
+        average = case((current.quantity > 0, current.total_value / current.quantity), else_=0)
+        change = case(
+            (incoming.quantity < 0, incoming.quantity * average),
+            (incoming.last_unit_cost.isnot(None), incoming.total_value),
+            else_=incoming.quantity * average,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["warehouse_id", "sku_id"],
+            set_={
+                "quantity": current.quantity + incoming.quantity,
+                "total_value": current.total_value + change,
+                "last_value_delta": change,
+                "last_unit_cost": func.coalesce(incoming.last_unit_cost, current.last_unit_cost),
+                "applied_count": current.applied_count + 1,
+                "updated_at": func.now(),
+            },
+        ).returning(current.warehouse_id, current.sku_id, current.applied_count, current.last_value_delta)
+        for warehouse_id, sku_id, applied, value_delta in db.session.execute(stmt, rows):
+            m = batch[(warehouse_id, sku_id)]
+            m["valuation_seq"] = applied
+            taken_out[id(m)] = -Decimal(str(value_delta))
+
+
+def valuation_report(org_id, warehouse_id=None):
+    """Rows of {warehouse, sku, quantity, total_value, average_cost} from the maintained state, one query."""
+    q = (
+        select(
+            StockValuation.warehouse_id, Warehouse.code.label("warehouse_code"), Warehouse.name.label("warehouse_name"),
+            StockValuation.sku_id, Sku.code.label("sku_code"), Sku.name.label("sku_name"),
+            StockValuation.quantity, StockValuation.total_value, StockValuation.last_unit_cost,
+        )
+        .join(Warehouse, Warehouse.id == StockValuation.warehouse_id)
+        .join(Sku, Sku.id == StockValuation.sku_id)
+        .where(Warehouse.organization_id == org_id)
+        .where((StockValuation.quantity != 0) | (StockValuation.total_value != 0))
+        .order_by(Warehouse.code, Sku.code)
+    )
+    if warehouse_id:
+        q = q.where(StockValuation.warehouse_id == warehouse_id)
+    return db.session.execute(q).mappings().all()
+
+
+def replay_valuations(org_id=None):
+    """{(warehouse_id, sku_id): (quantity, total_value, last_unit_cost, applied_count)} re-derived from the whole
+    ledger, each key's movements in the order they were applied (valuation_seq)."""
+    q = (
+        select(StockMovement.warehouse_id, StockMovement.sku_id, StockMovement.quantity_delta,
+               StockMovement.unit_cost, StockMovement.transfer_value, StockMovement.valuation_seq)
+        .where(StockMovement.quantity_delta != 0)
+        .order_by(StockMovement.valuation_seq, StockMovement.created_at, StockMovement.id)
+        .execution_options(yield_per=10000)
+    )
+    if org_id:
+        q = q.where(StockMovement.organization_id == org_id)
+    state = {}
+    for warehouse_id, sku_id, quantity, cost, transfer_value, seq in db.session.execute(q):
+        key = (warehouse_id, sku_id)
+        on_hand, value, last, applied = state.get(key, (ZERO, ZERO, None, 0))
+        quantity = Decimal(quantity)
+        if quantity > 0 and transfer_value is not None:
+            delta, last = Decimal(transfer_value), Decimal(cost)
+        elif quantity > 0 and cost is not None:
+            delta, last = _value(quantity * Decimal(cost)), Decimal(cost)
+        else:
+            delta = quantity * (value / on_hand if on_hand > 0 else ZERO)
+        state[key] = (on_hand + quantity, _value(value + delta), last, max(applied, seq or 0))
+    return state
+
+
+def verify_valuations(org_id=None, fix=False):
+    """Diff StockValuation against a full ledger replay; with fix, overwrite drifted rows and add missing ones.
+
+    Returns {"checked", "mismatched", "created", "diffs"} (diffs capped at 100), like rebuild_levels().
+    """
+    expected = replay_valuations(org_id)
+    q = select(StockValuation.id, StockValuation.warehouse_id, StockValuation.sku_id,
+               StockValuation.quantity, StockValuation.total_value).join(Warehouse)
+    if org_id:
+        q = q.where(Warehouse.organization_id == org_id)
+    updates, diffs, checked = [], [], 0
+    for row_id, warehouse_id, sku_id, quantity, value in db.session.execute(q):
+        checked += 1
+        want_quantity, want_value, last, applied = expected.pop((warehouse_id, sku_id), (ZERO, ZERO, None, 0))
+        if Decimal(quantity or 0) != want_quantity or abs(Decimal(value or 0) - want_value) > VALUE_TOLERANCE:
+            updates.append({"_id": row_id, "quantity": want_quantity, "total_value": want_value,
+                            "last_unit_cost": last, "applied_count": applied})
+            diffs.append({"warehouse_id": warehouse_id, "sku_id": sku_id,
+                          "state": [float(quantity or 0), float(value or 0)],
+                          "ledger": [float(want_quantity), float(want_value)]})
+    missing = {key: v for key, v in expected.items() if v[0] != 0 or v[1] != 0}
+    for (warehouse_id, sku_id), (want_quantity, want_value, _, _) in missing.items():
+        diffs.append({"warehouse_id": warehouse_id, "sku_id": sku_id, "state": None,
+                      "ledger": [float(want_quantity), float(want_value)]})
+
+    if fix:
+        table = StockValuation.__table__
+        if updates:
+            db.session.execute(
+                update(table).where(table.c.id == bindparam("_id")).values(
+                    quantity=bindparam("quantity"), total_value=bindparam("total_value"),
+                    last_unit_cost=bindparam("last_unit_cost"), applied_count=bindparam("applied_count"),
+                    updated_at=func.now(),
+                ),
+                updates,
+            )
+        if missing:
+            db.session.execute(table.insert(), [
+                {"id": generate_uuid(), "warehouse_id": w, "sku_id": s,
+                 "quantity": q, "total_value": v, "last_unit_cost": last, "applied_count": applied}
+                for (w, s), (q, v, last, applied) in sorted(missing.items())
+            ])
+        db.session.commit()
+    return {"checked": checked, "mismatched": len(updates), "created": len(missing), "diffs": diffs[:100]}
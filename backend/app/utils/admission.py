@@ -0,0 +1,227 @@
+"""Tenant-aware admission control for heavy endpoints.
+
+Each heavy endpoint belongs to a class (payroll, report, export, ...) with a
+weight and a per-organization concurrency limit. A request is admitted when
+its organization has room both in that class and in its overall weight budget
+(ADMISSION_ORG_CAPACITY); otherwise it waits up to ADMISSION_QUEUE_TIMEOUT
+seconds for a slot and is then rejected with 429 and Retry-After.
+
+Stores:
+  * "local"    - in-process counters; right for a single worker process.
+  * "database" - leases in admission_leases, shared by every worker and node.
+  * "module:Class" - any object with try_acquire/release/usage, and renew if its slots expire.
+"""
+import importlib
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, select, update
+
+from app.extensions import db
+
+
+class LocalAdmissionStore:
+    """Per-process in-flight counters."""
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._tickets = {}
+        self._units = defaultdict(int)
+        self._by_class = defaultdict(lambda: defaultdict(int))
+
+    def try_acquire(self, org_id, endpoint_class, weight, class_limit, org_capacity):
+        with self._lock:
+            if self._by_class[org_id][endpoint_class] >= class_limit:
+                return None
+            if self._units[org_id] + weight > org_capacity:
+                return None
+            ticket = uuid.uuid4().hex
+            self._tickets[ticket] = (org_id, endpoint_class, weight)
+            self._units[org_id] += weight
+            self._by_class[org_id][endpoint_class] += 1
+            return ticket
+
+    def release(self, ticket):
+        with self._lock:
+            org_id, endpoint_class, weight = self._tickets.pop(ticket, (None, None, 0))
+            if org_id is None:
+                return
+            self._units[org_id] -= weight
+            self._by_class[org_id][endpoint_class] -= 1
+
+    def renew(self, ticket):
+        """Local tickets do not expire."""
+
+    def usage(self, org_id=None):
+        """{org_id: {"units": n, "by_class": {class: count}}} for orgs with requests in flight."""
+        with self._lock:
+            orgs = [org_id] if org_id else [o for o, units in self._units.items() if units]
+            return {o: {"units": self._units[o], "by_class": dict(self._by_class[o])} for o in orgs}
+
+
+class DatabaseAdmissionStore:
+    """Leases in the admission_leases table, serialized per organization with an advisory lock.
+
+    Leases expire after ADMISSION_LEASE_SECONDS so a crashed worker cannot hold
+    a slot forever; long-running requests (streamed exports) renew theirs.
+    """
+
+    def __init__(self, app=None):
+        self._lease_seconds = app.config.get("ADMISSION_LEASE_SECONDS", 300) if app else 300
+
+    def try_acquire(self, org_id, endpoint_class, weight, class_limit, org_capacity):
+        from app.models import AdmissionLease
+
+        now = datetime.now(timezone.utc)
+        with db.engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                conn.execute(select(func.pg_advisory_xact_lock(func.hashtext("admission:" + org_id))))
+            conn.execute(delete(AdmissionLease).where(
+                AdmissionLease.organization_id == org_id, AdmissionLease.expires_at < now
+            ))
+            units, in_class = conn.execute(
+                select(
+                    func.coalesce(func.sum(AdmissionLease.weight), 0),
+                    func.count().filter(AdmissionLease.endpoint_class == endpoint_class),
+                ).where(AdmissionLease.organization_id == org_id)
+            ).one()
+            if in_class >= class_limit or units + weight > org_capacity:
+                return None
+            ticket = str(uuid.uuid4())
+            conn.execute(insert(AdmissionLease).values(
+                id=ticket,
+                organization_id=org_id,
+                endpoint_class=endpoint_class,
+                weight=weight,
+                expires_at=now + timedelta(seconds=self._lease_seconds),
+            ))
+            return ticket
+
+    def release(self, ticket):
+        from app.models import AdmissionLease
+
+        with db.engine.begin() as conn:
+            conn.execute(delete(AdmissionLease).where(AdmissionLease.id == ticket))
+
+    def renew(self, ticket):
+        from app.models import AdmissionLease
+
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self._lease_seconds)
+        with db.engine.begin() as conn:
+            conn.execute(update(AdmissionLease).where(AdmissionLease.id == ticket).values(expires_at=expires_at))
+
+    def usage(self, org_id=None):
+        from app.models import AdmissionLease
+
+        q = (
+            select(AdmissionLease.organization_id, AdmissionLease.endpoint_class,
+                   func.count(), func.sum(AdmissionLease.weight))
+            .where(AdmissionLease.expires_at >= datetime.now(timezone.utc))
+            .group_by(AdmissionLease.organization_id, AdmissionLease.endpoint_class)
+        )
+        if org_id:
+            q = q.where(AdmissionLease.organization_id == org_id)
+        out = {}
+        with db.engine.connect() as conn:
+            for org, endpoint_class, count, units in conn.execute(q):
+                entry = out.setdefault(org, {"units": 0, "by_class": {}})
+                entry["units"] += int(units or 0)
+                entry["by_class"][endpoint_class] = count
+        return out
+
+
+STORES = {
+    "local": LocalAdmissionStore,
+    "database": DatabaseAdmissionStore,
+}
+
+
+def _load_store(app):
+    name = app.config.get("ADMISSION_STORE") or "local"
+    if name in STORES:
+        return STORES[name](app)
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)(app)
+
+
+class AdmissionController:
+    """Admit, queue or reject heavy requests per organization and endpoint class."""
+
+    def __init__(self, store, org_capacity, classes, queue_timeout, retry_after):
+        self.store = store
+        self.org_capacity = org_capacity
+        self.classes = classes
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: {"admitted": 0, "queued": 0, "rejected": 0})
+
+    def _limits(self, endpoint_class):
+        spec = self.classes.get(endpoint_class) or {}
+        return int(spec.get("weight", 1)), int(spec.get("limit", self.org_capacity))
+
+    def _count(self, org_id, key):
+        with self._lock:
+            self._counters[org_id][key] += 1
+
+    def acquire(self, org_id, endpoint_class):
+        """Return a ticket once admitted, or None if no slot freed up within the queue timeout."""
+        weight, class_limit = self._limits(endpoint_class)
+        deadline = time.monotonic() + self.queue_timeout
+        delay = 0.05
+        queued = False
+        while True:
+            ticket = self.store.try_acquire(org_id, endpoint_class, weight, class_limit, self.org_capacity)
+            if ticket is not None:
+                self._count(org_id, "admitted")
+                return ticket
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._count(org_id, "rejected")
+                return None
+            if not queued:
+                self._count(org_id, "queued")
+                queued = True
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.5)
+
+    def release(self, ticket):
+        self.store.release(ticket)
+
+    def renew(self, ticket):
+        """Extend a ticket's lease, for requests that outlive ADMISSION_LEASE_SECONDS."""
+        renew = getattr(self.store, "renew", None)
+        if renew is not None:
+            renew(ticket)
+
+    def metrics(self, org_id=None):
+        """Per-organization saturation: in-flight units and requests by class, plus this process's counters."""
+        usage = self.store.usage(org_id)
+        with self._lock:
+            counters = {o: dict(c) for o, c in self._counters.items() if org_id is None or o == org_id}
+        out = {}
+        for org in set(usage) | set(counters) | ({org_id} if org_id else set()):
+            in_flight = usage.get(org, {"units": 0, "by_class": {}})
+            out[org] = {
+                "capacity": self.org_capacity,
+                "in_flight_units": in_flight["units"],
+                "in_flight_by_class": in_flight["by_class"],
+                "saturation": round(in_flight["units"] / self.org_capacity, 3) if self.org_capacity else 0,
+                **counters.get(org, {"admitted": 0, "queued": 0, "rejected": 0}),
+            }
+        return out
+
+
+def init_app(app):
+    controller = AdmissionController(
+        store=_load_store(app),
+        org_capacity=app.config.get("ADMISSION_ORG_CAPACITY", 8),
+        classes=app.config.get("ADMISSION_CLASSES", {}),
+        queue_timeout=app.config.get("ADMISSION_QUEUE_TIMEOUT", 2.0),
+        retry_after=app.config.get("ADMISSION_RETRY_AFTER", 5),
+    )
+    app.extensions["admission"] = controller
+    return controller
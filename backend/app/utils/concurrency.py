@@ -0,0 +1,55 @@
+"""Optimistic concurrency for versioned models: ETag and If-Match.
+
+GET and PUT responses carry the row version as a strong ETag. A PUT that
+sends If-Match is applied only if the row is still at that version; otherwise
+it gets 412 with the current representation's version. A concurrent write
+that slips in between the check and the commit is caught by SQLAlchemy's
+version_id_col (StaleDataError) and also answered with 412.
+"""
+from flask import current_app, request
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.extensions import db
+from app.utils.response import api_error
+
+
+def etag(obj):
+    return f'"{obj.version}"'
+
+
+def check_if_match(obj):
+    """Return an error response if the request's If-Match does not match obj's version, else None."""
+    header = request.headers.get("If-Match")
+    if not header:
+        if current_app.config.get("REQUIRE_IF_MATCH"):
+            return api_error("If-Match header is required for updates", status_code=428)
+        return None
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    if "*" in candidates or etag(obj) in candidates:
+        return None
+    return precondition_failed(obj)
+
+
+def precondition_failed(obj=None):
+    response, status = api_error(
+        "The record was changed by someone else; reload it and try again",
+        errors={"version": obj.version} if obj is not None else None,
+        status_code=412,
+    )
+    if obj is not None:
+        response.headers["ETag"] = etag(obj)
+    return response, status
+
+
+def with_etag(rv, obj):
+    """Add obj's ETag to an (response, status) pair from api_success."""
+    response, status = rv
+    response.headers["ETag"] = etag(obj)
+    return response, status
+
+
+def init_app(app):
+    @app.errorhandler(StaleDataError)
+    def _handle_stale_data(exc):
+        db.session.rollback()
+        return precondition_failed()
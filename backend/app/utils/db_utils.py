@@ -0,0 +1,91 @@
+"""Dialect helpers: conflict-aware inserts, chunked deletes and PostgreSQL COPY text encoding."""
+import io
+import json
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.extensions import db
+
+COPY_NULL = r"\N"
+_COPY_ESCAPES = {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+_COPY_UNESCAPES = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r", "N": None}
+
+
+def dialect_insert(model):
+    """insert(model) for the bound database, supporting on_conflict_do_nothing/on_conflict_do_update."""
+    if db.engine.dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+def delete_in_chunks(table, condition, chunk_size=5000, on_chunk=None):
+    """Delete table rows matching condition, chunk_size rows per transaction. Returns the number deleted.
+
+    Each chunk is its own short transaction, so row locks are held briefly and
+    nothing is loaded into Python. on_chunk(deleted_so_far) is called after each.
+    """
+    pk = list(table.primary_key.columns)
+    key = pk[0] if len(pk) == 1 else tuple_(*pk)
+    total = 0
+    while True:
+        batch = select(*pk).where(condition).limit(chunk_size)
+        with db.engine.begin() as conn:
+            deleted = conn.execute(delete(table).where(key.in_(batch))).rowcount
+        total += deleted
+        if on_chunk is not None and deleted:
+            on_chunk(total)
+        if deleted < chunk_size:
+            return total
+
+
+def copy_text(value):
+    """Encode a Python value as one field of COPY ... FROM STDIN (text format)."""
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    value = str(value)
+    if any(ch in value for ch in _COPY_ESCAPES):
+        value = "".join(_COPY_ESCAPES.get(ch, ch) for ch in value)
+    return value
+
+
+def copy_unescape(field):
+    """Decode one COPY text-format field back to a string (None for NULL)."""
+    if field == COPY_NULL:
+        return None
+    if "\\" not in field:
+        return field
+    out, chars = [], iter(field)
+    for ch in chars:
+        if ch == "\\":
+            nxt = next(chars, "")
+            out.append(_COPY_UNESCAPES.get(nxt, nxt) or "")
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+class IterStream(io.RawIOBase):
+    """Readable file object over an iterator of bytes, for cursor.copy_expert(..., file)."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        n = min(len(target), len(self._buffer))
+        target[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
@@ -0,0 +1,134 @@
+"""Idempotency-Key support for create endpoints.
+
+The first request with a given key inserts a pending row for
+(organization, user, key); that insert is the lock. Its response is stored on
+the row when the handler finishes and replayed, without running the handler,
+for every retry until the row expires. A retry that arrives while the first
+request is still running waits for it (IDEMPOTENCY_WAIT_SECONDS) and then
+replays, runs itself if the first request released the key, or gets 409. A pending row older than IDEMPOTENCY_PENDING_TIMEOUT_SECONDS
+belongs to a request that died before completing; the next retry takes the key
+over. Reusing a key for a different request gets 422.
+
+Rows are written on their own connection so they commit independently of the
+handler's transaction.
+"""
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app, request
+from sqlalchemy import and_, delete, or_, select, update
+
+from app.extensions import db
+from app.models import IdempotencyKey, generate_uuid
+from app.utils.db_utils import dialect_insert
+
+HEADER = "Idempotency-Key"
+# Responses a retry should not see again: it should get a fresh attempt.
+NOT_STORED = (409, 429)
+
+
+def request_fingerprint():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(b"?" + request.query_string + b"\n")
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def claim(org_id, user_id, key, fingerprint):
+    """Try to become the request that executes for this key.
+
+    Returns (True, None) when claimed, otherwise (False, existing row).
+    """
+    ttl = timedelta(hours=current_app.config.get("IDEMPOTENCY_KEY_TTL_HOURS", 24))
+    stale = _now() - timedelta(seconds=current_app.config.get("IDEMPOTENCY_PENDING_TIMEOUT_SECONDS", 600))
+    where = (
+        IdempotencyKey.organization_id == org_id,
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+    )
+    with db.engine.begin() as conn:
+        conn.execute(delete(IdempotencyKey).where(*where, or_(
+            IdempotencyKey.expires_at < _now(),
+            and_(IdempotencyKey.status == "pending", IdempotencyKey.created_at < stale),
+        )))
+        inserted = conn.execute(
+            dialect_insert(IdempotencyKey)
+            .values(
+                id=generate_uuid(),
+                organization_id=org_id,
+                user_id=user_id,
+                key=key,
+                request_hash=fingerprint,
+                status="pending",
+                expires_at=_now() + ttl,
+            )
+            .on_conflict_do_nothing(index_elements=["organization_id", "user_id", "key"])
+            .returning(IdempotencyKey.id)
+        ).scalar()
+        if inserted is not None:
+            return True, None
+        return False, conn.execute(select(IdempotencyKey).where(*where)).first()
+
+
+def wait_until_done(org_id, user_id, key, fingerprint):
+    """Poll a pending key until it completes or IDEMPOTENCY_WAIT_SECONDS pass.
+
+    If the request holding the key releases it (it failed or was not stored), claim
+    the key ourselves. Returns (claimed, row) like claim(); row is None on timeout.
+    """
+    deadline = time.monotonic() + current_app.config.get("IDEMPOTENCY_WAIT_SECONDS", 5.0)
+    delay = 0.05
+    stmt = select(IdempotencyKey).where(
+        IdempotencyKey.organization_id == org_id,
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+    )
+    while time.monotonic() < deadline:
+        time.sleep(delay)
+        delay = min(delay * 2, 0.5)
+        with db.engine.connect() as conn:
+            row = conn.execute(stmt).first()
+        if row is None:
+            claimed, row = claim(org_id, user_id, key, fingerprint)
+            if claimed:
+                return True, None
+        if row is not None and row.status != "pending":
+            return False, row
+    return False, None
+
+
+def complete(org_id, user_id, key, response):
+    """Store the response for replay, or release the key if the response should not be replayed."""
+    where = (
+        IdempotencyKey.organization_id == org_id,
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+    )
+    with db.engine.begin() as conn:
+        if response is None or response.status_code >= 500 or response.status_code in NOT_STORED or response.is_streamed:
+            conn.execute(delete(IdempotencyKey).where(*where))
+            return
+        conn.execute(
+            update(IdempotencyKey)
+            .where(*where)
+            .values(status="done", response_status=response.status_code, response_body=response.get_data(as_text=True))
+        )
+
+
+def replay(row):
+    response = current_app.response_class(row.response_body, status=row.response_status, mimetype="application/json")
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def purge_expired():
+    """Delete expired keys; returns the number removed."""
+    with db.engine.begin() as conn:
+        return conn.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < _now())).rowcount
@@ -0,0 +1,260 @@
+"""Cluster-wide cache invalidation bus.
+
+Write paths call publish(org_id, entity). Messages are queued on the SQLAlchemy
+session and only leave the process once the transaction commits, so a rolled
+back write never evicts anything. In production the bus rides on PostgreSQL
+LISTEN/NOTIFY (NOTIFY is transactional, and every worker on every node holds a
+LISTEN connection); in tests and single-process dev an in-memory bus delivers
+to local subscribers directly.
+"""
+import json
+import logging
+import os
+import select
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "invalidations"
+_READY_KEY = "invalidations_ready"
+
+
+class LocalCache:
+    """Per-process cache keyed by (org_id, entity, key), evicted by bus messages."""
+
+    def __init__(self, max_entries_per_bucket=5000):
+        self._buckets = {}
+        self._generations = {}  # only for buckets that exist or are being loaded, so it stays bounded
+        self._loading = {}  # bucket_key -> loaders in flight
+        self._lock = threading.Lock()
+        self._max_entries = max_entries_per_bucket
+
+    def get(self, org_id, entity, key, default=None):
+        with self._lock:
+            return self._buckets.get((org_id, entity), {}).get(key, default)
+
+    def get_or_set(self, org_id, entity, key, loader):
+        """Return the cached value, calling loader() on a miss.
+
+        A value loaded while an eviction for the same bucket arrived is returned
+        but not stored, so a slow loader cannot resurrect stale data.
+        """
+        bucket_key = (org_id, entity)
+        with self._lock:
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None and key in bucket:
+                return bucket[key]
+            generation = self._generations.get(bucket_key, 0)
+            self._loading[bucket_key] = self._loading.get(bucket_key, 0) + 1
+        try:
+            value = loader()
+        except BaseException:
+            with self._lock:
+                self._done_loading(bucket_key)
+            raise
+        with self._lock:
+            if self._generations.get(bucket_key, 0) == generation:
+                bucket = self._buckets.setdefault(bucket_key, {})
+                if len(bucket) >= self._max_entries:
+                    bucket.clear()
+                bucket[key] = value
+            self._done_loading(bucket_key)
+        return value
+
+    def _done_loading(self, bucket_key):
+        remaining = self._loading.pop(bucket_key) - 1
+        if remaining:
+            self._loading[bucket_key] = remaining
+        elif bucket_key not in self._buckets:
+            self._generations.pop(bucket_key, None)
+
+    def evict(self, org_id, entity, version=None):
+        """Drop one (org_id, entity) bucket, or everything when org_id is None."""
+        with self._lock:
+            if org_id is None:
+                self._buckets.clear()
+                self._generations = {k: self._generations.get(k, 0) + 1 for k in self._loading}
+                return
+            bucket_key = (org_id, entity)
+            self._buckets.pop(bucket_key, None)
+            if bucket_key in self._loading:
+                self._generations[bucket_key] = self._generations.get(bucket_key, 0) + 1
+            else:
+                # Nothing is loading this bucket, so no one holds its generation: forget it.
+                self._generations.pop(bucket_key, None)
+
+
+local_cache = LocalCache()
+
+
+class InvalidationBus:
+    """Fan out (org_id, entity, version) messages to local subscribers."""
+
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def dispatch(self, org_id, entity, version):
+        for callback in list(self._subscribers):
+            try:
+                callback(org_id, entity, version)
+            except Exception:
+                logger.exception("Invalidation subscriber failed for %s/%s", org_id, entity)
+
+    def start(self):
+        """Start receiving messages from other processes (no-op by default)."""
+
+    def send(self, session, messages):
+        """Called inside the committing transaction."""
+
+    def deliver(self, messages):
+        """Called once the transaction has committed."""
+
+
+class MemoryInvalidationBus(InvalidationBus):
+    """In-process bus for tests and single-worker development."""
+
+    def deliver(self, messages):
+        for org_id, entity, version in messages:
+            self.dispatch(org_id, entity, version)
+
+
+class PostgresInvalidationBus(InvalidationBus):
+    """LISTEN/NOTIFY bus shared by every worker connected to the same database."""
+
+    def __init__(self, dsn, channel):
+        super().__init__()
+        self._dsn = dsn
+        self._channel = channel
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def send(self, session, messages):
+        for org_id, entity, version in messages:
+            payload = json.dumps({"o": org_id, "e": entity, "v": version})
+            session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self._channel, "payload": payload})
+
+    def deliver(self, messages):
+        # Evict locally right away; our own NOTIFY will arrive a moment later too.
+        for org_id, entity, version in messages:
+            self.dispatch(org_id, entity, version)
+
+    def start(self):
+        # Called from before_request: the listener thread must be started after
+        # gunicorn forks, and again in every forked worker.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._listen_forever, name="invalidation-listener", daemon=True).start()
+
+    def _listen_forever(self):
+        import psycopg2
+
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(self._dsn)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{self._channel}"')
+                # Anything published while we were disconnected is lost: start clean.
+                self.dispatch(None, None, None)
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._handle(conn.notifies.pop(0).payload)
+            except Exception:
+                logger.exception("Invalidation listener lost its connection; reconnecting")
+                time.sleep(1)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _handle(self, payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed invalidation payload: %r", payload)
+            return
+        self.dispatch(message.get("o"), message.get("e"), message.get("v"))
+
+
+def publish(org_id, entity, session=None):
+    """Queue an invalidation for (org_id, entity); sent when the session commits."""
+    if session is None:
+        from app.extensions import db
+        session = db.session
+    session.info.setdefault(_PENDING_KEY, set()).add((str(org_id), entity))
+
+
+def get_bus():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get("invalidation_bus")
+
+
+def _before_commit(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    version = time.time_ns()
+    messages = [(org_id, entity, version) for org_id, entity in sorted(pending)]
+    bus = get_bus()
+    if bus is not None:
+        bus.send(session, messages)
+    session.info.setdefault(_READY_KEY, []).extend(messages)
+
+
+def _after_commit(session):
+    messages = session.info.pop(_READY_KEY, None)
+    bus = get_bus()
+    if messages and bus is not None:
+        bus.deliver(messages)
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_READY_KEY, None)
+
+
+def _build_bus(app, engine_url):
+    backend = (app.config.get("INVALIDATION_BACKEND") or "").lower()
+    if not backend:
+        backend = "postgres" if engine_url is not None and engine_url.get_backend_name() == "postgresql" else "memory"
+    if backend == "memory":
+        return MemoryInvalidationBus()
+    if backend == "postgres":
+        dsn = engine_url.set(drivername="postgresql").render_as_string(hide_password=False)
+        return PostgresInvalidationBus(dsn, app.config.get("INVALIDATION_CHANNEL") or "erp_invalidation")
+    raise ValueError(f"Unknown INVALIDATION_BACKEND: {backend}")
+
+
+def init_app(app):
+    """Create the bus for this app and wire session hooks and local caches to it."""
+    from sqlalchemy.engine import make_url
+
+    uri = app.config.get("SQLALCHEMY_DATABASE_URI")
+    bus = _build_bus(app, make_url(uri) if uri else None)
+    bus.subscribe(local_cache.evict)
+    app.extensions["invalidation_bus"] = bus
+    app.before_request(bus.start)
+    if not event.contains(Session, "before_commit", _before_commit):
+        event.listen(Session, "before_commit", _before_commit)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_rollback", _after_rollback)
+    return bus
@@ -0,0 +1,129 @@
+"""Monthly range partitions (PostgreSQL).
+
+Tables in PARTITIONED_TABLES are declared PARTITION BY RANGE on a date
+column, with one partition per calendar month (<table>_yYYYYmMM) and a
+<table>_default partition catching rows outside every monthly range. Queries
+that filter the date column only touch the matching months.
+
+maintain_partitions() keeps PARTITION_MONTHS_AHEAD months ready ahead of the
+current one and, when a retention is configured, detaches months that have
+fallen out of it. Detached partitions remain as ordinary tables for archiving
+or dropping. The job worker runs maintenance periodically, and so does
+`flask partitions maintain`.
+"""
+import re
+from datetime import date
+
+from flask import current_app
+from sqlalchemy import func, select, text
+
+from app.extensions import db
+
+# table -> partition key column
+PARTITIONED_TABLES = {
+    "timesheets": "work_date",
+}
+# table -> config key holding its retention in months (0 keeps everything attached)
+RETENTION_SETTINGS = {
+    "timesheets": "TIMESHEET_RETENTION_MONTHS",
+}
+
+
+def month_start(d):
+    return d.replace(day=1)
+
+
+def add_months(d, months):
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def _month_of(table, name):
+    match = re.fullmatch(rf"{re.escape(table)}_y(\d{{4}})m(\d{{2}})", name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def is_partitioned(conn, table):
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:t)"), {"t": table}
+    ).scalar())
+
+
+def list_partitions(conn, table):
+    """{month: partition name} for the table's attached monthly partitions."""
+    names = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:t)"
+    ), {"t": table}).scalars()
+    months = {}
+    for name in names:
+        month = _month_of(table, name)
+        if month is not None:
+            months[month] = name
+    return months
+
+
+def create_partition(conn, table, month):
+    """Create and attach the partition for month, moving any of its rows out of the default partition.
+
+    Returns the partition name, or None if it already existed. Call inside a transaction.
+    """
+    column = PARTITIONED_TABLES[table]
+    conn.execute(select(func.pg_advisory_xact_lock(func.hashtext("partitions:" + table))))
+    name = partition_name(table, month)
+    if conn.execute(text("SELECT to_regclass(:n)"), {"n": name}).scalar() is not None:
+        return None
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {table}_default WHERE {column} >= :lower AND {column} < :upper RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), {"lower": lower, "upper": upper})
+    conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"))
+    return name
+
+
+def detach_partition(conn, table, month):
+    name = partition_name(table, month)
+    conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+    return name
+
+
+def maintain_partitions(table, today=None, months_ahead=None, retention_months=None):
+    """Create missing partitions up to months_ahead and detach those older than retention_months.
+
+    Returns {"created": [...], "detached": [...]}; a no-op unless the table is partitioned.
+    """
+    today = today or date.today()
+    if months_ahead is None:
+        months_ahead = current_app.config.get("PARTITION_MONTHS_AHEAD", 3)
+    if retention_months is None:
+        retention_months = current_app.config.get(RETENTION_SETTINGS.get(table, ""), 0)
+    created, detached = [], []
+    with db.engine.begin() as conn:
+        if not is_partitioned(conn, table):
+            return {"created": created, "detached": detached}
+        existing = list_partitions(conn, table)
+        current = month_start(today)
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month not in existing:
+                name = create_partition(conn, table, month)
+                if name:
+                    created.append(name)
+        if retention_months:
+            cutoff = add_months(current, -retention_months)
+            for month in sorted(m for m in existing if m < cutoff):
+                detached.append(detach_partition(conn, table, month))
+    return {"created": created, "detached": detached}
+
+
+def maintain_all(today=None):
+    """Run maintain_partitions for every partitioned table. Returns {table: result}."""
+    return {table: maintain_partitions(table, today=today) for table in PARTITIONED_TABLES}
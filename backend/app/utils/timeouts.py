@@ -0,0 +1,95 @@
+"""Per-endpoint statement timeouts and query cancellation (PostgreSQL).
+
+Every request runs in a timeout class ("interactive" unless the view is
+decorated with @statement_timeout("report") or similar). When the request's
+transaction begins, the class's STATEMENT_TIMEOUTS value is applied with
+set_config(..., is_local=true), i.e. SET LOCAL, so it never leaks to the next
+user of the pooled connection. A statement cut off by the timeout surfaces as
+a 503 with Retry-After instead of a 500.
+
+cancel_on_disconnect() wraps the generator of a streamed response: if the
+client goes away before the stream is exhausted, the backend query is
+cancelled and the transaction rolled back.
+"""
+from flask import current_app, g, has_request_context
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.utils.response import api_error
+
+DEFAULT_CLASS = "interactive"
+QUERY_CANCELED = "57014"  # SQLSTATE for statement_timeout and pg_cancel_backend
+
+
+def _timeout_ms(timeout_class):
+    timeouts = current_app.config.get("STATEMENT_TIMEOUTS", {})
+    return timeouts.get(timeout_class, timeouts.get(DEFAULT_CLASS, 0))
+
+
+def apply_statement_timeout(connection):
+    """SET LOCAL the current request's statement_timeout on a connection in a transaction."""
+    if not has_request_context() or connection.dialect.name != "postgresql":
+        return
+    ms = _timeout_ms(g.get("statement_timeout_class", DEFAULT_CLASS))
+    connection.execute(select(func.set_config("statement_timeout", str(int(ms)), True)))
+
+
+def set_timeout_class(timeout_class):
+    """Switch the current request to timeout_class, including an already open transaction."""
+    g.statement_timeout_class = timeout_class
+    if db.session().in_transaction():
+        apply_statement_timeout(db.session.connection())
+
+
+def _backend_pid():
+    connection = db.session.connection()
+    if connection.dialect.name != "postgresql":
+        return None
+    return connection.execute(select(func.pg_backend_pid())).scalar()
+
+
+def cancel_backend(pid):
+    """Cancel whatever the given backend is running, from a separate connection."""
+    with db.engine.connect() as conn:
+        conn.execute(select(func.pg_cancel_backend(pid)))
+
+
+def cancel_on_disconnect(rows):
+    """Yield from rows; if the consumer stops early (client disconnect), cancel the query and roll back."""
+    pid = _backend_pid()
+    finished = False
+    try:
+        yield from rows
+        finished = True
+    finally:
+        if not finished:
+            if pid is not None:
+                cancel_backend(pid)
+            db.session.rollback()
+
+
+def _is_query_canceled(exc):
+    return getattr(exc.orig, "pgcode", None) == QUERY_CANCELED
+
+
+def _after_begin(session, transaction, connection):
+    apply_statement_timeout(connection)
+
+
+def init_app(app):
+    if not event.contains(Session, "after_begin", _after_begin):
+        event.listen(Session, "after_begin", _after_begin)
+
+    @app.errorhandler(DBAPIError)
+    def _handle_db_error(exc):
+        if not _is_query_canceled(exc):
+            raise exc
+        db.session.rollback()
+        response, status = api_error(
+            "The request took too long and was cancelled; narrow it down or try again later",
+            status_code=503,
+        )
+        response.headers["Retry-After"] = str(app.config.get("STATEMENT_TIMEOUT_RETRY_AFTER", 10))
+        return response, status
@@ -0,0 +1,37 @@
+"""admission control leases
+
+Revision ID: add_admission_leases
+Revises: add_jobs
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_admission_leases'
+down_revision = 'add_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('admission_leases',
+    sa.Column('id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('organization_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('endpoint_class', sa.String(length=64), nullable=False),
+    sa.Column('weight', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('admission_leases', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_admission_leases_organization_id'), ['organization_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('admission_leases', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_admission_leases_organization_id'))
+
+    op.drop_table('admission_leases')
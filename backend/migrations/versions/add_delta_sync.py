@@ -0,0 +1,45 @@
+"""delta sync: tombstones and (organization_id, updated_at) indexes
+
+Revision ID: add_delta_sync
+Revises: add_google_oauth
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_delta_sync'
+down_revision = 'add_google_oauth'
+branch_labels = None
+depends_on = None
+
+ORG_SCOPED_TABLES = [
+    'users', 'roles', 'employees', 'payroll_runs', 'customers', 'leads', 'invoices',
+    'warehouses', 'skus', 'purchase_orders', 'projects', 'timesheets',
+]
+
+
+def upgrade():
+    op.create_table('deleted_records',
+    sa.Column('id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('organization_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('entity', sa.String(length=64), nullable=False),
+    sa.Column('entity_id', sa.String(length=64), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_deleted_records_org_entity_deleted_at', 'deleted_records', ['organization_id', 'entity', 'deleted_at'], unique=False)
+
+    for table in ORG_SCOPED_TABLES:
+        op.create_index(f'ix_{table}_org_updated_at', table, ['organization_id', 'updated_at'], unique=False)
+    op.create_index('ix_stock_levels_warehouse_updated_at', 'stock_levels', ['warehouse_id', 'updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_stock_levels_warehouse_updated_at', table_name='stock_levels')
+    for table in reversed(ORG_SCOPED_TABLES):
+        op.drop_index(f'ix_{table}_org_updated_at', table_name=table)
+    op.drop_index('ix_deleted_records_org_entity_deleted_at', table_name='deleted_records')
+    op.drop_table('deleted_records')
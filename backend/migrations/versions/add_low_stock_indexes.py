@@ -0,0 +1,32 @@
+"""partial indexes for the low-stock scan
+
+Revision ID: add_low_stock_indexes
+Revises: add_stock_movements
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_low_stock_indexes'
+down_revision = 'add_stock_movements'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_stock_levels_below_reorder', 'stock_levels',
+        ['warehouse_id', sa.text('(quantity - reserved_quantity - reorder_point)')],
+        unique=False, postgresql_where=sa.text('reorder_point > 0'),
+    )
+    op.create_index(
+        'ix_skus_org_reorder_point', 'skus', ['organization_id'],
+        unique=False, postgresql_where=sa.text('reorder_point > 0'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_skus_org_reorder_point', table_name='skus')
+    op.drop_index('ix_stock_levels_below_reorder', table_name='stock_levels')
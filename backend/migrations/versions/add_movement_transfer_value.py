@@ -0,0 +1,23 @@
+"""exact value carried by transfers in on stock movements
+
+Revision ID: add_movement_transfer_value
+Revises: add_valuation_last_delta
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_movement_transfer_value'
+down_revision = 'add_valuation_last_delta'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('stock_movements', sa.Column('transfer_value', sa.Numeric(precision=18, scale=4), nullable=True))
+
+
+def downgrade():
+    op.drop_column('stock_movements', 'transfer_value')
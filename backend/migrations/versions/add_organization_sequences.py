@@ -0,0 +1,46 @@
+"""organization document number sequences
+
+Revision ID: add_organization_sequences
+Revises: add_admission_leases
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_organization_sequences'
+down_revision = 'add_admission_leases'
+branch_labels = None
+depends_on = None
+
+# Sequence name -> table whose row count the old COUNT(*) + 1 numbering was based on.
+SEQUENCE_TABLES = {
+    'customer': 'customers',
+    'employee': 'employees',
+    'invoice': 'invoices',
+    'project': 'projects',
+    'purchase_order': 'purchase_orders',
+    'sku': 'skus',
+    'warehouse': 'warehouses',
+}
+
+
+def upgrade():
+    op.create_table('organization_sequences',
+    sa.Column('organization_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('last_value', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('organization_id', 'name')
+    )
+    # Continue numbering where COUNT(*) + 1 left off.
+    for name, table in SEQUENCE_TABLES.items():
+        op.execute(
+            f"INSERT INTO organization_sequences (organization_id, name, last_value) "
+            f"SELECT organization_id, '{name}', COUNT(*) FROM {table} GROUP BY organization_id"
+        )
+
+
+def downgrade():
+    op.drop_table('organization_sequences')
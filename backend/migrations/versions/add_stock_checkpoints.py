@@ -0,0 +1,49 @@
+"""stock checkpoints for as-of stock queries
+
+Revision ID: add_stock_checkpoints
+Revises: add_stock_valuations
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_stock_checkpoints'
+down_revision = 'add_stock_valuations'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_checkpoints',
+    sa.Column('id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('organization_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('snapshot_date', sa.Date(), nullable=False),
+    sa.Column('cutoff', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('level_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('organization_id', 'snapshot_date', name='uq_stock_checkpoint_org_date')
+    )
+    op.create_table('stock_checkpoint_levels',
+    sa.Column('id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('checkpoint_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('warehouse_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('sku_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('quantity', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('reserved_quantity', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['checkpoint_id'], ['stock_checkpoints.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['sku_id'], ['skus.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['warehouse_id'], ['warehouses.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('checkpoint_id', 'warehouse_id', 'sku_id', name='uq_stock_checkpoint_level')
+    )
+    op.create_index('ix_stock_checkpoint_levels_sku_id', 'stock_checkpoint_levels', ['sku_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_stock_checkpoint_levels_sku_id', table_name='stock_checkpoint_levels')
+    op.drop_table('stock_checkpoint_levels')
+    op.drop_table('stock_checkpoints')
@@ -0,0 +1,73 @@
+"""stock movement ledger
+
+Revision ID: add_stock_movements
+Revises: partition_timesheets
+Create Date: 2026-10-19
+
+"""
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_stock_movements'
+down_revision = 'partition_timesheets'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_movements',
+    sa.Column('id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('organization_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('warehouse_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('sku_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('movement_type', sa.String(length=32), nullable=False),
+    sa.Column('quantity_delta', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('reserved_delta', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('reference_type', sa.String(length=64), nullable=True),
+    sa.Column('reference_id', sa.UUID(as_uuid=False), nullable=True),
+    sa.Column('note', sa.Text(), nullable=False),
+    sa.Column('created_by_user_id', sa.UUID(as_uuid=False), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['created_by_user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['sku_id'], ['skus.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['warehouse_id'], ['warehouses.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_movements_sku_id', 'stock_movements', ['sku_id'], unique=False)
+    op.create_index('ix_stock_movements_warehouse_sku_created_at', 'stock_movements', ['warehouse_id', 'sku_id', 'created_at'], unique=False)
+    op.create_index('ix_stock_movements_org_created_at', 'stock_movements', ['organization_id', 'created_at'], unique=False)
+
+    # Opening balance: one adjustment per existing stock level, so the ledger sums to today's levels.
+    bind = op.get_bind()
+    levels = bind.execute(sa.text(
+        "SELECT w.organization_id, s.warehouse_id, s.sku_id, s.quantity, s.reserved_quantity "
+        "FROM stock_levels s JOIN warehouses w ON w.id = s.warehouse_id "
+        "WHERE s.quantity <> 0 OR s.reserved_quantity <> 0"
+    )).all()
+    movements = sa.table('stock_movements',
+        sa.column('id'), sa.column('organization_id'), sa.column('warehouse_id'), sa.column('sku_id'),
+        sa.column('movement_type'), sa.column('quantity_delta'), sa.column('reserved_delta'), sa.column('note'),
+    )
+    batch = []
+    for org_id, warehouse_id, sku_id, quantity, reserved in levels:
+        batch.append({
+            'id': str(uuid.uuid4()), 'organization_id': org_id, 'warehouse_id': warehouse_id, 'sku_id': sku_id,
+            'movement_type': 'adjustment', 'quantity_delta': quantity or 0, 'reserved_delta': reserved or 0,
+            'note': 'Opening balance',
+        })
+        if len(batch) >= 5000:
+            op.bulk_insert(movements, batch)
+            batch = []
+    if batch:
+        op.bulk_insert(movements, batch)
+
+
+def downgrade():
+    op.drop_index('ix_stock_movements_org_created_at', table_name='stock_movements')
+    op.drop_index('ix_stock_movements_warehouse_sku_created_at', table_name='stock_movements')
+    op.drop_index('ix_stock_movements_sku_id', table_name='stock_movements')
+    op.drop_table('stock_movements')
@@ -0,0 +1,93 @@
+"""weighted-average stock valuation
+
+Revision ID: add_stock_valuations
+Revises: add_low_stock_indexes
+Create Date: 2026-10-19
+
+"""
+import uuid
+from decimal import ROUND_HALF_UP, Decimal
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_stock_valuations'
+down_revision = 'add_low_stock_indexes'
+branch_labels = None
+depends_on = None
+
+PLACES = Decimal('0.0001')
+
+
+def upgrade():
+    op.add_column('stock_movements', sa.Column('unit_cost', sa.Numeric(precision=14, scale=4), nullable=True))
+    op.create_table('stock_valuations',
+    sa.Column('id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('warehouse_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('sku_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('quantity', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('total_value', sa.Numeric(precision=18, scale=4), nullable=False),
+    sa.Column('last_unit_cost', sa.Numeric(precision=14, scale=4), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['sku_id'], ['skus.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['warehouse_id'], ['warehouses.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('warehouse_id', 'sku_id', name='uq_stock_valuation_warehouse_sku')
+    )
+    op.create_index('ix_stock_valuations_sku_id', 'stock_valuations', ['sku_id'], unique=False)
+
+    bind = op.get_bind()
+    # Price the opening balances at the SKU's latest PO price, and PO receipts at their line price.
+    bind.execute(sa.text(
+        "UPDATE stock_movements SET unit_cost = ("
+        "  SELECT l.unit_price FROM purchase_order_lines l JOIN purchase_orders p ON p.id = l.purchase_order_id"
+        "  WHERE l.sku_id = stock_movements.sku_id AND l.unit_price > 0 ORDER BY p.created_at DESC LIMIT 1"
+        ") WHERE movement_type = 'adjustment' AND note = 'Opening balance' AND quantity_delta > 0"
+    ))
+    bind.execute(sa.text(
+        "UPDATE stock_movements SET unit_cost = ("
+        "  SELECT l.unit_price FROM purchase_order_lines l"
+        "  WHERE l.purchase_order_id = stock_movements.reference_id AND l.sku_id = stock_movements.sku_id"
+        "  AND l.unit_price > 0 LIMIT 1"
+        ") WHERE movement_type = 'receipt' AND reference_type = 'purchase_order' AND quantity_delta > 0"
+    ))
+
+    # Seed the valuations by replaying the ledger (same rules as app.services.valuation).
+    state = {}
+    rows = bind.execute(sa.text(
+        "SELECT warehouse_id, sku_id, quantity_delta, unit_cost FROM stock_movements "
+        "WHERE quantity_delta <> 0 ORDER BY created_at, id"
+    ))
+    for warehouse_id, sku_id, quantity, cost in rows:
+        on_hand, value, last = state.get((warehouse_id, sku_id), (Decimal(0), Decimal(0), None))
+        quantity = Decimal(quantity)
+        if quantity > 0 and cost is not None:
+            delta, last = (quantity * Decimal(cost)).quantize(PLACES, rounding=ROUND_HALF_UP), Decimal(cost)
+        else:
+            delta = quantity * (value / on_hand if on_hand > 0 else Decimal(0))
+        state[(warehouse_id, sku_id)] = (
+            on_hand + quantity, (value + delta).quantize(PLACES, rounding=ROUND_HALF_UP), last,
+        )
+    valuations = sa.table('stock_valuations',
+        sa.column('id'), sa.column('warehouse_id'), sa.column('sku_id'),
+        sa.column('quantity'), sa.column('total_value'), sa.column('last_unit_cost'),
+    )
+    batch = []
+    for (warehouse_id, sku_id), (quantity, value, last) in state.items():
+        batch.append({
+            'id': str(uuid.uuid4()), 'warehouse_id': warehouse_id, 'sku_id': sku_id,
+            'quantity': quantity, 'total_value': value, 'last_unit_cost': last,
+        })
+        if len(batch) >= 5000:
+            op.bulk_insert(valuations, batch)
+            batch = []
+    if batch:
+        op.bulk_insert(valuations, batch)
+
+
+def downgrade():
+    op.drop_index('ix_stock_valuations_sku_id', table_name='stock_valuations')
+    op.drop_table('stock_valuations')
+    op.drop_column('stock_movements', 'unit_cost')
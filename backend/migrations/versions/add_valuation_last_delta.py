@@ -0,0 +1,25 @@
+"""value change of the latest movement on stock valuations
+
+Revision ID: add_valuation_last_delta
+Revises: add_valuation_sequence
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_valuation_last_delta'
+down_revision = 'add_valuation_sequence'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('stock_valuations', sa.Column(
+        'last_value_delta', sa.Numeric(precision=18, scale=4), server_default='0', nullable=False
+    ))
+
+
+def downgrade():
+    op.drop_column('stock_valuations', 'last_value_delta')
@@ -0,0 +1,38 @@
+"""record the order movements were applied to stock valuations
+
+Revision ID: add_valuation_sequence
+Revises: add_stock_checkpoints
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_valuation_sequence'
+down_revision = 'add_stock_checkpoints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('stock_movements', sa.Column('valuation_seq', sa.BigInteger(), nullable=True))
+    op.add_column('stock_valuations', sa.Column('applied_count', sa.BigInteger(), server_default='0', nullable=False))
+    # Existing valuations were seeded by replaying in (created_at, id) order; number the movements the same way.
+    op.execute(
+        "UPDATE stock_movements SET valuation_seq = s.n FROM ("
+        "  SELECT id, row_number() OVER (PARTITION BY warehouse_id, sku_id ORDER BY created_at, id) AS n"
+        "  FROM stock_movements WHERE quantity_delta <> 0"
+        ") s WHERE s.id = stock_movements.id"
+    )
+    op.execute(
+        "UPDATE stock_valuations SET applied_count = COALESCE(("
+        "  SELECT max(m.valuation_seq) FROM stock_movements m"
+        "  WHERE m.warehouse_id = stock_valuations.warehouse_id AND m.sku_id = stock_valuations.sku_id"
+        "), 0)"
+    )
+
+
+def downgrade():
+    op.drop_column('stock_valuations', 'applied_count')
+    op.drop_column('stock_movements', 'valuation_seq')
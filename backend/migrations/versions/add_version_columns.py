@@ -0,0 +1,30 @@
+"""version columns for optimistic concurrency
+
+Revision ID: add_version_columns
+Revises: add_idempotency_keys
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_version_columns'
+down_revision = 'add_idempotency_keys'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = [
+    'users', 'roles', 'employees', 'customers', 'leads', 'invoices',
+    'warehouses', 'skus', 'purchase_orders', 'projects',
+]
+
+
+def upgrade():
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    for table in VERSIONED_TABLES:
+        op.drop_column(table, 'version')
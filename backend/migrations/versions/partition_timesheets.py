@@ -0,0 +1,92 @@
+"""partition timesheets by month of work_date
+
+Revision ID: partition_timesheets
+Revises: add_version_columns
+Create Date: 2026-10-19
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'partition_timesheets'
+down_revision = 'add_version_columns'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+INDEXES = [
+    ('ix_timesheets_organization_id', 'organization_id'),
+    ('ix_timesheets_employee_id', 'employee_id'),
+    ('ix_timesheets_task_id', 'task_id'),
+    ('ix_timesheets_org_updated_at', 'organization_id, updated_at'),
+    ('ix_timesheets_org_work_date', 'organization_id, work_date'),
+]
+
+FOREIGN_KEYS = [
+    ('timesheets_organization_id_fkey', 'organization_id', 'organizations', 'CASCADE'),
+    ('timesheets_employee_id_fkey', 'employee_id', 'employees', 'CASCADE'),
+    ('timesheets_task_id_fkey', 'task_id', 'tasks', 'CASCADE'),
+    ('timesheets_approved_by_user_id_fkey', 'approved_by_user_id', 'users', 'SET NULL'),
+]
+
+
+def _add_months(d, months):
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _finish_table(primary_key, indexes):
+    op.execute(f"ALTER TABLE timesheets ADD PRIMARY KEY ({primary_key})")
+    for name, columns in indexes:
+        op.execute(f"CREATE INDEX {name} ON timesheets ({columns})")
+    for name, column, target, action in FOREIGN_KEYS:
+        op.execute(
+            f"ALTER TABLE timesheets ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+            f"REFERENCES {target} (id) ON DELETE {action}"
+        )
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    # Build the partitioned table next to the old one, copy, then swap. Keys and
+    # indexes are added after the copy (faster, and the old names are free by then).
+    op.execute("ALTER TABLE timesheets RENAME TO timesheets_unpartitioned")
+    op.execute(
+        "CREATE TABLE timesheets (LIKE timesheets_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY RANGE (work_date)"
+    )
+    op.execute("CREATE TABLE timesheets_default PARTITION OF timesheets DEFAULT")
+
+    first = bind.execute(sa.text("SELECT min(work_date) FROM timesheets_unpartitioned")).scalar()
+    this_month = date.today().replace(day=1)
+    month = min(first.replace(day=1), this_month) if first else this_month
+    last = _add_months(this_month, MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE timesheets_y{month.year:04d}m{month.month:02d} PARTITION OF timesheets "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+
+    op.execute("INSERT INTO timesheets SELECT * FROM timesheets_unpartitioned")
+    op.execute("DROP TABLE timesheets_unpartitioned")
+    _finish_table('id, work_date', INDEXES)
+    op.execute("ANALYZE timesheets")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("ALTER TABLE timesheets RENAME TO timesheets_partitioned")
+    op.execute("CREATE TABLE timesheets (LIKE timesheets_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    op.execute("INSERT INTO timesheets SELECT * FROM timesheets_partitioned")
+    # Also drops every partition still attached; detached ones are left alone.
+    op.execute("DROP TABLE timesheets_partitioned")
+    _finish_table('id', INDEXES[:-1])